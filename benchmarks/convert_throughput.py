@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" convert_throughput.py
+Measures the end-to-end MB/s of converting a synthetic Nihon Kohden EDF into an HDF5NK file, with blocks written
+synchronously and with a background writer overlapping decoding and writing.
+
+Usage: python benchmarks/convert_throughput.py [--minutes M] [--channels N] [--storage PRESET] [--repeat N]
+"""
+
+# Imports #
+# Standard Libraries #
+import argparse
+import datetime
+import pathlib
+import statistics
+import tempfile
+import time
+
+# Third-Party Packages #
+import numpy as np
+
+from nkhdf5.converter import convert_edf
+
+# Definitions #
+# Constants #
+SAMPLE_RATE = 2000
+START = datetime.datetime(2023, 7, 20, 13, 30, 0)
+
+
+# Functions #
+def write_edf(path: pathlib.Path, n_channels: int, seconds: int) -> pathlib.Path:
+    """Writes a synthetic EDF of 1 second records with intracranial, scalp and EKG channels."""
+    labels = [f"POL LA{i + 1}" for i in range(n_channels - 20)]
+    labels += ["POL Fp1", "POL C3", "POL EKG1"] + [f"POL DC{i + 1:02d}" for i in range(17)]
+
+    def field(value: object, width: int) -> bytes:
+        return str(value).ljust(width)[:width].encode("ascii")
+
+    header = b"".join(
+        [
+            field(0, 8),
+            field("X X X X", 80),
+            field("Startdate X X X X", 80),
+            field(START.strftime("%d.%m.%y"), 8),
+            field(START.strftime("%H.%M.%S"), 8),
+            field(256 * (n_channels + 1), 8),
+            field("", 44),
+            field(seconds, 8),
+            field(1, 8),
+            field(n_channels, 4),
+        ]
+    )
+    signal_fields = [
+        (labels, 16),
+        ([""] * n_channels, 80),
+        (["uV"] * n_channels, 8),
+        ([-3200] * n_channels, 8),
+        ([3200] * n_channels, 8),
+        ([-32768] * n_channels, 8),
+        ([32767] * n_channels, 8),
+        (["HP:0.1Hz LP:300Hz"] * n_channels, 80),
+        ([SAMPLE_RATE] * n_channels, 8),
+        ([""] * n_channels, 32),
+    ]
+    for values, width in signal_fields:
+        header += b"".join(field(v, width) for v in values)
+
+    rng = np.random.default_rng(0)
+    record = rng.integers(-2000, 2000, size=(n_channels, SAMPLE_RATE), dtype="<i2").tobytes()
+    with path.open("wb") as file:
+        file.write(header)
+        for _ in range(seconds):
+            file.write(record)
+    return path
+
+
+# Main #
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--minutes", type=float, default=5.0, help="The duration of the synthetic recording.")
+    parser.add_argument("--channels", type=int, default=256, help="The number of EDF channels.")
+    parser.add_argument("--storage", default=None, help="The storage preset, defaults to the h5py defaults.")
+    parser.add_argument("--digital", action="store_true", help="Store int16 digital samples.")
+    parser.add_argument("--repeat", type=int, default=3, help="The number of conversions of each mode.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_dir = pathlib.Path(tmp_dir)
+        edf_path = write_edf(tmp_dir / "recording.edf", args.channels, int(args.minutes * 60))
+        edf_mib = edf_path.stat().st_size / 2**20
+        print(f"edf: {edf_mib:.0f} MiB, {args.channels} channels, {args.minutes:g} min at {SAMPLE_RATE} Hz")
+
+        for write_queue in (0, 2):
+            times = []
+            for i in range(args.repeat):
+                out_path = tmp_dir / f"out-{write_queue}-{i}.h5"
+                start = time.perf_counter()
+                convert_edf(
+                    tmp_dir,
+                    edf_path.name,
+                    out_path,
+                    "bench",
+                    storage=args.storage,
+                    digital=args.digital,
+                    write_queue=write_queue,
+                )
+                times.append(time.perf_counter() - start)
+                out_path.unlink()
+            seconds = statistics.median(times)
+            mode = "synchronous" if write_queue == 0 else f"background, queue of {write_queue}"
+            print(f"{mode:<28} {seconds:>7.2f} s  {edf_mib / seconds:>7.1f} MiB/s of EDF")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" import_time.py
+Measures how long the nkhdf5 entry points take to import in a fresh interpreter.
+
+Usage: python benchmarks/import_time.py [--repeat N]
+"""
+
+# Imports #
+# Standard Libraries #
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+# Third-Party Packages #
+
+# Definitions #
+# Constants #
+STATEMENTS = {
+    "interpreter": "pass",
+    "nkhdf5": "import nkhdf5",
+    "cli": "import nkhdf5.__main__",
+    "catalog": "import nkhdf5.catalog",
+    "windows": "import nkhdf5.windows",
+    "converter": "import nkhdf5.converter",
+    "hdf5nk": "import nkhdf5.hdf5nk",
+}
+
+HEAVY_MODULES = ("h5py", "hdf5objects", "mne", "scipy", "pandas")
+
+
+# Functions #
+def time_import(statement: str, repeat: int) -> float:
+    """Gets the median wall time of running a statement in a new interpreter."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def loaded_heavy_modules(statement: str) -> list[str]:
+    """Gets the heavy dependencies which a statement imports."""
+    check = f"import sys; {statement}; print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", check], check=True, capture_output=True, text=True).stdout
+    return output.split()
+
+
+# Main #
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5, help="The number of runs of each statement.")
+    args = parser.parse_args()
+
+    print(f"{'entry point':<12} {'seconds':>8}  heavy modules loaded")
+    for name, statement in STATEMENTS.items():
+        seconds = time_import(statement, args.repeat)
+        print(f"{name:<12} {seconds:>8.3f}  {' '.join(loaded_heavy_modules(statement)) or '-'}")
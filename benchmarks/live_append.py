@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+""" live_append.py
+Measures the append throughput and latency of LiveWriter and the lag of a LiveReader tailing it in another process,
+against a simulated 2 kHz, 256-channel intracranial EEG stream.
+
+Usage: python benchmarks/live_append.py [--seconds S] [--block-ms MS] [--flush-interval S] [--realtime]
+"""
+
+# Imports #
+# Standard Libraries #
+import argparse
+import multiprocessing
+import pathlib
+import statistics
+import tempfile
+import time
+
+# Third-Party Packages #
+import numpy as np
+
+from nkhdf5.live import LiveReader
+from nkhdf5.live import LiveWriter
+
+# Definitions #
+# Constants #
+SAMPLE_RATE = 2000.0
+N_CHANNELS = 256
+
+
+# Functions #
+def tail(path: pathlib.Path, ready: multiprocessing.Event, queue: multiprocessing.Queue) -> None:
+    """Tails the file and reports the samples read and the lag between acquisition and visibility of each block."""
+    ready.wait()
+    lags = []
+    n_samples = 0
+    with LiveReader(path) as reader:
+        for blocks in reader.tail(timeout=2.0, poll_interval=0.005):
+            data, nanostamps = blocks["data_ieeg"]
+            lags.append((time.time_ns() - int(nanostamps[-1])) / 1e6)
+            n_samples += data.shape[0]
+    queue.put((n_samples, lags))
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Gets a percentile of the values."""
+    return float(np.percentile(values, q)) if values else float("nan")
+
+
+# Main #
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--seconds", type=float, default=30.0, help="The duration of the simulated stream.")
+    parser.add_argument("--block-ms", type=float, default=50.0, help="The duration of each appended block.")
+    parser.add_argument("--flush-interval", type=float, default=0.1, help="The seconds between flushes.")
+    parser.add_argument("--realtime", action="store_true", help="Pace the appends at the acquisition rate.")
+    args = parser.parse_args()
+
+    block_samples = int(SAMPLE_RATE * args.block_ms / 1000)
+    n_blocks = int(args.seconds * 1000 / args.block_ms)
+    rng = np.random.default_rng(0)
+    block = rng.standard_normal((block_samples, N_CHANNELS)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = pathlib.Path(tmp_dir, "live.h5")
+        ready = multiprocessing.Event()
+        queue = multiprocessing.Queue()
+        reader = multiprocessing.Process(target=tail, args=(path, ready, queue))
+        reader.start()
+
+        latencies = []
+        with LiveWriter(
+            path, "bench", time.time_ns(), SAMPLE_RATE, {"data_ieeg": N_CHANNELS}, flush_interval=args.flush_interval
+        ) as writer:
+            ready.set()
+            start, start_ns = time.perf_counter(), time.time_ns()
+            for i in range(n_blocks):
+                if args.realtime:
+                    # A block can only be appended once its last sample has been acquired.
+                    time.sleep(max(0.0, start + (i + 1) * args.block_ms / 1000 - time.perf_counter()))
+                append_start = time.perf_counter()
+                writer.append({"data_ieeg": block}, start=start_ns if i == 0 else None)
+                latencies.append((time.perf_counter() - append_start) * 1000)
+            elapsed = time.perf_counter() - start
+            flushes = writer.flushes
+
+        n_read, lags = queue.get()
+        reader.join()
+
+    n_samples = n_blocks * block_samples
+    print(f"stream:     {N_CHANNELS} channels at {SAMPLE_RATE:g} Hz, {args.block_ms:g} ms blocks, {n_blocks} blocks")
+    print(f"throughput: {n_samples / elapsed:,.0f} samples/s ({n_samples * N_CHANNELS * 4 / elapsed / 2**20:.1f} MiB/s)")
+    print(f"            {n_samples / elapsed / SAMPLE_RATE:.1f}x real time, {flushes} flushes")
+    print(f"append:     median {statistics.median(latencies):.2f} ms, p99 {percentile(latencies, 99):.2f} ms")
+    print(f"reader:     {n_read} of {n_samples} samples read")
+    if args.realtime:
+        print(f"lag:        median {percentile(lags, 50):.1f} ms, p99 {percentile(lags, 99):.1f} ms")
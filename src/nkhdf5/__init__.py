@@ -1,2 +1,57 @@
-"""NKHDF5."""
-from . import hdf5nk
+"""NKHDF5.
+
+Submodules are imported on first attribute access (PEP 562), so importing the package or running the command line
+interface does not load h5py, hdf5objects or MNE until a submodule which needs them is used.
+"""
+import importlib
+from typing import Any
+
+
+_SUBMODULES: frozenset[str] = frozenset(
+    {
+        "background",
+        "catalog",
+        "chunkcache",
+        "converter",
+        "edffile",
+        "edfreader",
+        "extraction",
+        "handles",
+        "hdf5nk",
+        "layout",
+        "live",
+        "montage",
+        "pyramid",
+        "quality",
+        "scaling",
+        "segments",
+        "storage",
+        "timeaxis",
+        "timestamps",
+        "virtual",
+        "windows",
+    }
+)
+
+__all__ = sorted(_SUBMODULES)
+
+
+def __getattr__(name: str) -> Any:
+    """Imports a submodule the first time it is accessed as an attribute of the package.
+
+    Args:
+        name: The name of the attribute.
+
+    Returns:
+        The submodule.
+    """
+    if name in _SUBMODULES:
+        module = importlib.import_module(f".{name}", __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    """Lists the attributes of the package, including the submodules which are not imported yet."""
+    return sorted(set(globals()) | _SUBMODULES)
@@ -1,12 +1,304 @@
 """Command-line interface."""
+import csv
+import datetime
+import functools
+import pathlib
+from typing import Any
+
 import click
 
+from .background import DEFAULT_WRITE_QUEUE
+from .layout import SERIES_DATASET_NAMES
+from .storage import DEFAULT_BLOCK_SIZE
+from .storage import STORAGE_PRESETS
+
+
+class Timestamp(click.ParamType):
+    """A nanostamp given either as an integer or as a local ISO datetime, e.g. "2023-07-20 13:30:00"."""
+
+    name = "timestamp"
+
+    def convert(self, value: Any, param: click.Parameter | None, ctx: click.Context | None) -> int:
+        """Converts the value into a nanostamp."""
+        if isinstance(value, int):
+            return value
+        try:
+            return int(value)
+        except ValueError:
+            pass
+        try:
+            local = datetime.datetime.fromisoformat(value)
+        except ValueError:
+            self.fail(f"{value!r} is neither a nanostamp nor an ISO datetime.", param, ctx)
+        from .timestamps import local_datetime_to_nanostamp
+
+        return local_datetime_to_nanostamp(local)
+
+
+TIMESTAMP = Timestamp()
+
+
+def storage_options(command: Any) -> Any:
+    """Adds the storage preset and compression options to a command."""
 
-@click.command()
+    @click.option(
+        "--storage",
+        type=click.Choice(sorted(STORAGE_PRESETS)),
+        help="The chunking and compression preset, defaults to the h5py defaults.",
+    )
+    @click.option(
+        "--compression",
+        type=click.Choice(["gzip", "lzf", "none"]),
+        help="Overrides the compression of the preset, the analysis preset is used if none is given.",
+    )
+    @click.option(
+        "--compression-level", type=int, help="The gzip compression level, of --compression or of a gzip preset."
+    )
+    @functools.wraps(command)
+    def wrapper(*args: Any, storage: str | None, compression: str | None, compression_level: int | None, **kwargs):
+        if compression is not None:
+            from .storage import get_storage_preset
+
+            preset = get_storage_preset(storage or "analysis")
+            storage = preset.with_compression(None if compression == "none" else compression, compression_level)
+        elif compression_level is not None:
+            from .storage import get_storage_preset
+
+            preset = get_storage_preset(storage or "analysis")
+            if preset.compression != "gzip":
+                raise click.UsageError("--compression-level needs gzip compression, give --compression gzip.")
+            storage = preset.with_compression(preset.compression, compression_level)
+        return command(*args, storage=storage, **kwargs)
+
+    return wrapper
+
+
+def report(result: Any) -> None:
+    """Echoes the status of a conversion or extraction result."""
+    name = getattr(result, "edf_fn", None) or getattr(result, "name", "")
+    message = f"{result.status}: {name}"
+    click.echo(message if result.error is None else f"{message} ({result.error})")
+
+
+@click.group(invoke_without_command=True)
 @click.version_option()
 def main() -> None:
     """NKHDF5."""
 
 
+@main.command()
+@click.argument("edf_dir", type=click.Path(exists=True, file_okay=False, path_type=pathlib.Path))
+@click.argument("out_dir", type=click.Path(file_okay=False, path_type=pathlib.Path))
+@click.option("--subject", "subject_id", required=True, help="The subject ID written to each file.")
+@click.option("--edf", "edf_fns", multiple=True, help="An EDF file name to convert, defaults to every EDF in EDF_DIR.")
+@click.option("--coords", type=click.Path(exists=True, dir_okay=False), help="A .mat file with an 'elecmatrix'.")
+@click.option("--jobs", "-j", default=1, show_default=True, help="The number of conversion processes.")
+@click.option(
+    "--block-size", default=DEFAULT_BLOCK_SIZE, show_default=True, help="The number of samples written at a time."
+)
+@click.option("--resume", is_flag=True, help="Skip outputs which already exist and are openable.")
+@click.option("--compact-time", is_flag=True, help="Store time axes as start, sample rate and discontinuities.")
+@click.option(
+    "--shared-time/--separate-time",
+    default=True,
+    show_default=True,
+    help="Share one time axis dataset between every series or store a copy for each.",
+)
+@click.option("--digital", is_flag=True, help="Store the int16 EDF samples with a per-channel gain and offset.")
+@click.option(
+    "--write-queue",
+    default=DEFAULT_WRITE_QUEUE,
+    show_default=True,
+    help="The number of blocks written in the background while the next are read, 0 to write synchronously.",
+)
+@click.option("--pyramid", is_flag=True, help="Build 10x, 100x and 1000x min/max/mean levels for overview reads.")
+@click.option("--quality", is_flag=True, help="Store per-channel statistics and quality metrics of every 10 s.")
+@storage_options
+def convert(
+    edf_dir: pathlib.Path,
+    out_dir: pathlib.Path,
+    subject_id: str,
+    edf_fns: tuple[str, ...],
+    coords: str | None,
+    jobs: int,
+    block_size: int,
+    resume: bool,
+    compact_time: bool,
+    shared_time: bool,
+    digital: bool,
+    write_queue: int,
+    pyramid: bool,
+    quality: bool,
+    storage: Any,
+) -> None:
+    """Convert the EDF files in EDF_DIR into HDF5NK files in OUT_DIR."""
+    from .converter import convert_edfs
+    from .edfreader import get_edf_list
+    from .pyramid import DEFAULT_FACTORS
+
+    channel_coords = None
+    if coords is not None:
+        import scipy.io
+
+        channel_coords = scipy.io.loadmat(coords)["elecmatrix"]
+
+    results = convert_edfs(
+        edf_dir,
+        edf_fns or get_edf_list(edf_dir),
+        out_dir,
+        subject_id,
+        channel_coords=channel_coords,
+        block_size=block_size,
+        jobs=jobs,
+        resume=resume,
+        compact_time=compact_time,
+        storage=storage,
+        digital=digital,
+        write_queue=write_queue,
+        shared_time=shared_time,
+        pyramid_factors=DEFAULT_FACTORS if pyramid else None,
+        quality=quality,
+        progress=report,
+    )
+    if any(result.status == "failed" for result in results):
+        raise SystemExit(1)
+
+
+@main.command()
+@click.argument("sources", type=click.Path(exists=True, path_type=pathlib.Path))
+@click.argument("out_dir", type=click.Path(file_okay=False, path_type=pathlib.Path))
+@click.option("--start", type=TIMESTAMP, help="The start of a single window, a nanostamp or local ISO datetime.")
+@click.option("--end", type=TIMESTAMP, help="The end of a single window, exclusive.")
+@click.option("--name", help="The file name of a single window, defaults to window-<start>.h5.")
+@click.option(
+    "--windows",
+    "windows_csv",
+    type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path),
+    help="A CSV of windows with name, start and end columns.",
+)
+@click.option(
+    "--series",
+    multiple=True,
+    type=click.Choice(sorted(SERIES_DATASET_NAMES)),
+    help="A series to write, defaults to every series.",
+)
+@click.option("--subject", "subject_id", help="The subject ID written to each file, defaults to that of the sources.")
+@click.option("--catalog", "catalog_path", type=click.Path(dir_okay=False), help="An archive catalog of SOURCES.")
+@click.option("--jobs", "-j", default=1, show_default=True, help="The number of extraction processes.")
+@click.option("--resume", is_flag=True, help="Skip outputs which already exist and are openable.")
+@storage_options
+def concat(
+    sources: pathlib.Path,
+    out_dir: pathlib.Path,
+    start: int | None,
+    end: int | None,
+    name: str | None,
+    windows_csv: pathlib.Path | None,
+    series: tuple[str, ...],
+    subject_id: str | None,
+    catalog_path: str | None,
+    jobs: int,
+    resume: bool,
+    storage: Any,
+) -> None:
+    """Write [start, end) windows of the HDF5NK files in SOURCES into new files in OUT_DIR."""
+    from .extraction import ExtractionWindow
+    from .extraction import write_windows
+
+    windows = []
+    if start is not None and end is not None:
+        windows.append(ExtractionWindow(name or f"window-{start}.h5", start, end))
+    elif start is not None or end is not None:
+        raise click.UsageError("--start and --end must be given together.")
+    if windows_csv is not None:
+        with windows_csv.open(newline="") as file:
+            for row in csv.DictReader(file):
+                row_start = TIMESTAMP.convert(row["start"], None, None)
+                row_end = TIMESTAMP.convert(row["end"], None, None)
+                windows.append(ExtractionWindow(row["name"], row_start, row_end))
+    if not windows:
+        raise click.UsageError("Give a window with --start and --end or a CSV of windows with --windows.")
+    names = [window.name for window in windows]
+    duplicates = sorted({window_name for window_name in names if names.count(window_name) > 1})
+    if duplicates:
+        raise click.UsageError(f"Window names must be unique, repeated: {', '.join(duplicates)}.")
+
+    results = write_windows(
+        sources,
+        windows,
+        out_dir,
+        series=series or None,
+        subject_id=subject_id,
+        storage=storage,
+        catalog_path=catalog_path,
+        jobs=jobs,
+        resume=resume,
+        progress=report,
+    )
+    if any(result.status == "failed" for result in results):
+        raise SystemExit(1)
+
+
+@main.command()
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+def inspect(path: pathlib.Path) -> None:
+    """Print the time span and storage layout of the series of the HDF5NK file at PATH."""
+    import h5py
+
+    from .segments import get_segments
+    from .timeaxis import get_time_axis
+    from .timestamps import nanostamps_to_datetime64
+
+    with h5py.File(path, "r") as file:
+        for attribute in ("subject_id", "start", "end"):
+            if attribute in file.attrs:
+                click.echo(f"{attribute}: {file.attrs[attribute]}")
+        for series, dataset_name in SERIES_DATASET_NAMES.items():
+            if dataset_name not in file:
+                continue
+            dataset = file[dataset_name]
+            time_axis = get_time_axis(dataset)
+            click.echo(f"{series} ({dataset_name}):")
+            click.echo(f"  shape: {dataset.shape}  dtype: {dataset.dtype}")
+            click.echo(f"  chunks: {dataset.chunks}  compression: {dataset.compression}")
+            click.echo(f"  sample rate: {time_axis.sample_rate}")
+            click.echo(f"  time axis: {type(time_axis).__name__}")
+            click.echo(f"  sample format: {dataset.attrs.get('sample_format', 'float')}")
+            if len(time_axis) > 0:
+                span = nanostamps_to_datetime64(time_axis[[0, len(time_axis) - 1]], local=True)
+                click.echo(f"  span: {span[0]} - {span[1]}")
+                click.echo(f"  segments: {len(get_segments(dataset))}")
+
+
+@main.group()
+def catalog() -> None:
+    """Maintain and query archive catalogs."""
+
+
+@catalog.command()
+@click.argument("catalog_path", type=click.Path(dir_okay=False, path_type=pathlib.Path))
+@click.argument("sources", type=click.Path(exists=True, path_type=pathlib.Path))
+@click.option("--keep-missing", is_flag=True, help="Keep the entries of files which no longer exist.")
+def update(catalog_path: pathlib.Path, sources: pathlib.Path, keep_missing: bool) -> None:
+    """Index the new or changed HDF5NK files in SOURCES into the catalog at CATALOG_PATH."""
+    from .catalog import ArchiveCatalog
+
+    archive = ArchiveCatalog(catalog_path)
+    indexed = archive.update(sources, prune=not keep_missing)
+    click.echo(f"indexed {len(indexed)} file(s), {len(archive)} in catalog")
+
+
+@catalog.command()
+@click.argument("catalog_path", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.argument("start", type=TIMESTAMP)
+@click.argument("end", type=TIMESTAMP)
+def find(catalog_path: pathlib.Path, start: int, end: int) -> None:
+    """Print the files of the catalog at CATALOG_PATH which overlap [START, END)."""
+    from .catalog import ArchiveCatalog
+
+    for path in ArchiveCatalog(catalog_path).find_paths(start, end):
+        click.echo(str(path))
+
+
 if __name__ == "__main__":
     main(prog_name="python-nkhdf5")  # pragma: no cover
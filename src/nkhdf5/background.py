@@ -0,0 +1,119 @@
+"""background.py
+A background thread which performs queued HDF5 writes while the caller prepares the next blocks.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections.abc import Callable
+import queue
+import threading
+from typing import Any
+
+# Third-Party Packages #
+
+# Local Packages #
+
+
+# Definitions #
+# Constants #
+DEFAULT_MAX_PENDING: int = 2
+# Conversions write synchronously unless a write queue is asked for, as hdf5objects is not thread-safe.
+DEFAULT_WRITE_QUEUE: int = 0
+
+
+# Classes #
+class BackgroundWriter:
+    """Runs write calls in order on a background thread, so reading and decoding overlap with writing to disk.
+
+    Writes wait in a bounded queue: when it is full submit blocks until the thread catches up, which bounds the
+    memory of the pending blocks. The first exception raised by a write stops the thread and is raised again by the
+    next submit, flush or close. Only the writer thread should touch the file while writes are pending.
+
+    Attributes:
+        max_pending: The maximum number of writes waiting in the queue.
+        writes: The number of writes performed.
+
+    Args:
+        max_pending: The maximum number of writes waiting in the queue.
+    """
+
+    def __init__(self, max_pending: int = DEFAULT_MAX_PENDING) -> None:
+        if max_pending < 1:
+            raise ValueError("At least one write must be allowed to wait.")
+        self.max_pending: int = max_pending
+        self.writes: int = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: BaseException | None = None
+        self._thread: threading.Thread | None = threading.Thread(target=self._run, name="nkhdf5-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "BackgroundWriter":
+        """Returns the writer for use as a context manager."""
+        return self
+
+    def __exit__(self, exc_type: Any, *args: Any) -> None:
+        """Waits for the pending writes and stops the thread, raising a write error unless another is in flight."""
+        try:
+            self.close()
+        except Exception:
+            if exc_type is None:
+                raise
+
+    def _run(self) -> None:
+        """Performs queued writes until the stop sentinel is received."""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is None:
+                    function, args, kwargs = item
+                    function(*args, **kwargs)
+                    self.writes += 1
+            except BaseException as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        """Raises the error of a failed write."""
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def submit(self, function: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """Queues a write, blocking while the queue is full.
+
+        Args:
+            function: The write to perform.
+            *args: The positional arguments of the write.
+            **kwargs: The keyword arguments of the write.
+        """
+        if self._thread is None:
+            raise RuntimeError("The writer is closed.")
+        self._raise_error()
+        self._queue.put((function, args, kwargs))
+
+    def flush(self) -> None:
+        """Waits until every queued write is performed."""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Waits for the queued writes, then stops the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+        self._raise_error()
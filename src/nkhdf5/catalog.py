@@ -0,0 +1,272 @@
+"""catalog.py
+A persistent time index of the HDF5NK files of a patient's archive.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections.abc import Iterable
+from dataclasses import dataclass
+import pathlib
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .layout import SERIES_DATASET_NAMES
+from .timeaxis import get_discontinuity_records
+from .timeaxis import get_time_axis
+from .timestamps import end_nanostamp
+from .windows import is_source
+from .windows import list_sources
+
+
+# Definitions #
+# Constants #
+SERIES_NAMES: tuple[str, ...] = tuple(SERIES_DATASET_NAMES.keys())
+
+FILES_DTYPE = np.dtype(
+    [
+        ("path", h5py.string_dtype()),
+        ("start", np.int64),
+        ("end", np.int64),
+        ("sample_rate", np.float64),
+        ("n_samples", np.int64),
+        ("mtime_ns", np.int64),
+        ("size", np.int64),
+    ]
+    + [(f"{series}_count", np.int32) for series in SERIES_NAMES]
+)
+
+
+# Classes #
+@dataclass
+class CatalogEntry:
+    """The time index information of one HDF5NK file.
+
+    Attributes:
+        path: The path of the file.
+        start: The nanostamp of the first sample.
+        end: The nanostamp after the end of the recording, one sample period after the last sample.
+        sample_rate: The sample rate of the intracranial EEG series.
+        n_samples: The number of samples in the intracranial EEG series.
+        mtime_ns: The modification time of the file when it was indexed.
+        size: The size of the file when it was indexed.
+        channel_counts: The number of channels of each series.
+        discontinuities: The (sample index, nanostamp) record of each continuous segment.
+    """
+
+    path: pathlib.Path
+    start: int
+    end: int
+    sample_rate: float
+    n_samples: int
+    mtime_ns: int
+    size: int
+    channel_counts: dict[str, int]
+    discontinuities: np.ndarray
+
+    @classmethod
+    def from_file(cls, path: pathlib.Path | str) -> "CatalogEntry":
+        """Scans an HDF5NK file for its time index information.
+
+        Args:
+            path: The path of the file.
+
+        Returns:
+            The catalog entry of the file.
+        """
+        path = pathlib.Path(path).resolve()
+        stat = path.stat()
+        with h5py.File(path, "r") as file:
+            series = file[SERIES_DATASET_NAMES["data_ieeg"]]
+            time_axis = get_time_axis(series)
+            n_samples = len(time_axis)
+            start = int(file.attrs.get("start", 0)) or (int(time_axis[0]) if n_samples else 0)
+            end = int(file.attrs.get("end", 0))
+            if not end and n_samples:
+                end = end_nanostamp(time_axis[n_samples - 1], time_axis.sample_rate)
+            channel_counts = {
+                name: file[dataset_name].shape[1] if dataset_name in file else 0
+                for name, dataset_name in SERIES_DATASET_NAMES.items()
+            }
+            return cls(
+                path=path,
+                start=start,
+                end=end,
+                sample_rate=time_axis.sample_rate,
+                n_samples=n_samples,
+                mtime_ns=stat.st_mtime_ns,
+                size=stat.st_size,
+                channel_counts=channel_counts,
+                discontinuities=get_discontinuity_records(series),
+            )
+
+    def is_current(self) -> bool:
+        """Checks if the file is unchanged since it was indexed.
+
+        Returns:
+            True if the file exists with the same modification time and size.
+        """
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return False
+        return stat.st_mtime_ns == self.mtime_ns and stat.st_size == self.size
+
+
+class ArchiveCatalog:
+    """An on-disk index of the time spans of HDF5NK files which answers interval-overlap queries.
+
+    Entries are kept sorted by start with a running maximum of their ends, so the files overlapping a window are
+    found with two binary searches instead of opening any HDF5NK file.
+
+    Attributes:
+        path: The path of the catalog file.
+        entries: The catalog entries sorted by start.
+
+    Args:
+        path: The path of the catalog file, it is loaded if it exists.
+    """
+
+    def __init__(self, path: pathlib.Path | str) -> None:
+        self.path: pathlib.Path = pathlib.Path(path)
+        self.entries: list[CatalogEntry] = []
+        self._starts: np.ndarray = np.empty((0,), dtype=np.int64)
+        self._ends: np.ndarray = np.empty((0,), dtype=np.int64)
+        self._max_ends: np.ndarray = np.empty((0,), dtype=np.int64)
+
+        if self.path.is_file():
+            self.load()
+
+    def __len__(self) -> int:
+        """The number of files in the catalog."""
+        return len(self.entries)
+
+    def _sort(self) -> None:
+        """Sorts the entries by start and rebuilds the search arrays."""
+        self.entries.sort(key=lambda entry: (entry.start, str(entry.path)))
+        self._starts = np.array([entry.start for entry in self.entries], dtype=np.int64)
+        self._ends = np.array([entry.end for entry in self.entries], dtype=np.int64)
+        self._max_ends = np.maximum.accumulate(self._ends) if self._ends.size else self._ends
+
+    def load(self) -> None:
+        """Loads the entries from the catalog file."""
+        with h5py.File(self.path, "r") as file:
+            files = file["files"][...]
+            discontinuities = file["discontinuities"][...]
+
+        owners = discontinuities[:, 0]
+        self.entries = [
+            CatalogEntry(
+                path=pathlib.Path(row["path"].decode() if isinstance(row["path"], bytes) else row["path"]),
+                start=int(row["start"]),
+                end=int(row["end"]),
+                sample_rate=float(row["sample_rate"]),
+                n_samples=int(row["n_samples"]),
+                mtime_ns=int(row["mtime_ns"]),
+                size=int(row["size"]),
+                channel_counts={
+                    series: int(row[f"{series}_count"]) if f"{series}_count" in files.dtype.names else 0
+                    for series in SERIES_NAMES
+                },
+                discontinuities=discontinuities[owners == i, 1:],
+            )
+            for i, row in enumerate(files)
+        ]
+        self._sort()
+
+    def save(self) -> None:
+        """Writes the entries to the catalog file, replacing it only once the new file is complete."""
+        files = np.empty((len(self.entries),), dtype=FILES_DTYPE)
+        for i, entry in enumerate(self.entries):
+            files[i] = (
+                str(entry.path),
+                entry.start,
+                entry.end,
+                entry.sample_rate,
+                entry.n_samples,
+                entry.mtime_ns,
+                entry.size,
+                *(entry.channel_counts.get(series, 0) for series in SERIES_NAMES),
+            )
+        discontinuities = [
+            np.column_stack([np.full(len(entry.discontinuities), i, dtype=np.int64), entry.discontinuities])
+            for i, entry in enumerate(self.entries)
+        ]
+        discontinuities = np.concatenate(discontinuities) if discontinuities else np.empty((0, 3), dtype=np.int64)
+
+        part_path = self.path.with_name(self.path.name + ".part")
+        with h5py.File(part_path, "w") as file:
+            file.create_dataset("files", data=files)
+            file.create_dataset("discontinuities", data=discontinuities.astype(np.int64).reshape(-1, 3))
+        part_path.replace(self.path)
+
+    def update(self, sources: pathlib.Path | str | Iterable[pathlib.Path | str], prune: bool = True) -> list[pathlib.Path]:
+        """Indexes new or changed HDF5NK files and saves the catalog.
+
+        Files which are already indexed and unchanged are not opened. Files which are not HDF5NK files, e.g. the
+        catalog itself when it is saved in the directory it indexes, are skipped.
+
+        Args:
+            sources: A directory of HDF5NK files or the paths of the files.
+            prune: Determines if entries of files which no longer exist are removed.
+
+        Returns:
+            The paths of the files which were (re)indexed.
+        """
+        by_path = {entry.path: entry for entry in self.entries}
+        if prune:
+            by_path = {path: entry for path, entry in by_path.items() if path.is_file()}
+
+        indexed = []
+        for path in list_sources(sources, check=False):
+            path = path.resolve()
+            entry = by_path.get(path, None)
+            if entry is None or not entry.is_current():
+                if path == self.path.resolve() or not is_source(path):
+                    by_path.pop(path, None)
+                    continue
+                by_path[path] = CatalogEntry.from_file(path)
+                indexed.append(path)
+
+        self.entries = list(by_path.values())
+        self._sort()
+        self.save()
+        return indexed
+
+    def find(self, start: int, stop: int) -> list[CatalogEntry]:
+        """Finds the files which overlap a [start, stop) nanostamp window.
+
+        Args:
+            start: The first nanostamp of the window.
+            stop: The nanostamp after the end of the window.
+
+        Returns:
+            The entries of the overlapping files, sorted by start.
+        """
+        last = int(np.searchsorted(self._starts, stop, side="left"))
+        first = int(np.searchsorted(self._max_ends[:last], start, side="right"))
+        return [self.entries[i] for i in range(first, last) if self._ends[i] > start]
+
+    def find_paths(self, start: int, stop: int) -> list[pathlib.Path]:
+        """Finds the paths of the files which overlap a [start, stop) nanostamp window.
+
+        Args:
+            start: The first nanostamp of the window.
+            stop: The nanostamp after the end of the window.
+
+        Returns:
+            The paths of the overlapping files, sorted by start.
+        """
+        return [entry.path for entry in self.find(start, stop)]
@@ -0,0 +1,311 @@
+"""chunkcache.py
+A size-bounded, chunk-aligned LRU cache of electrical series samples and tuning of the HDF5 raw chunk cache.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections import OrderedDict
+from dataclasses import dataclass
+import os
+from typing import Any
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .scaling import ScaledSeries
+from .scaling import scale
+from .scaling import scale_into
+
+
+# Definitions #
+# Constants #
+DEFAULT_CACHE_BYTES: int = 256 * 2**20
+DEFAULT_BLOCK_ROWS: int = 4096
+
+# The file name, modification time, file size, dataset name and block index of a cached block.
+BlockKey = tuple[str, int, int, str, int]
+
+
+# Classes #
+@dataclass
+class CacheStats:
+    """The counters of a ChunkCache.
+
+    Attributes:
+        hits: The number of blocks served from the cache.
+        misses: The number of blocks read from the file.
+        evictions: The number of blocks dropped to stay within the byte budget.
+        nbytes: The size of the blocks in the cache.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    nbytes: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        """The fraction of block lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ChunkCache:
+    """An LRU of blocks of series samples bounded by a byte budget, shared by every series read through it.
+
+    Blocks are keyed by the file name, the dataset name and the block index, so a cache outlives the h5py handles it
+    was filled from and windows read again after a file was reopened are still served from memory. The key also holds
+    the modification time and size of the file, so blocks of a file which was rewritten or appended to are not served
+    again, they are evicted as the least recently used.
+
+    Attributes:
+        max_bytes: The byte budget of the cached blocks.
+        stats: The hit, miss, eviction and size counters.
+
+    Args:
+        max_bytes: The byte budget of the cached blocks.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes: int = max_bytes
+        self.stats: CacheStats = CacheStats()
+        self._blocks: OrderedDict[BlockKey, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        """The number of cached blocks."""
+        return len(self._blocks)
+
+    def __contains__(self, key: BlockKey) -> bool:
+        """Checks if a block is cached."""
+        return key in self._blocks
+
+    def get(self, key: BlockKey, min_rows: int = 0) -> np.ndarray | None:
+        """Gets a cached block and marks it as the most recently used.
+
+        Args:
+            key: The block key, see BlockKey.
+            min_rows: The number of rows the block must have, a shorter block was cached before the series grew.
+
+        Returns:
+            The block, None if it is not cached or is too short.
+        """
+        block = self._blocks.get(key, None)
+        if block is None or block.shape[0] < min_rows:
+            self.stats.misses += 1
+            return None
+        self._blocks.move_to_end(key)
+        self.stats.hits += 1
+        return block
+
+    def put(self, key: BlockKey, block: np.ndarray) -> None:
+        """Caches a block, evicting the least recently used blocks to stay within the byte budget.
+
+        Blocks larger than the whole budget are not cached.
+
+        Args:
+            key: The block key, see BlockKey.
+            block: The samples of the block.
+        """
+        self.discard(key)
+        if block.nbytes > self.max_bytes:
+            return
+        while self.stats.nbytes + block.nbytes > self.max_bytes:
+            _, oldest = self._blocks.popitem(last=False)
+            self.stats.nbytes -= oldest.nbytes
+            self.stats.evictions += 1
+        self._blocks[key] = block
+        self.stats.nbytes += block.nbytes
+
+    def discard(self, key: BlockKey) -> None:
+        """Removes a block from the cache if it is cached.
+
+        Args:
+            key: The block key, see BlockKey.
+        """
+        block = self._blocks.pop(key, None)
+        if block is not None:
+            self.stats.nbytes -= block.nbytes
+
+    def clear(self) -> None:
+        """Removes every block from the cache, keeping the hit and miss counters."""
+        self._blocks.clear()
+        self.stats.nbytes = 0
+
+
+class CachedSeries(ScaledSeries):
+    """A read-only view of an electrical series which reads whole chunk-aligned blocks of samples through a ChunkCache.
+
+    A block spans the rows of one chunk of the dataset and every channel, so repeated or overlapping windows read each
+    chunk from the file once. Blocks hold the stored values and digital series are scaled as they are read out.
+
+    Attributes:
+        cache: The cache the blocks are kept in.
+        block_rows: The number of samples in a block.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+        cache: The cache to keep the blocks in, a new cache if None.
+        block_rows: The number of samples in a block, defaults to the chunk rows of the dataset.
+    """
+
+    def __init__(self, series: Any, cache: ChunkCache | None = None, block_rows: int | None = None) -> None:
+        super().__init__(series)
+        self.cache: ChunkCache = ChunkCache() if cache is None else cache
+        if block_rows is None:
+            chunks = self.dataset.chunks
+            block_rows = chunks[0] if chunks is not None else DEFAULT_BLOCK_ROWS
+        self.block_rows: int = block_rows
+        filename = self.dataset.file.filename
+        stat = os.stat(filename)
+        self._key: tuple[str, int, int, str] = (filename, stat.st_mtime_ns, stat.st_size, self.dataset.name)
+
+    def read_rows(self, start: int, stop: int) -> np.ndarray:
+        """Reads a range of samples of every channel as stored, assembling it from cached blocks.
+
+        Args:
+            start: The first sample.
+            stop: The sample after the last.
+
+        Returns:
+            The stored (sample, channel) values.
+        """
+        n_samples = self.dataset.shape[0]
+        start, stop = max(start, 0), min(stop, n_samples)
+        out = np.empty((max(stop - start, 0),) + self.dataset.shape[1:], dtype=self.dataset.dtype)
+        if out.shape[0] == 0:
+            return out
+
+        for index in range(start // self.block_rows, (stop - 1) // self.block_rows + 1):
+            block_start = index * self.block_rows
+            block_stop = min(block_start + self.block_rows, n_samples)
+            key = self._key + (index,)
+            block = self.cache.get(key, min_rows=block_stop - block_start)
+            if block is None:
+                block = self.dataset[block_start:block_stop]
+                self.cache.put(key, block)
+            in_start, in_stop = max(start, block_start), min(stop, block_stop)
+            out[in_start - start : in_stop - start] = block[in_start - block_start : in_stop - block_start]
+        return out
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        """Reads samples of the series as physical values through the cache.
+
+        Args:
+            key: A (sample, channel) selection, the sample selection must be an integer or slice and the channel
+                selection an integer, slice or index array.
+
+        Returns:
+            The selected physical values.
+        """
+        samples, channels = (key + (slice(None),))[:2] if isinstance(key, tuple) else (key, slice(None))
+        if isinstance(samples, (int, np.integer)):
+            index = range(self.dataset.shape[0])[samples]
+            data = self.read_rows(index, index + 1)[0, channels]
+        elif isinstance(samples, slice):
+            start, stop, step = samples.indices(self.dataset.shape[0])
+            if step > 0:
+                data = self.read_rows(start, stop)[::step, channels]
+            else:
+                data = self.read_rows(stop + 1, start + 1)[::-1][::-step, channels]
+        else:
+            raise TypeError("Cached reads select samples with an integer or a slice.")
+
+        if not self.is_digital:
+            return data
+        return scale(data, self.gain[channels], self.offset[channels])
+
+    def read_direct(self, dest: np.ndarray, source_sel: Any = None, dest_sel: Any = None) -> None:
+        """Reads samples of every channel through the cache into an array as physical values.
+
+        Args:
+            dest: The array to write into.
+            source_sel: The slice of samples of the series.
+            dest_sel: The selection of the destination to write into.
+        """
+        source_sel = np.s_[:] if source_sel is None else source_sel
+        dest_sel = np.s_[...] if dest_sel is None else dest_sel
+        start, stop, _ = source_sel.indices(self.dataset.shape[0])
+        data = self.read_rows(start, stop)
+        if not self.is_digital:
+            dest[dest_sel] = data
+        else:
+            scale_into(data, self.gain, self.offset, dest, dest_sel)
+
+
+# Functions #
+def get_chunk_cache_options(dataset: Any, n_chunks: int = 64) -> dict[str, int]:
+    """Sizes the HDF5 raw chunk cache of a dataset to hold a number of its chunks.
+
+    The byte size fits n_chunks chunks and the slot count is a prime about a hundred times the number of chunks which
+    fit, as the HDF5 documentation recommends to keep hash collisions rare.
+
+    Args:
+        dataset: The chunked dataset, either an HDF5Dataset or an h5py dataset.
+        n_chunks: The number of chunks the cache should hold.
+
+    Returns:
+        The rdcc_nbytes and rdcc_nslots options.
+    """
+    dataset = ScaledSeries(dataset).dataset
+    if dataset.chunks is None:
+        raise ValueError("Only chunked datasets have a chunk cache.")
+    chunk_bytes = int(np.prod(dataset.chunks)) * dataset.dtype.itemsize
+    return {"rdcc_nbytes": chunk_bytes * n_chunks, "rdcc_nslots": _next_prime(100 * n_chunks)}
+
+
+def open_dataset(
+    file: h5py.File,
+    name: str,
+    rdcc_nbytes: int | None = None,
+    rdcc_nslots: int | None = None,
+    rdcc_w0: float | None = None,
+) -> h5py.Dataset:
+    """Opens a dataset with its own raw chunk cache settings instead of those of the file.
+
+    Options which are not given keep the file's settings.
+
+    Args:
+        file: The open file.
+        name: The name of the dataset.
+        rdcc_nbytes: The byte size of the dataset's raw chunk cache.
+        rdcc_nslots: The number of hash slots of the dataset's raw chunk cache.
+        rdcc_w0: The preemption policy of the dataset's raw chunk cache, between 0 and 1.
+
+    Returns:
+        The dataset.
+    """
+    _, nslots, nbytes, w0 = file.id.get_access_plist().get_cache()
+    dapl = h5py.h5p.create(h5py.h5p.DATASET_ACCESS)
+    dapl.set_chunk_cache(
+        nslots if rdcc_nslots is None else rdcc_nslots,
+        nbytes if rdcc_nbytes is None else rdcc_nbytes,
+        w0 if rdcc_w0 is None else rdcc_w0,
+    )
+    return h5py.Dataset(h5py.h5d.open(file.id, name.encode(), dapl))
+
+
+def _next_prime(n: int) -> int:
+    """Gets the smallest prime at least n.
+
+    Args:
+        n: The lower bound.
+
+    Returns:
+        The prime.
+    """
+    n = max(n, 2)
+    while any(n % d == 0 for d in range(2, int(n**0.5) + 1)):
+        n += 1
+    return n
@@ -7,15 +7,17 @@ Define custom functions used in hdf5concat.py
 # Standard Libraries #
 import pathlib
 import numpy as np
-import pandas as pd
 import datetime
 from datetime import timedelta
 import time
 import h5py
-import scipy.io
 import os
 import ast
 
+# Local Packages #
+from nkhdf5.timestamps import nanostamps_to_datetime64
+from nkhdf5.windows import read_segmented_window
+
 # Inputs #
 
 patient_id   = "PR06"
@@ -31,6 +33,10 @@ def timestamps_to_datetime(timestamps_list):
         abs_timestamps.append(datetime.datetime.fromtimestamp(timestamps_list[i]/1e9))
     return abs_timestamps
 
+##Converts nanosecond timestamps to an array of local datetime64 values, the vectorized timestamps_to_datetime
+def timestamps_to_datetime64(timestamps_list):
+    return nanostamps_to_datetime64(timestamps_list, local=True)
+
 ##Converts list of objects to strings and then to datetime
 def str_to_datetime(list_of_values):
     to_datetime = [datetime.datetime.strptime(str(x), '%Y-%m-%d %H:%M:%S') for x in list_of_values]
@@ -41,27 +47,29 @@ def str_to_datetime(list_of_values):
 #    return to_datetime
 
 ##Concatenates timeseries given a list of h5 files associated to biomarker survey
+##If start and end nanostamps are given only the samples in [start, end) are read
+##The segment table marks the pauses and restarts in the concatenated samples, split_segments splits at them
 ##Also gets metadata shared by h5 files 
-def concat_timeseries(h5_in_bm):
-    data_array = []
-    time_array = []
-    for i in range(len(h5_in_bm)):
-        file_path = pathlib.Path(stage1_path,patient_id,convert_edf_path,h5_in_bm[i])
-        file_obj = h5py.File(file_path, 'r')
-        data_array = data_array + list(np.array(file_obj['intracranialEEG']))
-        time_array = time_array + list(np.array(file_obj['intracranialEEG_time_axis']))
-    
-    channellabel_axis = np.array(file_obj['intracranialEEG_channellabel_axis'])
-    channelcoord_axis = np.array(file_obj['intracranialEEG_channelcoord_axis'])
-    channel_count = file_obj['intracranialEEG'].attrs['channel_count']
-    filter_highpass = file_obj['intracranialEEG'].attrs['filter_highpass']
-    filter_lowpass = file_obj['intracranialEEG'].attrs['filter_lowpass']
-    sample_rate = file_obj['intracranialEEG_time_axis'].attrs['sample_rate']
-    time_zone = file_obj['intracranialEEG_time_axis'].attrs['time_zone']
+def concat_timeseries(h5_in_bm, start=None, end=None):
+    file_paths = [pathlib.Path(stage1_path,patient_id,convert_edf_path,h5_fn) for h5_fn in h5_in_bm]
+    if start is None or end is None:
+        start, end = np.iinfo(np.int64).min, np.iinfo(np.int64).max
+    window = read_segmented_window(file_paths, start, end, series='data_ieeg')
+    data_array, time_array = window.data, window.nanostamps
+
+    with h5py.File(file_paths[-1], 'r') as file_obj:
+        channellabel_axis = np.array(file_obj['intracranialEEG_channellabel_axis'])
+        channelcoord_axis = np.array(file_obj['intracranialEEG_channelcoord_axis'])
+        channel_count = file_obj['intracranialEEG'].attrs['channel_count']
+        filter_highpass = file_obj['intracranialEEG'].attrs['filter_highpass']
+        filter_lowpass = file_obj['intracranialEEG'].attrs['filter_lowpass']
+        sample_rate = file_obj['intracranialEEG_time_axis'].attrs['sample_rate']
+        time_zone = file_obj['intracranialEEG_time_axis'].attrs['time_zone']
 
     timeseries_dict = {
         'data_array' : data_array,
         'time_array' : time_array,
+        'segment_table' : window.segments,
         'channellabel_axis' : channellabel_axis,
         'channelcoord_axis' : channelcoord_axis,
         'channel_count' : channel_count,
@@ -73,6 +81,13 @@ def concat_timeseries(h5_in_bm):
 
     return timeseries_dict
 
+##Splits a dictionary from concat_timeseries into the (data_array, time_array) of each continuous segment
+def split_segments(timeseries_dict):
+    return [
+        (timeseries_dict['data_array'][start:stop], timeseries_dict['time_array'][start:stop])
+        for start, stop in timeseries_dict['segment_table'][:, :2]
+    ]
+
 """
 
 End of code
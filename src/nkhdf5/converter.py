@@ -0,0 +1,583 @@
+"""converter.py
+Streams Nihon Kohden EDF recordings into HDF5NK files block by block.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+import contextlib
+from dataclasses import dataclass
+import datetime
+import pathlib
+from typing import Any
+from typing import Mapping
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .background import DEFAULT_WRITE_QUEUE
+from .background import BackgroundWriter
+from .edffile import EDFFile
+from .edfreader import edf_reader
+from .edfreader import iter_edf_blocks
+from .hdf5nk import HDF5NK_0_1_0
+from .pyramid import PyramidBuilder
+from .quality import QualityBuilder
+from .segments import SegmentBuilder
+from .segments import write_segments
+from .scaling import to_digital
+from .scaling import write_scaling
+from .storage import DEFAULT_BLOCK_SIZE
+from .storage import StoragePreset
+from .timeaxis import CompactTimeAxis
+from .timeaxis import as_h5py_dataset
+from .timestamps import local_datetime_to_nanostamp
+from .timestamps import sample_nanostamps
+
+
+# Definitions #
+# Constants #
+SERIES_CHANTYPES: Mapping[str, str] = {
+    "data_ieeg": "intracranial EEG",
+    "data_scalpeeg": "scalp EEG",
+    "data_ekg": "EKG",
+    "data_ttl": "TTL",
+    "data_emg": "EMG",
+}
+
+
+# Classes #
+@dataclass
+class ConversionResult:
+    """The outcome of converting a single EDF file in a batch.
+
+    Attributes:
+        edf_fn: The file name of the EDF file.
+        out_path: The path of the HDF5NK file, if it could be determined.
+        status: Either "converted", "skipped" or "failed".
+        error: The formatted exception if the conversion failed.
+    """
+
+    edf_fn: str
+    out_path: pathlib.Path | None
+    status: str
+    error: str | None = None
+
+
+class SeriesWriter:
+    """Writes the channels of an EDF recording to every electrical series of an open HDF5NK file.
+
+    One decoded (channel, sample) block is split by channel type and each part is appended to its series with the
+    nanostamps computed once for the block, so every channel type is written in the same pass instead of by a
+    separate append for each series.
+
+    Attributes:
+        f_obj: The open HDF5NK file.
+        series_indices: The EDF channel indices of each series.
+        compact_time: Determines if the time axes store only the start and discontinuities instead of every sample.
+        compact_axes: The compact time axis of each series, empty unless compact_time is set.
+        time_series: The series whose appends write the nanostamps, one for each distinct time axis dataset, so a
+            time axis shared by every series (see HDF5NK.share_time_axes) is written once.
+        pyramid_factors: The factors of the min/max/mean pyramid of each series, None to build no pyramid.
+        pyramids: The pyramid builder of each series with channels, empty unless pyramid_factors is set.
+        quality: Determines if the per-block quality statistics of each series are computed.
+        qualities: The quality statistics builder of each series with channels, empty unless quality is set.
+        segments: The builder of the segment table shared by every series, None until write_metadata.
+
+    Args:
+        f_obj: The open HDF5NK file.
+        series_indices: The EDF channel indices of each series, see get_series_indices.
+        compact_time: Determines if the time axes store only the start and discontinuities instead of every sample.
+        pyramid_factors: The factors of the min/max/mean pyramid built from each appended block, see
+            pyramid.PyramidBuilder.
+        quality: Determines if the per-block quality statistics of each series are computed from each appended
+            block, see quality.QualityBuilder.
+    """
+
+    def __init__(
+        self,
+        f_obj: HDF5NK_0_1_0,
+        series_indices: Mapping[str, np.ndarray],
+        compact_time: bool = False,
+        pyramid_factors: Sequence[int] | None = None,
+        quality: bool = False,
+    ) -> None:
+        self.f_obj: HDF5NK_0_1_0 = f_obj
+        self.series_indices: Mapping[str, np.ndarray] = series_indices
+        self.compact_time: bool = compact_time
+        self.compact_axes: dict[str, CompactTimeAxis] = {}
+        self.time_series: set[str] = set()
+        self.pyramid_factors: Sequence[int] | None = pyramid_factors
+        self.pyramids: dict[str, PyramidBuilder] = {}
+        self.quality: bool = quality
+        self.qualities: dict[str, QualityBuilder] = {}
+        self.segments: SegmentBuilder | None = None
+
+        time_axes = []
+        for series in series_indices:
+            time_axis = as_h5py_dataset(f_obj[series].axes[0]["time_axis"])
+            if not any(time_axis == other for other in time_axes):
+                time_axes.append(time_axis)
+                self.time_series.add(series)
+
+    def write_metadata(
+        self,
+        edf_contents: Mapping[str, Any],
+        digital: bool = False,
+        channel_coords: np.ndarray | None = None,
+    ) -> None:
+        """Writes the channel labels, acquisition attributes and time axis layout of every series.
+
+        The pyramid and quality builders are created here, since digital blocks are scaled with the gain and offset
+        of the EDF.
+
+        Args:
+            edf_contents: The EDF dictionary from edf_reader.
+            digital: Determines if the series store int16 digital values with a per-channel gain and offset.
+            channel_coords: The electrode coordinates of the intracranial EEG channels.
+        """
+        for series, indices in self.series_indices.items():
+            write_series_metadata(self.f_obj[series], edf_contents, indices)
+            gain, offset = None, None
+            if digital:
+                gain, offset = edf_contents["edf_gain"][indices], edf_contents["edf_offset"][indices]
+                write_scaling(self.f_obj[series], gain, offset)
+            if self.pyramid_factors is not None and len(indices) > 0:
+                self.pyramids[series] = PyramidBuilder(
+                    self.f_obj[series], self.pyramid_factors, gain, offset, n_channels=len(indices)
+                )
+            if self.quality and len(indices) > 0:
+                self.qualities[series] = QualityBuilder(
+                    self.f_obj[series],
+                    edf_contents["edf_sfreq"],
+                    clip_limits=tuple(limits[indices] for limits in edf_contents["edf_physical_limits"]),
+                    gain=gain,
+                    offset=offset,
+                    n_channels=len(indices),
+                )
+            if self.compact_time:
+                self.compact_axes[series] = CompactTimeAxis(self.f_obj[series]).create(edf_contents["edf_sfreq"])
+        if channel_coords is not None:
+            self.f_obj["data_ieeg"].axes[1]["channelcoord_axis"].append(channel_coords)
+        self.segments = SegmentBuilder(edf_contents["edf_sfreq"])
+
+    def split(self, data_block: np.ndarray) -> dict[str, np.ndarray]:
+        """Splits a decoded block into the (sample, channel) block of each series.
+
+        Args:
+            data_block: The (channel, sample) block of every EDF channel.
+
+        Returns:
+            The block of each series.
+        """
+        return {series: take_channels(data_block, indices) for series, indices in self.series_indices.items()}
+
+    def append(self, series_blocks: Mapping[str, np.ndarray], nanostamps: np.ndarray) -> None:
+        """Appends the (sample, channel) block of each series, all sharing the same nanostamps.
+
+        Args:
+            series_blocks: The block of each series.
+            nanostamps: The nanostamps of the samples of the blocks.
+        """
+        if self.segments is not None:
+            self.segments.append(nanostamps)
+        for series, series_block in series_blocks.items():
+            if self.compact_time:
+                self.f_obj[series].append_data(series_block)
+                self.compact_axes[series].extend(nanostamps.size, start=int(nanostamps[0]))
+            elif series in self.time_series:
+                self.f_obj[series].append(series_block, component_kwargs={"timeseries": {"data": nanostamps}})
+            else:
+                self.f_obj[series].append_data(series_block)
+            if series in self.pyramids:
+                self.pyramids[series].append(series_block)
+            if series in self.qualities:
+                self.qualities[series].append(series_block)
+
+    def finish(self) -> None:
+        """Writes the segment table of every series and the incomplete pyramid bins and quality blocks."""
+        if self.segments is not None:
+            table = self.segments.table
+            for series in self.series_indices:
+                write_segments(self.f_obj[series], table)
+        for builder in (*self.pyramids.values(), *self.qualities.values()):
+            builder.finish()
+
+    def append_block(self, data_block: np.ndarray, nanostamps: np.ndarray) -> None:
+        """Splits a decoded block by channel type and appends each part to its series.
+
+        Args:
+            data_block: The (channel, sample) block of every EDF channel.
+            nanostamps: The nanostamps of the samples of the block.
+        """
+        self.append(self.split(data_block), nanostamps)
+
+
+# Functions #
+def get_output_name(subject_id: str, edf_start: datetime.datetime) -> str:
+    """Creates the HDF5NK file name for a continuous recording.
+
+    Args:
+        subject_id: The ID of the subject the recording belongs to.
+        edf_start: The start of the EDF recording.
+
+    Returns:
+        The file name of the HDF5NK file.
+    """
+    date_string = edf_start.strftime("%Y%m%d")
+    time_string = edf_start.strftime("%H%M")
+    return f"sub-{subject_id}_ses-stage1_task-continuous_acq-{date_string}_run-{time_string}_ieeg.h5"
+
+
+def get_series_indices(chantype_idx: Mapping[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Gets the EDF channel indices of each HDF5NK series.
+
+    Args:
+        chantype_idx: The channel indices of each channel type, as returned by edf_reader.
+
+    Returns:
+        The EDF channel indices for each HDF5NK series name.
+    """
+    return {series: chantype_idx[series_type] for series, series_type in SERIES_CHANTYPES.items()}
+
+
+def take_channels(data_block: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """Selects channels from a (channel, sample) block as a C-contiguous (sample, channel) array.
+
+    The selection and transpose are done with a single copy, which is the layout h5py writes without copying again.
+
+    Args:
+        data_block: The (channel, sample) block read from the EDF.
+        indices: The channel indices to select.
+
+    Returns:
+        The selected channels as a (sample, channel) array.
+    """
+    return np.take(data_block.T, indices, axis=1)
+
+
+def iter_series_blocks(
+    edf_contents: Mapping[str, Any],
+    series_indices: Mapping[str, np.ndarray],
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    digital: bool = False,
+) -> Iterator[tuple[int, int, dict[str, np.ndarray]]]:
+    """Reads an EDF recording in blocks, split into the (sample, channel) blocks of each HDF5NK series.
+
+    With the native reader each series is read straight from the memory-mapped records into its (sample, channel)
+    layout, transposed and scaled in one pass. Other readers return (channel, sample) blocks which are split with
+    take_channels and converted to digital values if needed.
+
+    Args:
+        edf_contents: The EDF dictionary from edf_reader.
+        series_indices: The EDF channel indices of each series.
+        block_size: The number of samples in a block.
+        digital: Determines if the blocks hold int16 digital values instead of volts.
+
+    Yields:
+        The index of the first sample of the block, the number of samples and the block of each series.
+    """
+    raw = edf_contents["edf_raw"]
+    if isinstance(raw, EDFFile):
+        for start in range(0, len(raw), block_size):
+            stop = min(start + block_size, len(raw))
+            series_blocks = {
+                series: raw.read_columns(start, stop, indices, digital=digital)
+                for series, indices in series_indices.items()
+            }
+            yield start, stop - start, series_blocks
+        return
+
+    for start, data_block, _ in iter_edf_blocks(raw, block_size):
+        series_blocks = {}
+        for series, indices in series_indices.items():
+            series_block = take_channels(data_block, indices)
+            if digital:
+                series_block = to_digital(
+                    series_block, edf_contents["edf_gain"][indices], edf_contents["edf_offset"][indices]
+                )
+            series_blocks[series] = series_block
+        yield start, data_block.shape[1], series_blocks
+
+
+def convert_edf(
+    edf_dir: pathlib.Path | str,
+    edf_fn: str,
+    out_path: pathlib.Path | str,
+    subject_id: str,
+    channel_coords: np.ndarray | None = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    compact_time: bool = False,
+    storage: str | StoragePreset | None = None,
+    digital: bool = False,
+    write_queue: int = DEFAULT_WRITE_QUEUE,
+    shared_time: bool = True,
+    pyramid_factors: Sequence[int] | None = None,
+    quality: bool = False,
+    edf_contents: Mapping[str, Any] | None = None,
+) -> pathlib.Path:
+    """Converts an EDF file into an HDF5NK file without loading the whole recording.
+
+    The samples are read from the EDF in blocks of block_size samples and each block is appended to the
+    electrical series of the HDF5NK file, so peak memory depends on the block size and not the recording length.
+    The data records are memory-mapped by the native EDF reader, each series is read from them directly in the
+    layout it is written in and digital series are copied without being converted to volts and back. With a write
+    queue, blocks are written by a BackgroundWriter thread while the next block is read, so decoding, which releases
+    the GIL, overlaps with HDF5 writes on machines with more than one core. The queue is off by default, see
+    background.DEFAULT_WRITE_QUEUE.
+
+    Args:
+        edf_dir: The directory which contains the EDF file.
+        edf_fn: The file name of the EDF file.
+        out_path: The path of the HDF5NK file to create.
+        subject_id: The ID of the subject the recording belongs to.
+        channel_coords: The electrode coordinates of the intracranial EEG channels.
+        block_size: The number of samples to read and write at a time.
+        compact_time: Determines if the time axes store only the start and discontinuities instead of every sample.
+        storage: The storage preset of the electrical series, e.g. "archive", None uses the h5py defaults.
+        digital: Determines if the series store the int16 samples of the EDF with a per-channel gain and offset,
+            a quarter of the size of float64 volts.
+        write_queue: The number of blocks which may wait to be written, 0 to write each block before reading the next.
+        shared_time: Determines if every series shares one explicit time axis dataset instead of storing a copy.
+        pyramid_factors: The factors of the min/max/mean pyramid built for overview reads, e.g.
+            pyramid.DEFAULT_FACTORS, None to build no pyramid.
+        quality: Determines if per-channel statistics of every 10 seconds of each series are stored next to it,
+            see quality.read_quality.
+        edf_contents: The EDF dictionary of the file from edf_reader with load_data=False, to reuse a header which
+            was already read, None to read it.
+
+    Returns:
+        The path of the created HDF5NK file.
+    """
+    out_path = pathlib.Path(out_path)
+    if edf_contents is None:
+        edf_contents = edf_reader(edf_dir, edf_fn, load_data=False)
+    series_indices = get_series_indices(edf_contents["edf_chantype_idx"])
+    start_rec = local_datetime_to_nanostamp(edf_contents["edf_start"])  # unix epoch time
+    sample_rate = edf_contents["edf_sfreq"]
+
+    channel_counts = {series: len(indices) for series, indices in series_indices.items()}
+    with HDF5NK_0_1_0(
+        file=out_path,
+        mode="a",
+        create=True,
+        construct=True,
+        storage=storage,
+        sample_rate=sample_rate,
+        channel_counts=channel_counts,
+        digital=digital,
+    ) as f_obj:
+        f_obj.attributes["subject_id"] = subject_id
+        f_obj.attributes["start"] = start_rec
+        f_obj.attributes["end"] = local_datetime_to_nanostamp(edf_contents["edf_end"])
+
+        if shared_time and not compact_time:
+            f_obj.share_time_axes()
+        series_writer = SeriesWriter(f_obj, series_indices, compact_time, pyramid_factors, quality)
+        series_writer.write_metadata(edf_contents, digital, channel_coords)
+
+        with contextlib.ExitStack() as stack:
+            writer = stack.enter_context(BackgroundWriter(write_queue)) if write_queue > 0 else None
+            for start, length, series_blocks in iter_series_blocks(edf_contents, series_indices, block_size, digital):
+                new_time_array = sample_nanostamps(start_rec, sample_rate, start, start + length)
+                if writer is None:
+                    series_writer.append(series_blocks, new_time_array)
+                else:
+                    writer.submit(series_writer.append, series_blocks, new_time_array)
+        series_writer.finish()
+
+    return out_path
+
+
+def write_series_metadata(dataset: Any, edf_contents: Mapping[str, Any], indices: np.ndarray) -> None:
+    """Writes the channel labels and acquisition attributes of one electrical series.
+
+    Args:
+        dataset: The HDF5NK electrical series dataset to write to.
+        edf_contents: The EDF metadata dictionary from edf_reader.
+        indices: The EDF channel indices which belong to the series.
+    """
+    channel_labels = np.array(edf_contents["edf_channellabel_axis"], dtype=h5py.special_dtype(vlen=str))[indices]
+    if len(indices) > 0:
+        dataset.axes[1]["channellabel_axis"].append(channel_labels)
+
+    dataset.attributes["filter_lowpass"] = edf_contents["edf_lowpass"]
+    dataset.attributes["filter_highpass"] = edf_contents["edf_highpass"]
+    dataset.attributes["channel_count"] = len(indices)
+    dataset.axes[0]["time_axis"].attrs["sample_rate"] = edf_contents["edf_sfreq"]
+    dataset.axes[0]["time_axis"].attrs["time_zone"] = edf_contents["edf_timezone"]
+
+
+def _convert_job(
+    edf_dir: pathlib.Path,
+    edf_fn: str,
+    out_dir: pathlib.Path,
+    subject_id: str,
+    channel_coords: np.ndarray | None,
+    block_size: int,
+    resume: bool,
+    compact_time: bool = False,
+    storage: str | StoragePreset | None = None,
+    digital: bool = False,
+    write_queue: int = DEFAULT_WRITE_QUEUE,
+    shared_time: bool = True,
+    pyramid_factors: Sequence[int] | None = None,
+    quality: bool = False,
+) -> ConversionResult:
+    """Converts one EDF file of a batch, capturing any failure in the result.
+
+    The file is written under a temporary name and only renamed once complete, so an interrupted conversion
+    never leaves a file behind which resume would mistake for a finished one.
+
+    Args:
+        edf_dir: The directory which contains the EDF file.
+        edf_fn: The file name of the EDF file.
+        out_dir: The directory to write the HDF5NK file to.
+        subject_id: The ID of the subject the recording belongs to.
+        channel_coords: The electrode coordinates of the intracranial EEG channels.
+        block_size: The number of samples to read and write at a time.
+        resume: Determines if existing, openable outputs are skipped.
+        compact_time: Determines if the time axes store only the start and discontinuities.
+        storage: The storage preset of the electrical series.
+        digital: Determines if the series store int16 digital values.
+        write_queue: The number of blocks which may wait to be written, 0 to write synchronously.
+        shared_time: Determines if every series shares one explicit time axis dataset.
+        pyramid_factors: The factors of the min/max/mean pyramid, None to build no pyramid.
+        quality: Determines if per-channel quality statistics are stored next to each series.
+
+    Returns:
+        The outcome of the conversion.
+    """
+    out_path = None
+    part_path = None
+    try:
+        edf_contents = edf_reader(edf_dir, edf_fn, load_data=False)
+        out_path = out_dir / get_output_name(subject_id, edf_contents["edf_start"])
+        if resume and HDF5NK_0_1_0.is_openable(out_path):
+            return ConversionResult(edf_fn, out_path, "skipped")
+
+        part_path = out_path.with_name(out_path.name + ".part")
+        part_path.unlink(missing_ok=True)
+        convert_edf(
+            edf_dir,
+            edf_fn,
+            part_path,
+            subject_id,
+            channel_coords=channel_coords,
+            block_size=block_size,
+            compact_time=compact_time,
+            storage=storage,
+            digital=digital,
+            write_queue=write_queue,
+            shared_time=shared_time,
+            pyramid_factors=pyramid_factors,
+            quality=quality,
+            edf_contents=edf_contents,
+        )
+        part_path.replace(out_path)
+        return ConversionResult(edf_fn, out_path, "converted")
+    except Exception as error:
+        if part_path is not None:
+            part_path.unlink(missing_ok=True)
+        return ConversionResult(edf_fn, out_path, "failed", f"{type(error).__name__}: {error}")
+
+
+def convert_edfs(
+    edf_dir: pathlib.Path | str,
+    edf_fns: Iterable[str],
+    out_dir: pathlib.Path | str,
+    subject_id: str,
+    channel_coords: np.ndarray | None = None,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    jobs: int = 1,
+    resume: bool = False,
+    compact_time: bool = False,
+    storage: str | StoragePreset | None = None,
+    digital: bool = False,
+    write_queue: int = DEFAULT_WRITE_QUEUE,
+    shared_time: bool = True,
+    pyramid_factors: Sequence[int] | None = None,
+    quality: bool = False,
+    progress: Callable[[ConversionResult], Any] | None = None,
+) -> list[ConversionResult]:
+    """Converts many EDF files into HDF5NK files across a pool of processes.
+
+    A failure in one file is recorded in its result and does not stop the other conversions.
+
+    Args:
+        edf_dir: The directory which contains the EDF files.
+        edf_fns: The file names of the EDF files to convert.
+        out_dir: The directory to write the HDF5NK files to.
+        subject_id: The ID of the subject the recordings belong to.
+        channel_coords: The electrode coordinates of the intracranial EEG channels.
+        block_size: The number of samples to read and write at a time.
+        jobs: The number of worker processes, 1 converts in the calling process.
+        resume: Determines if outputs which already exist and are openable are skipped.
+        compact_time: Determines if the time axes store only the start and discontinuities.
+        storage: The storage preset of the electrical series, e.g. "archive".
+        digital: Determines if the series store int16 digital values with a per-channel gain and offset.
+        write_queue: The number of blocks which may wait to be written, 0 to write synchronously.
+        shared_time: Determines if every series shares one explicit time axis dataset.
+        pyramid_factors: The factors of the min/max/mean pyramid, None to build no pyramid.
+        quality: Determines if per-channel quality statistics are stored next to each series.
+        progress: A function called with each result as soon as its file is done.
+
+    Returns:
+        The results of the conversions in the order the EDF files were given.
+    """
+    edf_dir = pathlib.Path(edf_dir)
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    edf_fns = list(edf_fns)
+    job_options = (
+        channel_coords,
+        block_size,
+        resume,
+        compact_time,
+        storage,
+        digital,
+        write_queue,
+        shared_time,
+        pyramid_factors,
+        quality,
+    )
+    job_args = [(edf_dir, fn, out_dir, subject_id, *job_options) for fn in edf_fns]
+
+    results = {}
+    if jobs == 1:
+        for args in job_args:
+            results[args[1]] = result = _convert_job(*args)
+            if progress is not None:
+                progress(result)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(_convert_job, *args): args[1] for args in job_args}
+            for future in as_completed(futures):
+                edf_fn = futures[future]
+                try:
+                    result = future.result()
+                except Exception as error:
+                    # The job raised outside its own error handling, e.g. its worker process died.
+                    result = ConversionResult(edf_fn, None, "failed", f"{type(error).__name__}: {error}")
+                results[edf_fn] = result
+                if progress is not None:
+                    progress(result)
+
+    return [results[fn] for fn in edf_fns]
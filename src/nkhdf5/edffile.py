@@ -0,0 +1,563 @@
+"""edffile.py
+A NumPy based reader of EDF/EDF+ files which memory-maps their data records.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from dataclasses import dataclass
+import datetime
+import pathlib
+import re
+from typing import Any
+from typing import Mapping
+
+# Third-Party Packages #
+import numpy as np
+
+# Local Packages #
+
+
+# Definitions #
+# Constants #
+UNIT_SCALES: dict[str, float] = {"V": 1.0, "mV": 1e-3, "uV": 1e-6, "µV": 1e-6, "nV": 1e-9}
+ANNOTATIONS_LABEL: str = "EDF Annotations"
+DISCONTINUOUS_TYPE: str = "EDF+D"
+
+_RECORD_ONSET: re.Pattern = re.compile(r"([+-]\d+(?:\.\d*)?)\x14\x14")
+_SIGNAL_FIELDS: tuple[tuple[str, int], ...] = (
+    ("labels", 16),
+    ("transducers", 80),
+    ("physical_dimensions", 8),
+    ("physical_min", 8),
+    ("physical_max", 8),
+    ("digital_min", 8),
+    ("digital_max", 8),
+    ("prefilters", 80),
+    ("samples_per_record", 8),
+    ("reserved", 32),
+)
+
+
+# Classes #
+class UnsupportedEDFError(ValueError):
+    """An EDF file which is valid but uses a feature the native reader does not handle."""
+
+
+@dataclass(frozen=True)
+class EDFHeader:
+    """The fixed and per-signal header fields of an EDF/EDF+ file.
+
+    Attributes:
+        path: The path of the EDF file.
+        patient: The local patient identification.
+        recording: The local recording identification.
+        start: The start of the recording, to the second.
+        header_bytes: The number of bytes in the header.
+        reserved: The reserved field, "EDF+C" or "EDF+D" for EDF+ files.
+        n_records: The number of data records.
+        record_duration: The duration of a data record in seconds.
+        labels: The label of each signal.
+        transducers: The transducer type of each signal.
+        physical_dimensions: The physical unit of each signal.
+        physical_min: The physical minimum of each signal.
+        physical_max: The physical maximum of each signal.
+        digital_min: The digital minimum of each signal.
+        digital_max: The digital maximum of each signal.
+        prefilters: The prefiltering of each signal.
+        samples_per_record: The number of samples of each signal in a data record.
+    """
+
+    path: pathlib.Path
+    patient: str
+    recording: str
+    start: datetime.datetime
+    header_bytes: int
+    reserved: str
+    n_records: int
+    record_duration: float
+    labels: tuple[str, ...]
+    transducers: tuple[str, ...]
+    physical_dimensions: tuple[str, ...]
+    physical_min: np.ndarray
+    physical_max: np.ndarray
+    digital_min: np.ndarray
+    digital_max: np.ndarray
+    prefilters: tuple[str, ...]
+    samples_per_record: np.ndarray
+
+    @property
+    def n_signals(self) -> int:
+        """The number of signals."""
+        return len(self.labels)
+
+    @property
+    def is_discontinuous(self) -> bool:
+        """Determines if the file is an EDF+D file, whose data records may have gaps between them."""
+        return self.reserved.startswith(DISCONTINUOUS_TYPE)
+
+    @property
+    def sample_rates(self) -> np.ndarray:
+        """The sample rate of each signal."""
+        return self.samples_per_record / self.record_duration
+
+    @property
+    def unit_scales(self) -> np.ndarray:
+        """The factor which converts the physical unit of each signal to volts, 1 for non-voltage units."""
+        return np.array([UNIT_SCALES.get(unit, 1.0) for unit in self.physical_dimensions])
+
+    @property
+    def gains(self) -> np.ndarray:
+        """The volts per digital step of each signal (physical units for non-voltage signals)."""
+        physical_range = self.physical_max - self.physical_min
+        digital_range = self.digital_max - self.digital_min
+        return physical_range / digital_range * self.unit_scales
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """The value in volts of digital zero of each signal (physical units for non-voltage signals)."""
+        return self.physical_min * self.unit_scales - self.digital_min * self.gains
+
+    @property
+    def physical_limits(self) -> tuple[np.ndarray, np.ndarray]:
+        """The lowest and highest value in volts each signal can hold, the values a clipped sample takes."""
+        return self.physical_min * self.unit_scales, self.physical_max * self.unit_scales
+
+
+class EDFFile:
+    """An EDF/EDF+ file whose data records are memory-mapped instead of decoded.
+
+    The records are mapped as a structured array with one int16 field per signal, so the samples of a channel are a
+    strided view of the file and a read of a time range only touches the records which contain it. Annotation
+    signals are not channels. Files with channels of different sample rates and discontinuous EDF+D files are not
+    supported and raise an UnsupportedEDFError.
+
+    Attributes:
+        header: The header of the file.
+        signals: The header indices of the signals which are channels.
+        records: The memory-mapped data records.
+
+    Args:
+        path: The path of the EDF file.
+    """
+
+    def __init__(self, path: pathlib.Path | str) -> None:
+        self.header: EDFHeader = read_edf_header(path)
+        if self.header.is_discontinuous:
+            raise UnsupportedEDFError(f"{self.header.path} is an EDF+D file with discontinuous data records.")
+        self.signals: np.ndarray = np.array(
+            [i for i, label in enumerate(self.header.labels) if label != ANNOTATIONS_LABEL], dtype=np.intp
+        )
+        record_dtype = np.dtype([(f"s{i}", "<i2", (int(n),)) for i, n in enumerate(self.header.samples_per_record)])
+        self.records: np.ndarray = np.memmap(
+            self.header.path,
+            dtype=record_dtype,
+            mode="r",
+            offset=self.header.header_bytes,
+            shape=(self.header.n_records,),
+        )
+
+    def __enter__(self) -> "EDFFile":
+        """Returns the file for use as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Releases the memory map."""
+        self.close()
+
+    def __len__(self) -> int:
+        """The number of samples of each channel."""
+        return self.n_samples
+
+    @property
+    def labels(self) -> tuple[str, ...]:
+        """The label of each channel."""
+        return tuple(self.header.labels[i] for i in self.signals)
+
+    @property
+    def n_channels(self) -> int:
+        """The number of channels."""
+        return len(self.signals)
+
+    @property
+    def samples_per_record(self) -> int:
+        """The number of samples of each channel in a data record, which must be the same for every channel."""
+        counts = np.unique(self.header.samples_per_record[self.signals])
+        if counts.size != 1:
+            raise UnsupportedEDFError(f"{self.header.path} has channels with different sample rates.")
+        return int(counts[0])
+
+    @property
+    def start(self) -> datetime.datetime:
+        """The start of the recording, including the subsecond start an EDF+ file stores in its first annotation."""
+        annotations = [i for i, label in enumerate(self.header.labels) if label == ANNOTATIONS_LABEL]
+        if not annotations or self.header.n_records == 0:
+            return self.header.start
+        # The first annotation of the first record keeps the time of the record relative to the header start.
+        tal = self.records[0][f"s{annotations[0]}"].tobytes().decode("latin-1")
+        match = _RECORD_ONSET.match(tal)
+        if match is None:
+            return self.header.start
+        return self.header.start + datetime.timedelta(seconds=float(match.group(1)))
+
+    @property
+    def sample_rate(self) -> float:
+        """The sample rate of the channels."""
+        return self.samples_per_record / self.header.record_duration
+
+    @property
+    def n_samples(self) -> int:
+        """The number of samples of each channel."""
+        return self.header.n_records * self.samples_per_record
+
+    @property
+    def gains(self) -> np.ndarray:
+        """The volts per digital step of each channel."""
+        return self.header.gains[self.signals]
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """The value in volts of digital zero of each channel."""
+        return self.header.offsets[self.signals]
+
+    @property
+    def physical_limits(self) -> tuple[np.ndarray, np.ndarray]:
+        """The lowest and highest value in volts each channel can hold."""
+        low, high = self.header.physical_limits
+        return low[self.signals], high[self.signals]
+
+    def close(self) -> None:
+        """Releases the memory map, views of the records keep the file mapped until they are deleted."""
+        self.records = None
+
+    def get_channel_view(self, channel: int) -> np.ndarray:
+        """Gets the digital samples of a channel as a (record, sample) view of the file, without copying.
+
+        Args:
+            channel: The index of the channel.
+
+        Returns:
+            The view of the channel's samples in each data record.
+        """
+        return self.records[f"s{self.signals[channel]}"]
+
+    def read_digital(
+        self,
+        start: int = 0,
+        stop: int | None = None,
+        channels: np.ndarray | list[int] | None = None,
+    ) -> np.ndarray:
+        """Reads the digital samples of channels in a sample range, touching only the records which contain it.
+
+        Args:
+            start: The index of the first sample.
+            stop: The index after the last sample, defaults to the end of the recording.
+            channels: The indices of the channels to read, defaults to all channels.
+
+        Returns:
+            The (channel, sample) int16 samples.
+        """
+        n_per_record = self.samples_per_record
+        stop = self.n_samples if stop is None else min(stop, self.n_samples)
+        start = max(0, start)
+        channels = np.arange(self.n_channels) if channels is None else np.asarray(channels, dtype=np.intp)
+
+        data = np.empty((len(channels), max(0, stop - start)), dtype=np.int16)
+        if data.size == 0:
+            return data
+        first_record = start // n_per_record
+        last_record = -(-stop // n_per_record)
+        records = self.records[first_record:last_record]
+        offset = start - first_record * n_per_record
+        for i, channel in enumerate(channels):
+            data[i] = records[f"s{self.signals[channel]}"].reshape(-1)[offset : offset + data.shape[1]]
+        return data
+
+    def read(
+        self,
+        start: int = 0,
+        stop: int | None = None,
+        channels: np.ndarray | list[int] | None = None,
+    ) -> np.ndarray:
+        """Reads channels in a sample range as volts, the same values MNE returns.
+
+        Args:
+            start: The index of the first sample.
+            stop: The index after the last sample, defaults to the end of the recording.
+            channels: The indices of the channels to read, defaults to all channels.
+
+        Returns:
+            The (channel, sample) samples in volts.
+        """
+        channels = np.arange(self.n_channels) if channels is None else np.asarray(channels, dtype=np.intp)
+        data = self.read_digital(start, stop, channels).astype(np.float64)
+        data *= self.gains[channels, None]
+        data += self.offsets[channels, None]
+        return data
+
+    def read_columns(
+        self,
+        start: int = 0,
+        stop: int | None = None,
+        channels: np.ndarray | list[int] | None = None,
+        digital: bool = False,
+    ) -> np.ndarray:
+        """Reads channels in a sample range as a (sample, channel) array, the layout HDF5NK series are written in.
+
+        The int16 samples are transposed and scaled to volts in a single pass, which gives the same values as read
+        without a float (channel, sample) intermediate and a second transposing copy.
+
+        Args:
+            start: The index of the first sample.
+            stop: The index after the last sample, defaults to the end of the recording.
+            channels: The indices of the channels to read, defaults to all channels.
+            digital: Determines if the int16 samples are returned instead of volts.
+
+        Returns:
+            The C-contiguous (sample, channel) samples.
+        """
+        channels = np.arange(self.n_channels) if channels is None else np.asarray(channels, dtype=np.intp)
+        data = self.read_digital(start, stop, channels)
+        if digital:
+            return np.ascontiguousarray(data.T)
+        volts = np.empty(data.shape[::-1], dtype=np.float64)
+        np.multiply(data.T, self.gains[channels], out=volts)
+        np.add(volts, self.offsets[channels], out=volts)
+        return volts
+
+
+class EDFSource:
+    """A lazy (channel, sample) array over an EDF recording described by an edf_reader dictionary.
+
+    Indexing with source[channels, start:stop] reads only the data records which contain the selected samples and
+    only the selected channels, so a preview of a few channels over a few minutes does not decode the recording.
+    Channels can be selected by index, slice or label, e.g. source[["LA1", "LA2"], :2560].
+
+    Attributes:
+        edf: The memory-mapped EDF file.
+        labels: The label of each channel as returned by edf_reader, e.g. ("LA", "1").
+        sample_rate: The sample rate of the channels.
+        start: The start of the recording.
+        gain: The volts per digital step of each channel.
+        offset: The value in volts of digital zero of each channel.
+        digital: Determines if reads return the int16 samples instead of volts.
+
+    Args:
+        edf_contents: The dictionary returned by edf_reader.
+        digital: Determines if reads return the int16 samples instead of volts.
+    """
+
+    def __init__(self, edf_contents: Mapping[str, Any], digital: bool = False) -> None:
+        raw = edf_contents["edf_raw"]
+        self.edf: EDFFile = raw if isinstance(raw, EDFFile) else EDFFile(edf_contents["edf_path"])
+        self.labels: list[tuple[str, str]] = list(edf_contents["edf_channellabel_axis"])
+        self.sample_rate: float = float(edf_contents["edf_sfreq"])
+        self.start: datetime.datetime = edf_contents["edf_start"]
+        self.gain: np.ndarray = np.asarray(edf_contents["edf_gain"], dtype=np.float64)
+        self.offset: np.ndarray = np.asarray(edf_contents["edf_offset"], dtype=np.float64)
+        self.digital: bool = digital
+
+        self._channel_names: dict[str, int] = {"".join(label): i for i, label in enumerate(self.labels)}
+        self._channel_names.update((name, i) for i, name in enumerate(edf_contents["edf_raw_chanlabs"]))
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """The number of channels and samples."""
+        return len(self.labels), len(self.edf)
+
+    def __len__(self) -> int:
+        """The number of channels."""
+        return len(self.labels)
+
+    def get_channel_indices(self, channels: Any) -> np.ndarray:
+        """Gets the indices of a channel selection.
+
+        Args:
+            channels: A channel index, slice, label or a sequence of indices or labels.
+
+        Returns:
+            The indices of the selected channels.
+        """
+        if isinstance(channels, slice):
+            return np.arange(len(self.labels))[channels]
+        elif isinstance(channels, (str, int, np.integer)):
+            channels = [channels]
+        return np.array(
+            [self._channel_names[channel] if isinstance(channel, str) else channel for channel in channels],
+            dtype=np.intp,
+        )
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        """Reads a (channel, sample) selection of the recording.
+
+        Args:
+            key: The channel selection, optionally followed by a sample index or slice.
+
+        Returns:
+            The selected samples, in volts unless the source is digital.
+        """
+        channels, samples = key if isinstance(key, tuple) else (key, slice(None))
+        indices = self.get_channel_indices(channels)
+
+        if isinstance(samples, slice):
+            start, stop, step = samples.indices(len(self.edf))
+        else:
+            start = int(samples) + (len(self.edf) if samples < 0 else 0)
+            stop, step = start + 1, 1
+            if not 0 <= start < len(self.edf):
+                raise IndexError(f"Sample index {samples} is out of range.")
+
+        if step > 0:
+            data = self.edf.read_digital(start, stop, indices)[:, ::step]
+        else:
+            positions = np.arange(start, stop, step)
+            low = int(positions.min()) if positions.size else 0
+            high = int(positions.max()) + 1 if positions.size else 0
+            data = self.edf.read_digital(low, high, indices)[:, positions - low]
+
+        if not self.digital:
+            data = data * self.gain[indices, None] + self.offset[indices, None]
+        if not isinstance(samples, slice):
+            data = data[:, 0]
+        if isinstance(channels, (str, int, np.integer)):
+            data = data[0]
+        return data
+
+    def get_window(self, channels: Any, start: float, stop: float) -> np.ndarray:
+        """Reads channels in a window of seconds since the start of the recording.
+
+        Args:
+            channels: The channel selection.
+            start: The start of the window in seconds.
+            stop: The end of the window in seconds.
+
+        Returns:
+            The (channel, sample) samples inside the window.
+        """
+        return self[channels, int(np.ceil(start * self.sample_rate)) : int(np.ceil(stop * self.sample_rate))]
+
+
+# Functions #
+def _parse_filter(value: str) -> float:
+    """Parses the frequency of a prefilter setting, "DC" is 0 Hz.
+
+    Args:
+        value: The frequency text of the setting, e.g. "0.1".
+
+    Returns:
+        The frequency, NaN if it cannot be parsed.
+    """
+    if value == "DC":
+        return 0.0
+    try:
+        return float(value.replace(",", "."))
+    except ValueError:
+        return float("nan")
+
+
+def parse_prefilters(prefilters: tuple[str, ...], sample_rate: float) -> tuple[float, float]:
+    """Parses the "HP:0.1Hz LP:300Hz" prefilter fields of channels into the filter settings of the recording.
+
+    Like MNE, the highest highpass and the lowest lowpass are kept and a missing lowpass is the Nyquist frequency.
+
+    Args:
+        prefilters: The prefilter field of each channel.
+        sample_rate: The sample rate of the channels.
+
+    Returns:
+        The highpass and lowpass frequencies.
+    """
+    settings = {}
+    for kind in ("HP", "LP"):
+        values = []
+        for prefilter in prefilters:
+            matches = re.findall(rf"{kind}:\s*([a-zA-Z0-9,.]+?)(?:Hz)?(?:\s|$)", prefilter)
+            values.append(_parse_filter(matches[-1]) if matches else float("nan"))
+        values = np.array(values)
+        if np.all(np.isnan(values)):
+            settings[kind] = float("nan")
+        else:
+            settings[kind] = float(np.nanmax(values) if kind == "HP" else np.nanmin(values))
+
+    highpass = 0.0 if np.isnan(settings["HP"]) else settings["HP"]
+    lowpass = settings["LP"] if not np.isnan(settings["LP"]) and settings["LP"] > 0 else sample_rate / 2
+    if highpass > lowpass:
+        highpass, lowpass = 0.0, sample_rate / 2
+    return highpass, lowpass
+
+
+def _parse_start(date: str, time: str) -> datetime.datetime:
+    """Parses the EDF start date and time fields.
+
+    Args:
+        date: The dd.mm.yy start date.
+        time: The hh.mm.ss start time.
+
+    Returns:
+        The start of the recording, years 85-99 are 1985-1999 and 00-84 are 2000-2084.
+    """
+    day, month, year = (int(part) for part in date.split("."))
+    hour, minute, second = (int(part) for part in time.split("."))
+    year += 1900 if year >= 85 else 2000
+    return datetime.datetime(year, month, day, hour, minute, second)
+
+
+def read_edf_header(path: pathlib.Path | str) -> EDFHeader:
+    """Reads the header of an EDF/EDF+ file without touching its data records.
+
+    Args:
+        path: The path of the EDF file.
+
+    Returns:
+        The header of the file.
+    """
+    path = pathlib.Path(path)
+    with path.open("rb") as file:
+        fixed = file.read(256).decode("latin-1")
+        if len(fixed) < 256:
+            raise ValueError(f"{path} is too short to be an EDF file.")
+        n_signals = int(fixed[252:256])
+        signal_header = file.read(256 * n_signals).decode("latin-1")
+
+    fields = {}
+    position = 0
+    for name, width in _SIGNAL_FIELDS:
+        fields[name] = [
+            signal_header[position + i * width : position + (i + 1) * width].strip() for i in range(n_signals)
+        ]
+        position += width * n_signals
+
+    header_bytes = int(fixed[184:192])
+    samples_per_record = np.array(fields["samples_per_record"], dtype=np.int64)
+    n_records = int(fixed[236:244])
+    if n_records < 0:
+        n_records = (path.stat().st_size - header_bytes) // (2 * int(samples_per_record.sum()))
+
+    return EDFHeader(
+        path=path,
+        patient=fixed[8:88].strip(),
+        recording=fixed[88:168].strip(),
+        start=_parse_start(fixed[168:176], fixed[176:184]),
+        header_bytes=header_bytes,
+        reserved=fixed[192:236].strip(),
+        n_records=n_records,
+        record_duration=float(fixed[244:252]),
+        labels=tuple(fields["labels"]),
+        transducers=tuple(fields["transducers"]),
+        physical_dimensions=tuple(fields["physical_dimensions"]),
+        physical_min=np.array(fields["physical_min"], dtype=np.float64),
+        physical_max=np.array(fields["physical_max"], dtype=np.float64),
+        digital_min=np.array(fields["digital_min"], dtype=np.float64),
+        digital_max=np.array(fields["digital_max"], dtype=np.float64),
+        prefilters=tuple(fields["prefilters"]),
+        samples_per_record=samples_per_record,
+    )
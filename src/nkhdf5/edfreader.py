@@ -5,18 +5,21 @@ lenght to the same directory level as the EDF directory provided.
 
 # Imports #
 # Standard Libraries #
+import logging
 import os
-import pandas as pd
 import numpy as np
 
+from datetime import datetime, timedelta
 
-import subprocess
-
-import mne
-
-import re
+from .montage import ChannelMontage
+from .edffile import ANNOTATIONS_LABEL
+from .edffile import EDFFile
+from .edffile import EDFSource
+from .edffile import UnsupportedEDFError
+from .edffile import parse_prefilters
+from .edffile import read_edf_header
 
-from datetime import datetime, timedelta
+logger = logging.getLogger(__name__)
 
 #Define common labels for channel type
 ieeg_chan = ['OFC', 'SGC', 'RA', 'LA', 'RH', 'LH', 'VC']
@@ -24,86 +27,130 @@ dc_chan   = ['DC']
 ekg_chan  = ['EKG', 'EOG'] #todo: create separate variables for EOG in the future, for now pooled with EKG
 emg_chan  = ['EMG']
 
+#Classifier built once from the labels above, caches the result for each montage it sees
+default_montage = ChannelMontage(ieeg_chan, dc_chan, ekg_chan, emg_chan)
+
 #Gets list of all EDF files in patient's main folder 
 def get_edf_list(edf_dir):
     edf_list = sorted(filter(lambda x: True if 'edf' in x else False, os.listdir(edf_dir)))
     return edf_list
 
+#Reads the header and memory-maps the data records with the native reader, which handles the common NK case of
+#channels sharing one sample rate
+def _read_native(edf_path):
+    edf = EDFFile(edf_path)
+    sfreq = edf.sample_rate
+    highpass, lowpass = parse_prefilters([edf.header.prefilters[i] for i in edf.signals], sfreq)
+    return {
+        'edf_start': edf.start,
+        'edf_nsample': edf.n_samples,
+        'edf_sfreq': sfreq,
+        'edf_lowpass': lowpass,
+        'edf_highpass': highpass,
+        'edf_nchan': edf.n_channels,
+        'edf_raw_chanlabs': list(edf.labels),
+        'edf_gain': edf.gains,
+        'edf_offset': edf.offsets,
+        'edf_physical_limits': edf.physical_limits,
+        'edf_raw': edf,
+    }
+
+#Reads the EDF with MNE, the fallback for files the native reader does not handle (mixed sample rates, EDF+D)
+def _read_mne(edf_path):
+    import mne
+
+    raw = mne.io.read_raw_edf(edf_path)
+    header = read_edf_header(edf_path)
+    signals = [i for i, label in enumerate(header.labels) if label != ANNOTATIONS_LABEL]
+    return {
+        'edf_start': raw.info['meas_date'].replace(tzinfo=None),
+        'edf_nsample': len(raw),
+        'edf_sfreq': raw.info['sfreq'],
+        'edf_lowpass': raw.info['lowpass'],
+        'edf_highpass': raw.info['highpass'],
+        'edf_nchan': raw.info['nchan'],
+        'edf_raw_chanlabs': raw.info['ch_names'],
+        'edf_gain': header.gains[signals],
+        'edf_offset': header.offsets[signals],
+        'edf_physical_limits': tuple(limits[signals] for limits in header.physical_limits),
+        'edf_raw': raw,
+    }
+
 #Extracts metadata, timeseries and raw data from EDF file
-def edf_reader(edf_dir, edf_fn):
+#If load_data is False the samples are left on disk, use iter_edf_blocks on 'edf_raw' to stream them
+#backend is 'native' (falls back to MNE if the file is not supported) or 'mne'
+def edf_reader(edf_dir, edf_fn, load_data=True, backend='native'):
 
     #Read EDF file
-    raw = mne.io.read_raw_edf(os.path.join(edf_dir, edf_fn))
-        
-    edf_len = timedelta(seconds=len(raw)/raw.info['sfreq']) # seconds
-    edf_start = raw.info['meas_date']
+    edf_path = os.path.join(edf_dir, edf_fn)
+    contents = None
+    if backend == 'native':
+        try:
+            contents = _read_native(edf_path)
+        except UnsupportedEDFError as error:
+            logger.info("Reading %s with MNE, the native reader does not support it: %s", edf_path, error)
+            contents = None
+    if contents is None:
+        contents = _read_mne(edf_path)
+    raw = contents['edf_raw']
+
+    edf_len = timedelta(seconds=contents['edf_nsample']/contents['edf_sfreq']) # seconds
+    edf_start = contents['edf_start']
     edf_end = edf_start + edf_len
-    ch_names_clean = [ch.split('-')[0].split('POL ')[1].replace(" ", "") for ch in raw.ch_names]
-    #Assign channel type
-    def find_indices(lst, condition):
-        return [i for i, elem in enumerate(lst) if condition(elem)]
-    
-    def find_chantype(chan_list, index_list):
-        for i in range(len(chan_list)):
-            index_list = index_list + find_indices(ch_names_clean, lambda e: True if chan_list[i] in e else False)
-        return index_list
-
-    ieeg_idx = find_chantype(ieeg_chan, [])
-    dc_idx = find_chantype(dc_chan, [])
-    ekg_idx = find_chantype(ekg_chan, [])
-    emg_idx = find_chantype(emg_chan, [])
-    not_scalp_idx = ieeg_idx + dc_idx + ekg_idx + emg_idx
-    scalp_idx = list(set(list(range(len(ch_names_clean)))) - set(not_scalp_idx))
-    
-    chantype = ch_names_clean.copy()
-
-    for i in range(len(ieeg_idx)):
-        chantype[ieeg_idx[i]] = 'intracranial EEG'
-    for i in range(len(dc_idx)):
-        chantype[dc_idx[i]] = 'TTL'
-    for i in range(len(ekg_idx)):
-        chantype[ekg_idx[i]] = 'EKG'
-    for i in range(len(emg_idx)):
-        chantype[emg_idx[i]] = 'EMG'
-    for i in range(len(scalp_idx)):
-        chantype[scalp_idx[i]] = 'scalp EEG'
-
-    #Assign channel labels
-    def get_channel_labels(all_labels):
-        old_list = []
-        new_list = []
-        for i in range(len(all_labels)):
-            old_list.append(re.sub("[A-Za-z]+", lambda ele: "" + ele[0] + " ", all_labels[i]))
-        old_list = [x.split(" ") for x in old_list]
-        for i in range(len(old_list)):
-            new_list.append(tuple(old_list[i]))
-        return new_list
-
-    channel_labels = get_channel_labels(ch_names_clean)
+    ch_names_clean = [ch.split('-')[0].split('POL ')[1].replace(" ", "") for ch in contents['edf_raw_chanlabs']]
+    #Assign channel type and channel labels
+    classification = default_montage.classify(ch_names_clean)
+    chantype = list(classification.chantypes)
+    channel_labels = list(classification.labels)
 
     #Extract raw data and timeseries
-    data_array, time = raw[:,:]
+    if load_data and isinstance(raw, EDFFile):
+        data_array, time = raw.read(), np.arange(len(raw)) / raw.sample_rate
+    elif load_data:
+        data_array, time = raw[:,:]
+    else:
+        data_array, time = None, None
 
     edf_dic = {
         'edf_fn': edf_fn,
-        'edf_path': os.path.join(edf_dir, edf_fn),
-        'edf_start': edf_start.replace(tzinfo=None), 
-        'edf_end': edf_end.replace(tzinfo=None),
+        'edf_path': edf_path,
+        'edf_start': edf_start,
+        'edf_end': edf_end,
         'edf_timezone': 'US/Pacific',
         'edf_duration': edf_len,
-        'edf_nsample': len(raw),
-        'edf_sfreq': raw.info['sfreq'],
-        'edf_lowpass': raw.info['lowpass'],
-        'edf_highpass': raw.info['highpass'],
-        'edf_nchan': raw.info['nchan'],
-        'edf_raw_chanlabs': raw.info['ch_names'],
+        'edf_nsample': contents['edf_nsample'],
+        'edf_sfreq': contents['edf_sfreq'],
+        'edf_lowpass': contents['edf_lowpass'],
+        'edf_highpass': contents['edf_highpass'],
+        'edf_nchan': contents['edf_nchan'],
+        'edf_raw_chanlabs': contents['edf_raw_chanlabs'],
         'edf_chantype': chantype,
+        'edf_chantype_idx': classification.indices,
         'edf_axis': list(['chan','sample']),
         'edf_data': data_array,
         'edf_time_axis': time,
-        'edf_channellabel_axis': channel_labels
+        'edf_channellabel_axis': channel_labels,
+        'edf_gain': contents['edf_gain'],
+        'edf_offset': contents['edf_offset'],
+        'edf_physical_limits': contents['edf_physical_limits'],
+        'edf_raw': raw
     }
         
     return edf_dic
 
-print('EDF reader is ready to use')
+#Opens an EDF file as a lazy source, source[channels, start:stop] reads only the records it needs
+def edf_source(edf_dir, edf_fn, digital=False):
+    return EDFSource(edf_reader(edf_dir, edf_fn, load_data=False), digital=digital)
+
+#Yields (start sample, data block, time block) tuples of at most block_size samples from an EDF opened by edf_reader
+#With digital=True the native reader yields the int16 samples instead of volts
+def iter_edf_blocks(raw, block_size, digital=False):
+    for start in range(0, len(raw), block_size):
+        stop = min(start + block_size, len(raw))
+        if isinstance(raw, EDFFile):
+            data_block = raw.read_digital(start, stop) if digital else raw.read(start, stop)
+            time_block = np.arange(start, stop) / raw.sample_rate
+        else:
+            data_block, time_block = raw[:, start:stop]
+        yield start, data_block, time_block
+
@@ -0,0 +1,675 @@
+"""extraction.py
+Writes time windows of HDF5NK archives into new HDF5NK files.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import as_completed
+from dataclasses import dataclass
+import pathlib
+from typing import Any
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .catalog import ArchiveCatalog
+from .chunkcache import CachedSeries
+from .chunkcache import ChunkCache
+from .chunkcache import get_chunk_cache_options
+from .chunkcache import open_dataset
+from .hdf5nk import HDF5NK_0_1_0
+from .handles import DEFAULT_MAX_OPEN_FILES
+from .handles import FileHandleCache
+from .layout import SERIES_DATASET_NAMES
+from .layout import get_dataset_name
+from .scaling import ScaledSeries
+from .storage import StoragePreset
+from .timeaxis import get_time_axis
+from .timestamps import end_nanostamp
+from .windows import SourceSlice
+from .windows import find_source_slice
+from .windows import list_sources
+
+
+# Definitions #
+# Constants #
+DEFAULT_BATCH_BYTES: int = 2**30
+
+
+# Classes #
+@dataclass(frozen=True)
+class ExtractionWindow:
+    """A named [start, stop) nanostamp window to write into its own file.
+
+    Attributes:
+        name: The file name of the output, e.g. "sub-PR06_task-biomarker_0001_ieeg.h5".
+        start: The first nanostamp of the window.
+        stop: The nanostamp after the end of the window.
+    """
+
+    name: str
+    start: int
+    stop: int
+
+
+@dataclass
+class SeriesWindow:
+    """The samples of one series inside a window, with the metadata of the series.
+
+    Attributes:
+        data: The (sample, channel) samples.
+        nanostamps: The nanostamp of each sample.
+        metadata: The channel axes and attributes of the series, see read_series_metadata.
+        subject_id: The subject ID of the source the metadata was read from.
+    """
+
+    data: np.ndarray
+    nanostamps: np.ndarray
+    metadata: dict[str, Any]
+    subject_id: str
+
+
+@dataclass
+class ExtractionResult:
+    """The outcome of writing a single window in a batch.
+
+    Attributes:
+        name: The file name of the output.
+        out_path: The path of the output.
+        status: Either "written", "skipped" or "failed".
+        error: The formatted exception if the window failed.
+    """
+
+    name: str
+    out_path: pathlib.Path
+    status: str
+    error: str | None = None
+
+
+class WindowPlan:
+    """The source slices of one window of a series, found before any sample is read.
+
+    Attributes:
+        slices: The samples of each source inside the window, in time order.
+        n_channels: The number of channels of the series.
+        dtype: The dtype of the samples once read.
+        metadata: The channel axes and attributes of the series in the first source.
+        subject_id: The subject ID of the first source.
+    """
+
+    def __init__(
+        self,
+        slices: list[SourceSlice],
+        n_channels: int,
+        dtype: np.dtype,
+        metadata: dict[str, Any],
+        subject_id: str,
+    ) -> None:
+        self.slices: list[SourceSlice] = slices
+        self.n_channels: int = n_channels
+        self.dtype: np.dtype = dtype
+        self.metadata: dict[str, Any] = metadata
+        self.subject_id: str = subject_id
+
+    @property
+    def n_samples(self) -> int:
+        """The number of samples in the window."""
+        return sum(s.length for s in self.slices)
+
+    @property
+    def nbytes(self) -> int:
+        """The size of the window's samples once read."""
+        return self.n_samples * (self.n_channels * self.dtype.itemsize + np.dtype(np.int64).itemsize)
+
+
+class WindowScheduler:
+    """Reads many windows of HDF5NK files, grouping the reads by source so shared sources are read once.
+
+    Windows are first located in every source by binary search, so the size of each window is known and its arrays
+    are allocated once. The reads of each source are then merged: slices of windows which overlap, or are at most
+    merge_gap samples apart, are read as one hyperslab and fanned out to the windows. Sources are opened through an
+    LRU of file handles, so consecutive windows which share sources reuse the open files. Direct reads can be given a
+    raw chunk cache sized for each series, so hyperslabs which share chunks decompress them once.
+
+    Attributes:
+        paths: The paths of the source files.
+        handles: The LRU of open source files.
+        merge_gap: The largest gap, in samples, between slices which are still read as one hyperslab.
+        cache: The chunk cache the samples are read through, None if they are read directly.
+        chunk_cache_chunks: The number of chunks of a series the HDF5 raw chunk cache of its direct reads holds.
+
+    Args:
+        sources: A directory of HDF5NK files or the paths of the files.
+        max_open_files: The maximum number of source files kept open.
+        merge_gap: The largest gap, in samples, between slices which are still read as one hyperslab.
+        handles: An existing LRU of open files to share, instead of creating one.
+        cache: The chunk cache to read the samples through, None to read them directly.
+        chunk_cache_chunks: The number of chunks of a series the HDF5 raw chunk cache of its direct reads holds, see
+            chunkcache.get_chunk_cache_options, None keeps the raw chunk cache settings of the files.
+    """
+
+    def __init__(
+        self,
+        sources: pathlib.Path | str | Iterable[pathlib.Path | str],
+        max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+        merge_gap: int = 0,
+        handles: FileHandleCache | None = None,
+        cache: ChunkCache | None = None,
+        chunk_cache_chunks: int | None = None,
+    ) -> None:
+        self.paths: list[pathlib.Path] = list_sources(sources)
+        self.handles: FileHandleCache = FileHandleCache(max_open_files) if handles is None else handles
+        self.merge_gap: int = merge_gap
+        self.cache: ChunkCache | None = cache
+        self.chunk_cache_chunks: int | None = chunk_cache_chunks
+
+    def __enter__(self) -> "WindowScheduler":
+        """Returns the scheduler for use as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Closes the open source files."""
+        self.close()
+
+    def close(self) -> None:
+        """Closes the open source files."""
+        self.handles.close()
+
+    def plan(self, windows: Sequence[tuple[int, int]], series: str = "data_ieeg") -> list[WindowPlan | None]:
+        """Locates windows in every source without reading any samples.
+
+        Args:
+            windows: The (start, stop) nanostamps of each window.
+            series: The series name, e.g. "data_ieeg".
+
+        Returns:
+            The plan of each window, None for windows which no source overlaps.
+        """
+        name = get_dataset_name(series)
+        window_slices = [[] for _ in windows]
+        sources = {}
+        for path in self.paths:
+            file = self.handles.get(path)
+            if name not in file:
+                continue
+            time_axis = get_time_axis(file[name])
+            for slices, (start, stop) in zip(window_slices, windows):
+                source_slice = find_source_slice(file, path, series, start, stop, time_axis)
+                if source_slice is not None:
+                    slices.append((int(time_axis[source_slice.start]), source_slice))
+                    if path not in sources:
+                        scaled = ScaledSeries(file[name])
+                        sources[path] = (
+                            scaled.shape[1],
+                            scaled.dtype,
+                            read_series_metadata(file, series),
+                            str(file.attrs.get("subject_id", "")),
+                        )
+
+        plans = []
+        for slices in window_slices:
+            slices = [source_slice for _, source_slice in sorted(slices, key=lambda item: item[0])]
+            if not slices:
+                plans.append(None)
+                continue
+            n_channels, _, metadata, subject_id = sources[slices[0].path]
+            if any(sources[s.path][0] != n_channels for s in slices):
+                raise ValueError(f"The {series} series of the files have different channel counts.")
+            dtype = np.result_type(*(sources[s.path][1] for s in slices))
+            plans.append(WindowPlan(slices, n_channels, dtype, metadata, subject_id))
+        return plans
+
+    def read_plans(self, plans: Sequence[WindowPlan | None], series: str = "data_ieeg") -> list[SeriesWindow | None]:
+        """Reads planned windows, visiting each source once and reading overlapping slices once.
+
+        Args:
+            plans: The plans of the windows, from plan.
+            series: The series name the plans were made for.
+
+        Returns:
+            The samples of each window, None for windows without a plan.
+        """
+        name = get_dataset_name(series)
+        results = []
+        reads = {}
+        for plan in plans:
+            if plan is None:
+                results.append(None)
+                continue
+            window = SeriesWindow(
+                data=np.empty((plan.n_samples, plan.n_channels), dtype=plan.dtype),
+                nanostamps=np.empty((plan.n_samples,), dtype=np.int64),
+                metadata=plan.metadata,
+                subject_id=plan.subject_id,
+            )
+            results.append(window)
+            position = 0
+            for source_slice in plan.slices:
+                reads.setdefault(source_slice.path, []).append((window, source_slice, position))
+                position += source_slice.length
+
+        # Sources are visited in the reverse order they were planned in, so the most recently opened files are
+        # still in the LRU when their reads start.
+        for path in sorted(reads, key=self.paths.index, reverse=True):
+            file = self.handles.get(path)
+            series_dataset = file[name]
+            if self.cache is None and self.chunk_cache_chunks is not None and series_dataset.chunks is not None:
+                options = get_chunk_cache_options(series_dataset, self.chunk_cache_chunks)
+                dataset = ScaledSeries(open_dataset(file, name, **options))
+            elif self.cache is None:
+                dataset = ScaledSeries(series_dataset)
+            else:
+                dataset = CachedSeries(series_dataset, self.cache)
+            time_axis = get_time_axis(dataset.dataset)
+            for group in self._merge_reads(reads[path]):
+                group_start = min(source_slice.start for _, source_slice, _ in group)
+                group_stop = max(source_slice.stop for _, source_slice, _ in group)
+                if len(group) == 1:
+                    window, source_slice, position = group[0]
+                    out_slice = np.s_[position : position + source_slice.length]
+                    if window.data.shape[1] > 0:
+                        dataset.read_direct(window.data, np.s_[group_start:group_stop], out_slice)
+                    window.nanostamps[out_slice] = time_axis[group_start:group_stop]
+                    continue
+
+                block = dataset[group_start:group_stop] if dataset.shape[1] > 0 else None
+                block_nanostamps = time_axis[group_start:group_stop]
+                for window, source_slice, position in group:
+                    out_slice = np.s_[position : position + source_slice.length]
+                    in_slice = np.s_[source_slice.start - group_start : source_slice.stop - group_start]
+                    if block is not None:
+                        window.data[out_slice] = block[in_slice]
+                    window.nanostamps[out_slice] = block_nanostamps[in_slice]
+
+        return results
+
+    def _merge_reads(
+        self,
+        reads: list[tuple[SeriesWindow, SourceSlice, int]],
+    ) -> list[list[tuple[SeriesWindow, SourceSlice, int]]]:
+        """Groups the reads of one source whose slices overlap or are at most merge_gap samples apart.
+
+        Args:
+            reads: The (window, slice, position in window) reads of the source.
+
+        Returns:
+            The groups of reads, each read as one hyperslab.
+        """
+        groups = []
+        group_stop = None
+        for read in sorted(reads, key=lambda item: item[1].start):
+            if group_stop is not None and read[1].start <= group_stop + self.merge_gap:
+                groups[-1].append(read)
+                group_stop = max(group_stop, read[1].stop)
+            else:
+                groups.append([read])
+                group_stop = read[1].stop
+        return groups
+
+    def read(self, windows: Sequence[tuple[int, int]], series: str = "data_ieeg") -> list[SeriesWindow | None]:
+        """Reads the samples of a series inside many [start, stop) nanostamp windows.
+
+        Args:
+            windows: The (start, stop) nanostamps of each window.
+            series: The series name, e.g. "data_ieeg".
+
+        Returns:
+            The samples of each window, None for windows which no source overlaps.
+        """
+        return self.read_plans(self.plan(windows, series), series)
+
+    def iter_batches(
+        self,
+        windows: Sequence[tuple[int, int]],
+        series: Sequence[str] = ("data_ieeg",),
+        max_bytes: int = DEFAULT_BATCH_BYTES,
+    ) -> Iterator[tuple[list[int], dict[str, list[SeriesWindow | None]]]]:
+        """Reads windows of several series in time-ordered batches whose samples fit in a memory budget.
+
+        Args:
+            windows: The (start, stop) nanostamps of each window.
+            series: The series names, e.g. ["data_ieeg", "data_ekg"].
+            max_bytes: The memory budget of a batch, a window larger than the budget is read on its own.
+
+        Yields:
+            The indices of the windows in the batch and the samples of each series for those windows.
+        """
+        plans = {name: self.plan(windows, name) for name in series}
+        order = sorted(range(len(windows)), key=lambda i: windows[i][0])
+        sizes = [sum(plan[i].nbytes for plan in plans.values() if plan[i] is not None) for i in range(len(windows))]
+
+        batch = []
+        batch_bytes = 0
+        for i in order + [None]:
+            if batch and (i is None or batch_bytes + sizes[i] > max_bytes):
+                yield batch, {name: self.read_plans([plan[j] for j in batch], name) for name, plan in plans.items()}
+                batch, batch_bytes = [], 0
+            if i is not None:
+                batch.append(i)
+                batch_bytes += sizes[i]
+
+
+# Functions #
+def read_series_metadata(file: h5py.File, series: str) -> dict[str, Any]:
+    """Reads the channel axes and acquisition attributes of an electrical series.
+
+    Args:
+        file: The open HDF5NK file.
+        series: The series name, e.g. "data_ieeg".
+
+    Returns:
+        The channel labels, channel coordinates, filter settings, sample rate and time zone of the series.
+    """
+    name = get_dataset_name(series)
+    dataset = file[name]
+    time_axis = file[f"{name}_time_axis"]
+    coords_name = f"{name}_channelcoord_axis"
+    return {
+        "channellabel_axis": file[f"{name}_channellabel_axis"].asstr()[...],
+        "channelcoord_axis": file[coords_name][...] if coords_name in file else np.empty((0, 3)),
+        "filter_lowpass": dataset.attrs.get("filter_lowpass", 0),
+        "filter_highpass": dataset.attrs.get("filter_highpass", 0),
+        "sample_rate": time_axis.attrs.get("sample_rate", np.nan),
+        "time_zone": time_axis.attrs.get("time_zone", ""),
+    }
+
+
+def read_windows(
+    sources: pathlib.Path | str | Iterable[pathlib.Path | str],
+    windows: Sequence[tuple[int, int]],
+    series: str = "data_ieeg",
+    max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+) -> list[SeriesWindow | None]:
+    """Reads the samples of a series inside many [start, stop) nanostamp windows, see WindowScheduler.
+
+    Args:
+        sources: A directory of HDF5NK files or the paths of the files.
+        windows: The (start, stop) nanostamps of each window.
+        series: The series name, e.g. "data_ieeg".
+        max_open_files: The maximum number of source files kept open.
+
+    Returns:
+        The samples of each window, None for windows which no source overlaps.
+    """
+    with WindowScheduler(sources, max_open_files) as scheduler:
+        return scheduler.read(windows, series)
+
+
+def write_series_windows(
+    out_path: pathlib.Path | str,
+    windows: Mapping[str, SeriesWindow],
+    subject_id: str | None = None,
+    storage: str | StoragePreset | None = None,
+) -> pathlib.Path:
+    """Writes windows of series into a new HDF5NK file with a single bulk append per series.
+
+    Args:
+        out_path: The path of the HDF5NK file to create.
+        windows: The window of each series name.
+        subject_id: The subject ID of the new file, defaults to that of the first window.
+        storage: The storage preset of the electrical series, e.g. "archive".
+
+    Returns:
+        The path of the created file.
+    """
+    out_path = pathlib.Path(out_path)
+    first = next(iter(windows.values()))
+    with HDF5NK_0_1_0(
+        file=out_path,
+        mode="a",
+        create=True,
+        construct=True,
+        storage=storage,
+        sample_rate=float(first.metadata["sample_rate"]),
+        channel_counts={name: window.data.shape[1] for name, window in windows.items()},
+    ) as f_obj:
+        f_obj.attributes["subject_id"] = subject_id or first.subject_id
+        f_obj.attributes["start"] = min(int(window.nanostamps[0]) for window in windows.values())
+        f_obj.attributes["end"] = max(
+            end_nanostamp(window.nanostamps[-1], float(window.metadata["sample_rate"])) for window in windows.values()
+        )
+
+        for series_name, window in windows.items():
+            metadata = window.metadata
+            dataset = f_obj[series_name]
+            dataset.append(window.data, component_kwargs={"timeseries": {"data": window.nanostamps}})
+            labels = np.array(metadata["channellabel_axis"], dtype=h5py.special_dtype(vlen=str))
+            if len(labels) > 0:
+                dataset.axes[1]["channellabel_axis"].append(labels)
+            if len(metadata["channelcoord_axis"]) > 0:
+                dataset.axes[1]["channelcoord_axis"].append(metadata["channelcoord_axis"])
+            dataset.attributes["filter_lowpass"] = metadata["filter_lowpass"]
+            dataset.attributes["filter_highpass"] = metadata["filter_highpass"]
+            dataset.attributes["channel_count"] = window.data.shape[1]
+            dataset.axes[0]["time_axis"].attrs["sample_rate"] = metadata["sample_rate"]
+            dataset.axes[0]["time_axis"].attrs["time_zone"] = metadata["time_zone"]
+
+    return out_path
+
+
+def write_window(
+    sources: pathlib.Path | str | Iterable[pathlib.Path | str],
+    out_path: pathlib.Path | str,
+    start: int,
+    stop: int,
+    series: Iterable[str] | None = None,
+    subject_id: str | None = None,
+    storage: str | StoragePreset | None = None,
+    max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+) -> pathlib.Path:
+    """Writes the samples of HDF5NK files inside a [start, stop) nanostamp window into a new HDF5NK file.
+
+    Only the overlapping samples of each file are read, and each series is written with the channel axes and
+    attributes of the first file which has samples in the window. Every series is read through one WindowScheduler,
+    so each source is opened once for all of them.
+
+    Args:
+        sources: A directory of HDF5NK files or the paths of the files.
+        out_path: The path of the HDF5NK file to create.
+        start: The first nanostamp of the window.
+        stop: The nanostamp after the end of the window.
+        series: The series to write, defaults to every series.
+        subject_id: The subject ID of the new file, defaults to that of the sources.
+        storage: The storage preset of the electrical series, e.g. "archive".
+        max_open_files: The maximum number of source files kept open.
+
+    Returns:
+        The path of the created file.
+    """
+    series = list(SERIES_DATASET_NAMES) if series is None else list(series)
+    with WindowScheduler(sources, max_open_files) as scheduler:
+        windows = {name: scheduler.read([(start, stop)], name)[0] for name in series}
+    windows = {name: window for name, window in windows.items() if window is not None}
+    if not windows:
+        raise ValueError("No source has samples inside the window.")
+    return write_series_windows(out_path, windows, subject_id, storage)
+
+
+def write_event_windows(
+    sources: pathlib.Path | str | Iterable[pathlib.Path | str],
+    events: Iterable[int],
+    duration: int,
+    out_dir: pathlib.Path | str,
+    subject_id: str | None = None,
+    series: Iterable[str] = ("data_ieeg",),
+    name_format: str = "sub-{subject_id}_task-biomarker_{number:04d}_ieeg.h5",
+    storage: str | StoragePreset | None = None,
+    max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+    max_bytes: int = DEFAULT_BATCH_BYTES,
+) -> list[pathlib.Path | None]:
+    """Writes the window of a fixed duration before each event into its own HDF5NK file.
+
+    Each window ends at its event, inclusive, as the biomarker survey windows of hdf5concat do. The windows are read
+    by a WindowScheduler in time-ordered batches, so sources shared by several windows are opened and read once while
+    only a batch of windows is held in memory.
+
+    Args:
+        sources: A directory of HDF5NK files or the paths of the files.
+        events: The nanostamp of each event.
+        duration: The duration of the windows in nanoseconds.
+        out_dir: The directory to write the files to.
+        subject_id: The subject ID of the new files, defaults to that of the sources.
+        series: The series to write.
+        name_format: The file name of each window, formatted with the subject_id and the 1-based number of the event.
+        storage: The storage preset of the electrical series, e.g. "archive".
+        max_open_files: The maximum number of source files kept open.
+        max_bytes: The memory budget of the windows read at a time.
+
+    Returns:
+        The path of each window's file, None for windows which no source overlaps.
+    """
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    windows = [(int(event) - duration, int(event) + 1) for event in events]
+
+    out_paths = [None] * len(windows)
+    with WindowScheduler(sources, max_open_files) as scheduler:
+        for batch, series_windows in scheduler.iter_batches(windows, list(series), max_bytes):
+            for position, i in enumerate(batch):
+                reads = {name: reads[position] for name, reads in series_windows.items()}
+                event_windows = {name: window for name, window in reads.items() if window is not None}
+                if not event_windows:
+                    continue
+                subject = subject_id or next(iter(event_windows.values())).subject_id
+                out_path = out_dir / name_format.format(subject_id=subject, number=i + 1)
+                out_paths[i] = write_series_windows(out_path, event_windows, subject, storage)
+    return out_paths
+
+
+def _write_window_job(
+    sources: pathlib.Path | str | list[pathlib.Path],
+    catalog_path: pathlib.Path | None,
+    window: ExtractionWindow,
+    out_dir: pathlib.Path,
+    series: list[str] | None,
+    subject_id: str | None,
+    storage: str | StoragePreset | None,
+    resume: bool,
+) -> ExtractionResult:
+    """Writes one window of a batch, capturing any failure in the result.
+
+    Args:
+        sources: A directory of HDF5NK files or the paths of the files.
+        catalog_path: The path of an archive catalog which selects the sources overlapping the window.
+        window: The window to write.
+        out_dir: The directory to write the file to.
+        series: The series to write.
+        subject_id: The subject ID of the new file.
+        storage: The storage preset of the electrical series.
+        resume: Determines if existing, openable outputs are skipped.
+
+    Returns:
+        The outcome of the window.
+    """
+    out_path = out_dir / window.name
+    part_path = out_path.with_name(out_path.name + ".part")
+    try:
+        if resume and HDF5NK_0_1_0.is_openable(out_path):
+            return ExtractionResult(window.name, out_path, "skipped")
+
+        if catalog_path is not None:
+            sources = ArchiveCatalog(catalog_path).find_paths(window.start, window.stop)
+        part_path.unlink(missing_ok=True)
+        write_window(sources, part_path, window.start, window.stop, series, subject_id, storage)
+        part_path.replace(out_path)
+        return ExtractionResult(window.name, out_path, "written")
+    except Exception as error:
+        part_path.unlink(missing_ok=True)
+        return ExtractionResult(window.name, out_path, "failed", f"{type(error).__name__}: {error}")
+
+
+def write_windows(
+    sources: pathlib.Path | str | Iterable[pathlib.Path | str],
+    windows: Iterable[ExtractionWindow],
+    out_dir: pathlib.Path | str,
+    series: Iterable[str] | None = None,
+    subject_id: str | None = None,
+    storage: str | StoragePreset | None = None,
+    catalog_path: pathlib.Path | str | None = None,
+    jobs: int = 1,
+    resume: bool = False,
+    progress: Callable[[ExtractionResult], Any] | None = None,
+) -> list[ExtractionResult]:
+    """Writes many windows of HDF5NK files into their own files across a pool of processes.
+
+    A failure in one window is recorded in its result and does not stop the others. Files are written under a
+    temporary name and renamed once complete, so resume never mistakes an interrupted file for a finished one.
+
+    Args:
+        sources: A directory of HDF5NK files or the paths of the files.
+        windows: The windows to write.
+        out_dir: The directory to write the files to.
+        series: The series to write, defaults to every series.
+        subject_id: The subject ID of the new files, defaults to that of the sources.
+        storage: The storage preset of the electrical series, e.g. "archive".
+        catalog_path: The path of an archive catalog, if given only the files it finds in a window are opened.
+        jobs: The number of worker processes, 1 writes in the calling process.
+        resume: Determines if outputs which already exist and are openable are skipped.
+        progress: A function called with each result as soon as its window is done.
+
+    Returns:
+        The results in the order the windows were given.
+
+    Raises:
+        ValueError: If two windows have the same name, they would be written to the same file.
+    """
+    windows = list(windows)
+    names = [window.name for window in windows]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Windows must have unique names, repeated: {', '.join(duplicates)}.")
+
+    out_dir = pathlib.Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if isinstance(sources, (str, pathlib.Path)):
+        sources = pathlib.Path(sources)
+    else:
+        sources = [pathlib.Path(source) for source in sources]
+    catalog_path = None if catalog_path is None else pathlib.Path(catalog_path)
+    series = None if series is None else list(series)
+    job_args = [
+        (sources, catalog_path, window, out_dir, series, subject_id, storage, resume) for window in windows
+    ]
+
+    results = {}
+    if jobs == 1:
+        for index, args in enumerate(job_args):
+            results[index] = result = _write_window_job(*args)
+            if progress is not None:
+                progress(result)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(_write_window_job, *args): index for index, args in enumerate(job_args)}
+            for future in as_completed(futures):
+                index = futures[future]
+                window = windows[index]
+                try:
+                    result = future.result()
+                except Exception as error:
+                    # The job raised outside its own error handling, e.g. its worker process died.
+                    result = ExtractionResult(
+                        window.name, out_dir / window.name, "failed", f"{type(error).__name__}: {error}"
+                    )
+                results[index] = result
+                if progress is not None:
+                    progress(result)
+
+    return [results[index] for index in range(len(windows))]
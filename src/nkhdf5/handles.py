@@ -0,0 +1,100 @@
+"""handles.py
+A bounded LRU of open read-only HDF5 file handles shared by readers of many windows.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections import OrderedDict
+import pathlib
+from typing import Any
+
+# Third-Party Packages #
+import h5py
+
+# Local Packages #
+
+
+# Definitions #
+# Constants #
+DEFAULT_MAX_OPEN_FILES: int = 16
+
+
+# Classes #
+class FileHandleCache:
+    """Keeps recently used HDF5 files open, closing the least recently used one when the limit is reached.
+
+    Attributes:
+        max_open: The maximum number of files kept open.
+        file_kwargs: The keyword arguments for h5py.File.
+        opens: The number of times a file was opened.
+        hits: The number of times an open file was reused.
+
+    Args:
+        max_open: The maximum number of files kept open.
+        **file_kwargs: The keyword arguments for h5py.File, e.g. rdcc_nbytes.
+    """
+
+    def __init__(self, max_open: int = DEFAULT_MAX_OPEN_FILES, **file_kwargs: Any) -> None:
+        if max_open < 1:
+            raise ValueError("At least one file must be allowed open.")
+        self.max_open: int = max_open
+        self.file_kwargs: dict[str, Any] = file_kwargs
+        self.opens: int = 0
+        self.hits: int = 0
+        self._files: OrderedDict[pathlib.Path, h5py.File] = OrderedDict()
+
+    def __enter__(self) -> "FileHandleCache":
+        """Returns the cache for use as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Closes every open file."""
+        self.close()
+
+    def __len__(self) -> int:
+        """The number of open files."""
+        return len(self._files)
+
+    def __contains__(self, path: pathlib.Path | str) -> bool:
+        """Checks if a file is open."""
+        return pathlib.Path(path) in self._files
+
+    def get(self, path: pathlib.Path | str) -> h5py.File:
+        """Gets an open handle of a file, opening it read-only if it is not open.
+
+        Args:
+            path: The path of the file.
+
+        Returns:
+            The open file.
+        """
+        path = pathlib.Path(path)
+        file = self._files.get(path, None)
+        if file is not None:
+            self._files.move_to_end(path)
+            self.hits += 1
+            return file
+
+        while len(self._files) >= self.max_open:
+            _, oldest = self._files.popitem(last=False)
+            oldest.close()
+        file = h5py.File(path, "r", **self.file_kwargs)
+        self._files[path] = file
+        self.opens += 1
+        return file
+
+    def close(self) -> None:
+        """Closes every open file."""
+        while self._files:
+            _, file = self._files.popitem(last=False)
+            file.close()
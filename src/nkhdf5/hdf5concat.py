@@ -24,7 +24,9 @@ from nkhdf5 import hdf5nk
 
 # Local Packages #
 HDF5NK = hdf5nk.HDF5NK_0_1_0 
-from concatenator_tools import timestamps_to_datetime, str_to_datetime, concat_timeseries
+from concatenator_tools import str_to_datetime
+from nkhdf5.extraction import write_event_windows
+from nkhdf5.timestamps import local_datetime_to_nanostamp
 
 # Main #
 if __name__ == "__main__":
@@ -46,65 +48,30 @@ if __name__ == "__main__":
     #example_idx = 0
     #h5_files_bm = rel_h5_files[example_idx]
 
-    ## Extract data from h5 files associated to BM and concatenate timeseries
-    ##Loop through each biomarker period    
-    for i in range(len(rel_h5_files)):
-        concat_data = concat_timeseries(rel_h5_files[i])
-    ##Get concatenated timestamps as datetime objects
-        timestamps_as_datetime = timestamps_to_datetime(concat_data['time_array'])
-    
-        start_rec = bm_start_datetime[i]
-        end_rec = bm_end_datetime[i]
-        new_time_array = []
-        new_data_array = []
-        for j in range(len(timestamps_as_datetime)):
-            if start_rec<=timestamps_as_datetime[j]<=end_rec:
-                new_time_array.append(concat_data['time_array'][j])
-                new_data_array.append(concat_data['data_array'][j])
-                
-        new_time_array = np.array(new_time_array)
-        new_data_array = np.array(new_data_array)
-
-        bm_num = str(i + 1).zfill(4) 
-        file_name = f"sub-{patient_id}_task-biomarker_{bm_num}_ieeg.h5"
-        out_path  = pathlib.Path(f"/data_store0/presidio/nihon_kohden/{patient_id}/nkhdf5/biomarker", file_name)
-
-        ## Start of the actual code ##
-        print("creating: ", file_name)
-        print("")
-        # Create the file #
-        f_obj = HDF5NK(file=out_path, mode="a", create=True, construct=True)
-        f_obj.attributes["subject_id"] = patient_id
-        f_obj.attributes["start"] = int(time.mktime(bm_start_datetime[i].timetuple())*1e9)
-        f_obj.attributes["end"] = int(time.mktime(bm_end_datetime[i].timetuple())*1e9)
-    
-        file_data_ieeg = f_obj["data_ieeg"]
-        file_data_ieeg.append(new_data_array, component_kwargs={"timeseries": {"data": new_time_array}})
-        file_data_ieeg.axes[1]["channellabel_axis"].append(concat_data["channellabel_axis"])
-        file_data_ieeg.axes[1]["channelcoord_axis"].append(concat_data["channelcoord_axis"])
-
-        file_data_ieeg.attributes["filter_lowpass"]  = concat_data["filter_lowpass"]
-        file_data_ieeg.attributes["filter_highpass"] = concat_data["filter_highpass"]
-        file_data_ieeg.attributes["channel_count"]   = concat_data["channel_count"]
-        file_data_ieeg.axes[0]["time_axis"].attributes["sample_rate"] = concat_data["sample_rate"] 
-        file_data_ieeg.axes[0]["time_axis"].attributes["time_zone"] = concat_data["time_zone"] 
-
-        print("File after appending:")
-        print("")
-        print("ieeg data size: ", f_obj["data_ieeg"].shape)
-        print("ieeg time axis size: ", f_obj["data_ieeg"].axes[0]["time_axis"].shape)
-    #print("ieeg channel labels axis size: ", f_obj["data_ieeg"].axes[1]["channellabel_axis"].shape)
-    #print("ieeg channel coordinates axis size: ", f_obj["data_ieeg"].axes[1]["channelcoord_axis"].shape)
-    #print("f_obj['data_ieeg'].axes[1]['channellabel_axis']: ", f_obj["data_ieeg"].axes[1]["channellabel_axis"][...])
-        print("")
-
-    # After closing check if the file exists #
-        print(f"File Exists: {out_path.is_file()}")
+    ## Extract the window before each biomarker survey in one pass over the h5 files of all surveys
+    ## Sizes are computed up front and each file is written with a single append
+    h5_dir = pathlib.Path(stage1_path, patient_id, convert_edf_path)
+    h5_files = sorted({h5_dir / h5_fn for h5_fns in rel_h5_files for h5_fn in h5_fns})
+    events = [local_datetime_to_nanostamp(end_datetime) for end_datetime in bm_end_datetime]
+    out_dir = pathlib.Path(f"/data_store0/presidio/nihon_kohden/{patient_id}/nkhdf5/biomarker")
+
+    out_paths = write_event_windows(
+        h5_files,
+        events,
+        int(td.total_seconds() * 1e9),
+        out_dir,
+        subject_id=patient_id,
+        name_format="sub-{subject_id}_task-biomarker_{number:04d}_ieeg.h5",
+    )
+
+    # After closing check if the files exist #
+    for out_path in out_paths:
+        if out_path is None:
+            continue
+        print("created: ", out_path.name)
         print(f"File is Openable: {HDF5NK.is_openable(out_path)}")
         print("")
 
-        f_obj.close()
-
 
 """End of code
 
@@ -27,6 +27,7 @@ from classversioning import TriNumberVersion
 from classversioning import Version
 from classversioning import VersionType
 from hdf5objects.dataset import ElectricalSeriesMap
+from hdf5objects.dataset import TimeAxisMap
 from hdf5objects.fileobjects import HDF5EEG
 from hdf5objects.fileobjects import HDF5EEGMap
 from hdf5objects.hdf5bases import HDF5Dataset
@@ -35,6 +36,11 @@ from hdf5objects.hdf5bases import HDF5Map
 
 
 # Local Packages #
+from .layout import SERIES_DATASET_NAMES
+from .storage import StoragePreset
+from .storage import get_storage_preset
+from .timeaxis import as_h5py_dataset
+from .timeaxis import as_h5py_file
 
 
 # Definitions #
@@ -43,23 +49,47 @@ class ChannelAxisMap():
     pass
 
 class NKElectricalSeriesMap(ElectricalSeriesMap):
-    """A base outline which defines an Electrical Series for Nihon Kohden system."""
+    """A base outline which defines an Electrical Series for Nihon Kohden system.
+
+    The time_axis_mode attribute is "explicit" when the time axis holds a nanostamp per sample and "compact" when
+    only the start, sample rate and discontinuities are stored (see timeaxis.CompactTimeAxis).
+
+    The sample_format attribute is "float" when the series holds physical values and "digital" when it holds the
+    int16 ADC values of the EDF with per-channel channel_gain and channel_offset attributes (see scaling.ScaledSeries).
+    """
 
     # TODO: Create ChannelAxisMap, similar to TimeAxisMap, but holds all relevant
     # channel information (names, anatomical locations, coordinates, etc).
     default_attribute_names: Mapping[str, str] = (ElectricalSeriesMap.default_attribute_names | {
         "filter_lowpass": "filter_lowpass",
         "filter_highpass": "filter_highpass",
-        "channel_count": "channel_count"})
+        "channel_count": "channel_count",
+        "time_axis_mode": "time_axis_mode",
+        "sample_format": "sample_format"})
 
     default_attributes: Mapping[str, Any] = (ElectricalSeriesMap.default_attributes | {
         "filter_lowpass": 0,
         "filter_highpass": 0,
-        "channel_count": 0})
+        "channel_count": 0,
+        "time_axis_mode": "explicit",
+        "sample_format": "float"})
+
+    def construct(self, *args: Any, **kwargs: Any) -> None:
+        """Constructs the map on a copy of the default attributes.
+
+        HDF5Map starts every instance from the class's default_attributes dictionary and updates it in place, so
+        without a copy the attributes of one map, e.g. a digital sample_format, leak into every later map.
+        """
+        self.attributes = dict(self.attributes)
+        super().construct(*args, **kwargs)
 
 
 class HDF5NKMap(HDF5EEGMap):
-    """A map for HDF5NK files."""
+    """A map for HDF5NK files.
+
+    The "start" attribute is the nanostamp of the first sample of the recording and "end" is exclusive, the nanostamp
+    one sample period after the last sample, so a recording covers the [start, end) window.
+    """
 
     # TODO: Do we need to specify names for the default attributes? What about the Mapping[dtype, dtype]?
     # Followup with Anthony.
@@ -70,12 +100,7 @@ class HDF5NKMap(HDF5EEGMap):
             "start": 0,
             "end": 0}
 
-    default_map_names = {
-            "data_ieeg": "intracranialEEG", 
-            "data_scalpeeg": "scalpEEG",
-            "data_ekg": "EKG",
-            "data_ttl": "DCChannel"
-            }
+    default_map_names = dict(SERIES_DATASET_NAMES)
     default_maps = {
             "data_ieeg": NKElectricalSeriesMap(
                 attributes={"units": "microvolts"},
@@ -93,8 +118,52 @@ class HDF5NKMap(HDF5EEGMap):
                 attributes={"units": "microvolts"},
                 object_kwargs={"shape": (0, 0), "maxshape": (None, None)},
                 ),
+            "data_emg": NKElectricalSeriesMap(
+                attributes={"units": "microvolts"},
+                object_kwargs={"shape": (0, 0), "maxshape": (None, None)},
+                ),
             }
 
+    @classmethod
+    def from_storage(
+        cls,
+        storage: str | StoragePreset | None,
+        sample_rate: float | None = None,
+        channel_counts: Mapping[str, int] | None = None,
+        digital: bool = False,
+    ) -> "HDF5NKMap":
+        """Creates a map whose electrical series use the chunking and filters of a storage preset.
+
+        Args:
+            storage: The name of a storage preset, e.g. "archive", "analysis" or "realtime", a preset, or None to
+                keep the h5py defaults.
+            sample_rate: The sample rate of the recording, used to size chunks.
+            channel_counts: The number of channels of each series, used to size chunks.
+            digital: Determines if the electrical series store int16 digital values instead of floats.
+
+        Returns:
+            The new map.
+        """
+        channel_counts = {} if channel_counts is None else channel_counts
+        itemsize = 2 if digital else 4
+        maps = {}
+        for name, series_map in cls.default_maps.items():
+            channel_count = channel_counts.get(name, None)
+            object_kwargs = dict(series_map.kwargs)
+            time_axis_kwargs = {}
+            if digital:
+                object_kwargs["dtype"] = "i2"
+            if storage is not None:
+                preset = get_storage_preset(storage)
+                object_kwargs |= preset.get_series_kwargs(sample_rate, channel_count, itemsize)
+                time_axis_kwargs = preset.get_time_axis_kwargs(sample_rate, channel_count, itemsize)
+            maps[name] = type(series_map)(
+                attributes=dict(series_map.attributes) | ({"sample_format": "digital"} if digital else {}),
+                object_kwargs=object_kwargs,
+                axis_maps=[{"time_axis": TimeAxisMap(object_kwargs=time_axis_kwargs)}],
+                )
+        return cls(maps=maps)
+
 
 class HDF5NK(HDF5EEG):
     """A HDF5 file which contains data for Nihon Kohden EEG data.
@@ -113,6 +182,59 @@ class HDF5NK(HDF5EEG):
     FILE_TYPE: str = "NK_EEG"
     default_map: HDF5Map = HDF5NKMap()
 
+    def __init__(
+        self,
+        file: str | pathlib.Path | h5py.File | None = None,
+        storage: str | StoragePreset | None = None,
+        sample_rate: float | None = None,
+        channel_counts: Mapping[str, int] | None = None,
+        digital: bool = False,
+        **kwargs: Any,
+    ) -> None:
+        """Creates or opens an HDF5NK file.
+
+        Args:
+            file: Either the file object or the path to the file.
+            storage: A storage preset for the electrical series created in this file, see storage.STORAGE_PRESETS.
+            sample_rate: The sample rate of the recording, used to size the chunks of the storage preset.
+            channel_counts: The number of channels of each series, used to size the chunks of the storage preset.
+            digital: Determines if the electrical series created in this file store int16 digital values.
+            **kwargs: The keyword arguments for HDF5EEG.
+        """
+        if (storage is not None or digital) and kwargs.get("map_", None) is None:
+            kwargs["map_"] = type(self.default_map).from_storage(storage, sample_rate, channel_counts, digital)
+        super().__init__(file=file, **kwargs)
+
+    def share_time_axes(self, source: str = "data_ieeg") -> None:
+        """Replaces the time axes of the electrical series with hard links to the time axis of one series.
+
+        The series of a recording are sampled together, so they can share one time axis dataset instead of storing
+        the same nanostamps once per series. Every <name>_time_axis path and the dimension scale of every series
+        point to the shared dataset, so readers find it as before. Only empty time axes can be shared.
+
+        Args:
+            source: The series whose time axis is shared.
+        """
+        file = as_h5py_file(self)
+        shared = self[source].axes[0]["time_axis"]
+        shared_dataset = as_h5py_dataset(shared)
+        for series, dataset_name in SERIES_DATASET_NAMES.items():
+            if dataset_name not in file:
+                continue
+            series_dataset = self[series]
+            time_axis = series_dataset.axes[0]["time_axis"]
+            if as_h5py_dataset(time_axis) == shared_dataset:
+                continue
+            if time_axis.shape[0] > 0 or shared.shape[0] > 0:
+                raise ValueError("Only empty time axes can be shared.")
+
+            link_name = as_h5py_dataset(time_axis).name
+            series_dataset.detach_axis(time_axis)
+            del file[link_name]
+            file[link_name] = shared_dataset
+            series_dataset.attach_axis(shared, axis=0, scale_name="time_axis")
+            series_dataset.components["timeseries"].time_axis = shared
+
     @classmethod
     def get_version_from_file(cls, file: pathlib.Path | str | h5py.File) -> Version:
         """Return a version from a file.
@@ -0,0 +1,45 @@
+"""layout.py
+The names of the series of HDF5NK files, importable without loading hdf5objects.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from typing import Mapping
+
+# Third-Party Packages #
+
+# Local Packages #
+
+
+# Definitions #
+# Constants #
+SERIES_DATASET_NAMES: Mapping[str, str] = {
+    "data_ieeg": "intracranialEEG",
+    "data_scalpeeg": "scalpEEG",
+    "data_ekg": "EKG",
+    "data_ttl": "DCChannel",
+    "data_emg": "EMG",
+}
+
+
+# Functions #
+def get_dataset_name(series: str) -> str:
+    """Gets the HDF5 dataset name of an HDF5NK series, e.g. "data_ieeg" is stored as "intracranialEEG".
+
+    Args:
+        series: The series name in the HDF5NK map or the dataset name itself.
+
+    Returns:
+        The name of the dataset in the file.
+    """
+    return SERIES_DATASET_NAMES.get(series, series)
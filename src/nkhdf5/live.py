@@ -0,0 +1,342 @@
+"""live.py
+Appends acquired blocks to an HDF5NK file in SWMR mode while readers follow the file as it grows.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from collections.abc import Sequence
+import pathlib
+import time
+from typing import Any
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .hdf5nk import HDF5NK_0_1_0
+from .layout import SERIES_DATASET_NAMES
+from .layout import get_dataset_name
+from .pyramid import PyramidBuilder
+from .quality import QualityBuilder
+from .quality import get_digital_clip_limits
+from .segments import SegmentBuilder
+from .segments import write_segments
+from .scaling import ScaledSeries
+from .scaling import write_scaling
+from .storage import StoragePreset
+from .timestamps import end_nanostamp
+from .timestamps import sample_nanostamps
+
+
+# Definitions #
+# Constants #
+DEFAULT_FLUSH_INTERVAL: float = 1.0
+DEFAULT_POLL_INTERVAL: float = 0.1
+
+
+# Classes #
+class LiveWriter:
+    """Writes an HDF5NK file continuously in SWMR mode so readers can follow it while it is being acquired.
+
+    The file and its layout are created with HDF5NK, then reopened with h5py in SWMR write mode, since SWMR only
+    allows datasets to grow once it has started. Each append extends every series and its time axis by the same
+    number of samples: the series are written before the time axes, so a sample is only committed once its time axis
+    entry is visible and LiveReader never sees a series ahead of the others. The file is flushed at most once per
+    flush interval. The segment tables of the series (see segments.SegmentBuilder) are written when it is closed.
+
+    Attributes:
+        path: The path of the file.
+        series: The series names the file is written with.
+        sample_rate: The sample rate of the recording.
+        flush_interval: The seconds between flushes, 0 to flush after every append.
+        n_samples: The number of samples appended to every series.
+        flushes: The number of times the file was flushed.
+
+    Args:
+        path: The path of the file to create.
+        subject_id: The subject ID of the recording.
+        start: The nanostamp of the first sample.
+        sample_rate: The sample rate of the recording.
+        channel_counts: The number of channels of each series, series which are not given have no channels.
+        channel_labels: The channel labels of each series, as written to the channellabel axes.
+        storage: The storage preset of the electrical series, e.g. "realtime".
+        scaling: The per-channel gain and offset of each series, blocks are then int16 digital values.
+        flush_interval: The seconds between flushes, 0 to flush after every append.
+        shared_time: Determines if every series shares one time axis dataset, written once per append.
+        pyramid_factors: The factors of the min/max/mean pyramid built for each series with channels as it is
+            appended, None to build no pyramid, see pyramid.PyramidBuilder.
+        quality: Determines if the per-block quality statistics of each series with channels are computed as it is
+            appended, see quality.QualityBuilder. Clipping is only detected for digital series.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path | str,
+        subject_id: str,
+        start: int,
+        sample_rate: float,
+        channel_counts: Mapping[str, int],
+        channel_labels: Mapping[str, np.ndarray] | None = None,
+        storage: str | StoragePreset | None = "realtime",
+        scaling: Mapping[str, tuple[np.ndarray, np.ndarray]] | None = None,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        shared_time: bool = True,
+        pyramid_factors: Sequence[int] | None = None,
+        quality: bool = False,
+    ) -> None:
+        self.path: pathlib.Path = pathlib.Path(path)
+        self.series: list[str] = list(SERIES_DATASET_NAMES)
+        self.sample_rate: float = sample_rate
+        self.flush_interval: float = flush_interval
+        self.n_samples: int = 0
+        self.flushes: int = 0
+        self._start: int = start
+        self._start_index: int = 0
+        self._last_flush: float = time.perf_counter()
+
+        channel_counts = {name: channel_counts.get(name, 0) for name in self.series}
+        channel_labels = {} if channel_labels is None else channel_labels
+        with HDF5NK_0_1_0(
+            file=self.path,
+            mode="a",
+            create=True,
+            construct=True,
+            storage=storage,
+            sample_rate=sample_rate,
+            channel_counts=channel_counts,
+            digital=scaling is not None,
+        ) as f_obj:
+            f_obj.attributes["subject_id"] = subject_id
+            f_obj.attributes["start"] = start
+            f_obj.attributes["end"] = start
+            if shared_time:
+                f_obj.share_time_axes()
+            for name in self.series:
+                f_obj[name].attributes["channel_count"] = channel_counts[name]
+                f_obj[name].axes[0]["time_axis"].attrs["sample_rate"] = sample_rate
+                if name in channel_labels and channel_counts[name] > 0:
+                    f_obj[name].axes[1]["channellabel_axis"].append(channel_labels[name])
+                if scaling is not None and name in scaling:
+                    write_scaling(f_obj[name], *scaling[name])
+
+        self._file: h5py.File = h5py.File(self.path, "a", libver="latest")
+        self._datasets: dict[str, h5py.Dataset] = {}
+        self._time_axes: list[h5py.Dataset] = []
+        for name in self.series:
+            dataset = self._file[get_dataset_name(name)]
+            dataset.resize((0, channel_counts[name]))
+            self._datasets[name] = dataset
+            time_axis = self._file[f"{get_dataset_name(name)}_time_axis"]
+            if not any(time_axis == other for other in self._time_axes):
+                self._time_axes.append(time_axis)
+
+        # The side datasets are created before SWMR starts, since it only allows existing datasets to grow.
+        self._builders: dict[str, list[PyramidBuilder | QualityBuilder]] = {}
+        scaling = {} if scaling is None else scaling
+        for name, dataset in self._datasets.items():
+            if channel_counts[name] == 0:
+                continue
+            gain, offset = scaling.get(name, (None, None))
+            builders = self._builders[name] = []
+            if pyramid_factors is not None:
+                builders.append(PyramidBuilder(dataset, pyramid_factors, gain, offset))
+            if quality:
+                clip_limits = None if gain is None else get_digital_clip_limits(gain, offset)
+                builders.append(QualityBuilder(dataset, sample_rate, clip_limits=clip_limits, gain=gain, offset=offset))
+        self._segments: SegmentBuilder = SegmentBuilder(sample_rate)
+        for dataset in self._datasets.values():
+            write_segments(dataset, self._segments.table)
+        self._file.swmr_mode = True
+
+    def __enter__(self) -> "LiveWriter":
+        """Returns the writer for use as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Flushes and closes the file."""
+        self.close()
+
+    @property
+    def is_open(self) -> bool:
+        """Determines if the file is open for appending."""
+        return self._file is not None
+
+    def append(self, blocks: Mapping[str, np.ndarray], start: int | None = None) -> None:
+        """Appends a block of samples to every series.
+
+        Args:
+            blocks: The (sample, channel) block of each series which has channels, all of the same length.
+            start: The nanostamp of the first sample of the blocks, given after a gap in the acquisition. Defaults to
+                one sample period after the last sample.
+        """
+        lengths = {block.shape[0] for block in blocks.values()}
+        if len(lengths) != 1:
+            raise ValueError("Every series must be appended the same number of samples.")
+        length = lengths.pop()
+        missing = [name for name, dataset in self._datasets.items() if dataset.shape[1] > 0 and name not in blocks]
+        if missing:
+            raise ValueError(f"The blocks are missing the series {', '.join(missing)}.")
+
+        if start is not None:
+            self._start, self._start_index = start, self.n_samples
+        stop = self.n_samples + length
+        nanostamps = sample_nanostamps(
+            self._start, self.sample_rate, self.n_samples - self._start_index, stop - self._start_index
+        )
+
+        for name, block in blocks.items():
+            dataset = self._datasets[name]
+            dataset.resize((stop, dataset.shape[1]))
+            dataset[self.n_samples : stop] = block
+            for builder in self._builders.get(name, ()):
+                builder.append(block)
+        for name, dataset in self._datasets.items():
+            if name not in blocks:
+                dataset.resize((stop, dataset.shape[1]))
+        for time_axis in self._time_axes:
+            time_axis.resize((stop,))
+            time_axis[self.n_samples : stop] = nanostamps
+        self._segments.append(nanostamps)
+        self.n_samples = stop
+
+        if time.perf_counter() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Flushes the appended samples so readers can see them."""
+        self._file.flush()
+        self.flushes += 1
+        self._last_flush = time.perf_counter()
+
+    def close(self) -> None:
+        """Writes the segment tables, the last pyramid bins and quality blocks and the end of the recording, then
+        closes the file.
+        """
+        if self._file is None:
+            return
+        for dataset in self._datasets.values():
+            write_segments(dataset, self._segments.table)
+        for builders in self._builders.values():
+            for builder in builders:
+                builder.finish()
+        if self.n_samples > 0:
+            # SWMR cannot create attributes, but the existing end attribute can be overwritten in place.
+            end = end_nanostamp(self._time_axes[0][self.n_samples - 1], self.sample_rate)
+            self._file.attrs.modify("end", np.int64(end))
+        self.flush()
+        self._file.close()
+        self._file = None
+
+
+class LiveReader:
+    """Follows an HDF5NK file written by LiveWriter, reading the samples committed since the last read.
+
+    Attributes:
+        path: The path of the file.
+        series: The series names which are read.
+        position: The number of samples already read from every series.
+
+    Args:
+        path: The path of the file.
+        series: The series names to read.
+        position: The sample to start reading from.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path | str,
+        series: Iterable[str] = ("data_ieeg",),
+        position: int = 0,
+    ) -> None:
+        self.path: pathlib.Path = pathlib.Path(path)
+        self.series: list[str] = list(series)
+        self.position: int = position
+        self._file: h5py.File = h5py.File(self.path, "r", libver="latest", swmr=True)
+        self._datasets: list[h5py.Dataset] = []
+        self._series: dict[str, ScaledSeries] = {}
+        self._time_axes: dict[str, h5py.Dataset] = {}
+        for name, dataset_name in SERIES_DATASET_NAMES.items():
+            if dataset_name not in self._file:
+                continue
+            time_axis = self._file[f"{dataset_name}_time_axis"]
+            self._time_axes[name] = time_axis
+            self._datasets.append(time_axis)
+            if name in self.series:
+                self._series[name] = ScaledSeries(self._file[dataset_name])
+                self._datasets.append(self._series[name].dataset)
+
+    def __enter__(self) -> "LiveReader":
+        """Returns the reader for use as a context manager."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Closes the file."""
+        self.close()
+
+    def close(self) -> None:
+        """Closes the file."""
+        self._file.close()
+
+    def get_committed(self) -> int:
+        """Refreshes the file and gets the number of samples committed to every series and time axis.
+
+        Returns:
+            The number of committed samples.
+        """
+        for dataset in self._datasets:
+            dataset.refresh()
+        return min(dataset.shape[0] for dataset in self._datasets)
+
+    def read_new(self) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+        """Reads the samples committed since the last read.
+
+        Returns:
+            The (sample, channel) data and nanostamps of each series, empty if no samples were committed.
+        """
+        committed = self.get_committed()
+        if committed <= self.position:
+            return {}
+        samples = np.s_[self.position : committed]
+        nanostamps = self._time_axes[self.series[0]][samples]
+        blocks = {name: (series[samples], nanostamps) for name, series in self._series.items()}
+        self.position = committed
+        return blocks
+
+    def tail(
+        self,
+        timeout: float | None = None,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ) -> Iterator[dict[str, tuple[np.ndarray, np.ndarray]]]:
+        """Yields new samples as they are committed.
+
+        Args:
+            timeout: The seconds without new samples after which to stop, None to follow the file forever.
+            poll_interval: The seconds to wait between checks for new samples.
+
+        Yields:
+            The (sample, channel) data and nanostamps of each series committed since the last yield.
+        """
+        last_data = time.perf_counter()
+        while True:
+            blocks = self.read_new()
+            if blocks:
+                last_data = time.perf_counter()
+                yield blocks
+            elif timeout is not None and time.perf_counter() - last_data >= timeout:
+                return
+            else:
+                time.sleep(poll_interval)
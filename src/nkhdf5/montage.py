@@ -0,0 +1,162 @@
+"""montage.py
+Classifies Nihon Kohden channel names into channel types and parses their labels.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+import re
+from typing import Mapping
+
+# Third-Party Packages #
+import numpy as np
+
+# Local Packages #
+
+
+# Definitions #
+# Constants #
+IEEG_TYPE: str = "intracranial EEG"
+TTL_TYPE: str = "TTL"
+EKG_TYPE: str = "EKG"
+EMG_TYPE: str = "EMG"
+SCALP_TYPE: str = "scalp EEG"
+
+CHANNEL_TYPES: tuple[str, ...] = (IEEG_TYPE, SCALP_TYPE, EKG_TYPE, TTL_TYPE, EMG_TYPE)
+DEFAULT_MAX_MONTAGES: int = 64
+
+_LABEL_PATTERN = re.compile("[A-Za-z]+")
+
+
+# Classes #
+@dataclass(frozen=True)
+class MontageClassification:
+    """The channel types and labels of one list of channel names.
+
+    Attributes:
+        chantypes: The channel type of each channel.
+        indices: The channel indices of each channel type, in channel order.
+        labels: The parsed (name, number) label of each channel.
+    """
+
+    chantypes: tuple[str, ...]
+    indices: Mapping[str, np.ndarray]
+    labels: tuple[tuple[str, ...], ...]
+
+
+class ChannelMontage:
+    """A reusable classifier which assigns channel types from channel name substrings.
+
+    A channel whose name contains one of the prefixes of a type is assigned that type. When prefixes of several
+    types match, EMG takes precedence over EKG, then TTL, then intracranial EEG. Channels which match no prefix are
+    scalp EEG. Classifications are cached per list of channel names, so recordings which share a montage are only
+    classified once. The cache keeps the most recently used montages, up to max_montages of them.
+
+    Attributes:
+        type_patterns: The compiled substring pattern of each type, in order of precedence.
+        max_montages: The maximum number of cached classifications.
+
+    Args:
+        ieeg: The name prefixes of intracranial EEG channels.
+        dc: The name prefixes of DC (TTL) channels.
+        ekg: The name prefixes of EKG channels.
+        emg: The name prefixes of EMG channels.
+        max_montages: The maximum number of cached classifications.
+    """
+
+    def __init__(
+        self,
+        ieeg: Iterable[str],
+        dc: Iterable[str],
+        ekg: Iterable[str],
+        emg: Iterable[str],
+        max_montages: int = DEFAULT_MAX_MONTAGES,
+    ) -> None:
+        self.type_patterns: tuple[tuple[str, re.Pattern], ...] = tuple(
+            (chantype, re.compile("|".join(re.escape(p) for p in prefixes)))
+            for chantype, prefixes in ((EMG_TYPE, emg), (EKG_TYPE, ekg), (TTL_TYPE, dc), (IEEG_TYPE, ieeg))
+            if prefixes
+        )
+        self.max_montages: int = max_montages
+        self._cache: OrderedDict[tuple[str, ...], MontageClassification] = OrderedDict()
+
+    def get_chantype(self, name: str) -> str:
+        """Returns the channel type of a single channel name.
+
+        Args:
+            name: The cleaned channel name.
+
+        Returns:
+            The channel type.
+        """
+        for chantype, pattern in self.type_patterns:
+            if pattern.search(name) is not None:
+                return chantype
+        return SCALP_TYPE
+
+    def classify(self, names: Iterable[str]) -> MontageClassification:
+        """Classifies a list of channel names, reusing the result for a previously seen list.
+
+        Args:
+            names: The cleaned channel names.
+
+        Returns:
+            The channel types, per-type indices and labels of the channels.
+        """
+        key = tuple(names)
+        classification = self._cache.get(key, None)
+        if classification is not None:
+            self._cache.move_to_end(key)
+            return classification
+
+        self._cache[key] = classification = self._classify(key)
+        while len(self._cache) > self.max_montages:
+            self._cache.popitem(last=False)
+        return classification
+
+    def _classify(self, names: tuple[str, ...]) -> MontageClassification:
+        """Classifies a list of channel names.
+
+        Args:
+            names: The cleaned channel names.
+
+        Returns:
+            The channel types, per-type indices and labels of the channels.
+        """
+        chantypes = tuple(self.get_chantype(name) for name in names)
+        chantype_array = np.array(chantypes, dtype=object)
+        indices = {}
+        for chantype in CHANNEL_TYPES:
+            indices[chantype] = index = np.flatnonzero(chantype_array == chantype)
+            index.flags.writeable = False
+
+        return MontageClassification(
+            chantypes=chantypes,
+            indices=indices,
+            labels=tuple(parse_channel_label(name) for name in names),
+        )
+
+
+# Functions #
+def parse_channel_label(name: str) -> tuple[str, ...]:
+    """Splits a channel name into its letter and number parts, e.g. "LA10" into ("LA", "10").
+
+    Args:
+        name: The cleaned channel name.
+
+    Returns:
+        The parts of the channel label.
+    """
+    return tuple(_LABEL_PATTERN.sub(lambda ele: ele[0] + " ", name).split(" "))
@@ -0,0 +1,326 @@
+"""pyramid.py
+Multi-resolution min/max/mean summaries of electrical series for fast overview reads.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .layout import get_dataset_name
+from .scaling import ScaledSeries
+from .timeaxis import as_h5py_dataset
+from .timeaxis import get_time_axis
+
+
+# Definitions #
+# Constants #
+DEFAULT_FACTORS: tuple[int, ...] = (10, 100, 1000)
+PYRAMID_FACTORS: str = "pyramid_factors"
+PYRAMID_SUFFIX: str = "_pyramid_"
+PYRAMID_DTYPE = np.dtype(np.float32)
+STATISTICS: tuple[str, ...] = ("min", "max", "mean")
+DEFAULT_BLOCK_SIZE: int = 2**16
+
+
+# Classes #
+@dataclass
+class Overview:
+    """A summary of a window of a series at one resolution.
+
+    Attributes:
+        factor: The number of samples summarized by each point, 1 for the samples themselves.
+        nanostamps: The nanostamp of the first sample of each point.
+        min: The (point, channel) minimum of the samples of each point.
+        max: The (point, channel) maximum of the samples of each point.
+        mean: The (point, channel) mean of the samples of each point.
+    """
+
+    factor: int
+    nanostamps: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    mean: np.ndarray
+
+
+class _Bins:
+    """The running min, max, sum and count of a run of consecutive bins of one level."""
+
+    def __init__(self, minimum: np.ndarray, maximum: np.ndarray, total: np.ndarray, count: np.ndarray) -> None:
+        self.min: np.ndarray = minimum
+        self.max: np.ndarray = maximum
+        self.sum: np.ndarray = total
+        self.count: np.ndarray = count
+
+    def __len__(self) -> int:
+        return self.count.shape[0]
+
+    @classmethod
+    def empty(cls, n_channels: int) -> "_Bins":
+        shape = (0, n_channels)
+        return cls(np.empty(shape), np.empty(shape), np.empty(shape), np.empty((0,), dtype=np.int64))
+
+    def concatenate(self, other: "_Bins") -> "_Bins":
+        return _Bins(
+            np.concatenate([self.min, other.min]),
+            np.concatenate([self.max, other.max]),
+            np.concatenate([self.sum, other.sum]),
+            np.concatenate([self.count, other.count]),
+        )
+
+    def split(self, n: int) -> tuple["_Bins", "_Bins"]:
+        head = _Bins(self.min[:n], self.max[:n], self.sum[:n], self.count[:n])
+        tail = _Bins(self.min[n:], self.max[n:], self.sum[n:], self.count[n:])
+        return head, tail
+
+    def reduce(self, ratio: int) -> "_Bins":
+        """Merges every ratio consecutive bins into one, the last group may be shorter."""
+        return _Bins(
+            _reduce_groups(np.minimum, self.min, ratio),
+            _reduce_groups(np.maximum, self.max, ratio),
+            _reduce_groups(np.add, self.sum, ratio),
+            _reduce_groups(np.add, self.count, ratio),
+        )
+
+
+class PyramidBuilder:
+    """Builds the pyramid levels of an electrical series incrementally as blocks of samples are appended.
+
+    The first level summarizes the samples and each coarser level summarizes the bins of the level below it, so
+    every sample is reduced once. Only complete bins are written while appending, the samples and bins of incomplete
+    bins are carried to the next append and written as partial bins by finish.
+
+    Attributes:
+        dataset: The h5py dataset of the series.
+        factors: The number of samples summarized by a bin of each level, each a multiple of the previous one.
+        levels: The dataset of each level, (bin, statistic, channel) with the statistics min, max and mean.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+        factors: The number of samples summarized by a bin of each level.
+        gain: The per-channel gain applied to appended digital values, None if they are physical values.
+        offset: The per-channel offset applied to appended digital values.
+        n_channels: The number of channels of the series, defaults to its current width, which is zero for a
+            series which was not appended to yet.
+    """
+
+    def __init__(
+        self,
+        series: Any,
+        factors: Sequence[int] = DEFAULT_FACTORS,
+        gain: np.ndarray | None = None,
+        offset: np.ndarray | None = None,
+        n_channels: int | None = None,
+    ) -> None:
+        self.dataset: h5py.Dataset = as_h5py_dataset(series)
+        self.factors: tuple[int, ...] = tuple(int(factor) for factor in factors)
+        if any(coarse % fine for fine, coarse in zip(self.factors, self.factors[1:])):
+            raise ValueError("Each pyramid factor must be a multiple of the previous one.")
+        self.gain: np.ndarray | None = gain
+        self.offset: np.ndarray | None = offset
+
+        n_channels = self.dataset.shape[1] if n_channels is None else n_channels
+        if n_channels < 1:
+            raise ValueError("A pyramid needs a series with at least one channel.")
+        self.levels: list[h5py.Dataset] = [
+            self.dataset.file.require_dataset(
+                get_level_name(self.dataset.name, factor),
+                shape=(0, len(STATISTICS), n_channels),
+                maxshape=(None, len(STATISTICS), n_channels),
+                chunks=(1024, len(STATISTICS), n_channels),
+                dtype=PYRAMID_DTYPE,
+            )
+            for factor in self.factors
+        ]
+        self.dataset.attrs[PYRAMID_FACTORS] = np.asarray(self.factors, dtype=np.int64)
+        self._samples: np.ndarray = np.empty((0, n_channels))
+        self._carries: list[_Bins] = [_Bins.empty(n_channels) for _ in self.factors]
+
+    def append(self, data: np.ndarray) -> None:
+        """Summarizes a block of samples appended to the series.
+
+        Args:
+            data: The (sample, channel) block.
+        """
+        if self.gain is not None:
+            data = data * self.gain + self.offset
+        samples = np.concatenate([self._samples, data]) if len(self._samples) else np.asarray(data, dtype=np.float64)
+        n_complete = len(samples) // self.factors[0] * self.factors[0]
+        self._samples = samples[n_complete:]
+        if n_complete > 0:
+            self._push(0, _reduce_samples(samples[:n_complete], self.factors[0]))
+
+    def finish(self) -> None:
+        """Writes the incomplete bins left at the end of the series."""
+        if len(self._samples) > 0:
+            self._push(0, _reduce_samples(self._samples, self.factors[0]), final=True)
+            self._samples = self._samples[:0]
+        elif any(len(carry) for carry in self._carries):
+            self._push(0, _Bins.empty(self._samples.shape[1]), final=True)
+
+    def _push(self, level: int, bins: _Bins, final: bool = False) -> None:
+        """Writes bins to a level and carries them into the next level."""
+        if len(bins) > 0:
+            _write_bins(self.levels[level], bins)
+        if level + 1 == len(self.factors):
+            return
+
+        ratio = self.factors[level + 1] // self.factors[level]
+        pending = self._carries[level + 1].concatenate(bins)
+        n_complete = len(pending) if final else len(pending) // ratio * ratio
+        complete, self._carries[level + 1] = pending.split(n_complete)
+        if n_complete > 0 or final:
+            self._push(level + 1, complete.reduce(ratio) if n_complete else complete, final)
+
+
+# Functions #
+def get_level_name(series_name: str, factor: int) -> str:
+    """Gets the name of the dataset of a pyramid level.
+
+    Args:
+        series_name: The name of the series dataset, e.g. "intracranialEEG".
+        factor: The number of samples summarized by a bin of the level.
+
+    Returns:
+        The name of the level dataset.
+    """
+    return f"{series_name}{PYRAMID_SUFFIX}{factor}"
+
+
+def get_pyramid_factors(series: Any) -> tuple[int, ...]:
+    """Gets the factors of the pyramid levels of a series.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+
+    Returns:
+        The factor of each level, empty if the series has no pyramid.
+    """
+    factors = as_h5py_dataset(series).attrs.get(PYRAMID_FACTORS, None)
+    return () if factors is None else tuple(int(factor) for factor in np.atleast_1d(factors))
+
+
+def build_pyramid(
+    file: h5py.File,
+    series: str = "data_ieeg",
+    factors: Sequence[int] = DEFAULT_FACTORS,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> None:
+    """Builds the pyramid of a series of an existing file, reading its samples once in blocks.
+
+    Args:
+        file: The file, open for writing.
+        series: The series name, e.g. "data_ieeg".
+        factors: The number of samples summarized by a bin of each level.
+        block_size: The number of samples read at a time.
+    """
+    dataset = file[get_dataset_name(series)]
+    for factor in get_pyramid_factors(dataset):
+        level_name = get_level_name(dataset.name, factor)
+        if level_name in file:
+            del file[level_name]
+
+    scaled = ScaledSeries(dataset)
+    builder = PyramidBuilder(dataset, factors)
+    for start in range(0, len(scaled), block_size):
+        builder.append(scaled[start : start + block_size])
+    builder.finish()
+
+
+def read_overview(
+    file: h5py.File,
+    start: int,
+    stop: int,
+    max_points: int,
+    series: str = "data_ieeg",
+    channels: slice | Sequence[int] = slice(None),
+) -> Overview:
+    """Reads a [start, stop) nanostamp window of a series at the finest resolution within a point budget.
+
+    The samples themselves are read if they fit in the budget, otherwise the finest pyramid level whose bins in the
+    window fit, or the coarsest level if none fit.
+
+    Args:
+        file: The open file.
+        start: The first nanostamp of the window.
+        stop: The nanostamp after the end of the window.
+        max_points: The largest number of points per channel to return.
+        series: The series name, e.g. "data_ieeg".
+        channels: The channels to read.
+
+    Returns:
+        The summary of the window.
+    """
+    dataset = file[get_dataset_name(series)]
+    time_axis = get_time_axis(dataset)
+    index_start = time_axis.searchsorted(start, side="left")
+    index_stop = time_axis.searchsorted(stop, side="left")
+    channels = channels if isinstance(channels, slice) else np.asarray(channels, dtype=np.intp)
+
+    n_samples = index_stop - index_start
+    factors = get_pyramid_factors(dataset)
+    if n_samples <= max_points or not factors:
+        data = ScaledSeries(dataset)[index_start:index_stop]
+        data = data[:, channels]
+        return Overview(1, time_axis[index_start:index_stop], data, data, data)
+
+    factor = next((f for f in factors if -(-n_samples // f) <= max_points), factors[-1])
+    bin_start = index_start // factor
+    bin_stop = -(-index_stop // factor)
+    level = file[get_level_name(dataset.name, factor)][bin_start:bin_stop]
+    level = level[:, :, channels]
+    nanostamps = time_axis[np.arange(bin_start, bin_stop) * factor]
+    return Overview(factor, nanostamps, level[:, 0], level[:, 1], level[:, 2])
+
+
+def _reduce_samples(samples: np.ndarray, factor: int) -> _Bins:
+    """Summarizes samples in bins of factor samples, the last bin may be shorter."""
+    counts = np.full(-(-len(samples) // factor), factor, dtype=np.int64)
+    counts[-1] = len(samples) - factor * (len(counts) - 1)
+    return _Bins(
+        _reduce_groups(np.minimum, samples, factor),
+        _reduce_groups(np.maximum, samples, factor),
+        _reduce_groups(np.add, samples, factor, dtype=np.float64),
+        counts,
+    )
+
+
+def _reduce_groups(ufunc: np.ufunc, array: np.ndarray, size: int, dtype: Any = None) -> np.ndarray:
+    """Reduces every size consecutive rows of an array into one, the last group may be shorter.
+
+    The complete groups are reduced along a reshaped axis, which is much faster than ufunc.reduceat.
+    """
+    n_complete = len(array) // size * size
+    groups = array[:n_complete].reshape((-1, size) + array.shape[1:])
+    reduced = ufunc.reduce(groups, axis=1, dtype=dtype)
+    if n_complete < len(array):
+        tail = ufunc.reduce(array[n_complete:], axis=0, dtype=dtype, keepdims=True)
+        reduced = np.concatenate([reduced, tail])
+    return reduced
+
+
+def _write_bins(level: h5py.Dataset, bins: _Bins) -> None:
+    """Appends bins to a level dataset."""
+    block = np.empty((len(bins), len(STATISTICS), level.shape[2]), dtype=PYRAMID_DTYPE)
+    block[:, 0] = bins.min
+    block[:, 1] = bins.max
+    block[:, 2] = bins.sum / bins.count[:, None]
+    n_bins = level.shape[0]
+    level.resize((n_bins + len(bins),) + level.shape[1:])
+    level[n_bins:] = block
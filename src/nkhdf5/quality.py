@@ -0,0 +1,358 @@
+"""quality.py
+Per-channel summary statistics and quality metrics of electrical series, computed as the series are written.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from dataclasses import dataclass
+from typing import Any
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .layout import get_dataset_name
+from .scaling import DIGITAL_DTYPE
+from .scaling import get_scaling
+from .scaling import is_digital
+from .timeaxis import as_h5py_dataset
+from .timeaxis import get_time_axis
+
+
+# Definitions #
+# Constants #
+DEFAULT_BLOCK_DURATION: float = 10.0
+DEFAULT_LINE_FREQUENCY: float = 60.0
+DEFAULT_READ_BLOCK_SIZE: int = 2**16
+QUALITY_SUFFIX: str = "_quality"
+QUALITY_DTYPE = np.dtype(np.float32)
+STATISTICS: tuple[str, ...] = ("mean", "variance", "min", "max", "line_noise", "clipped", "flat")
+CLIP_TOLERANCE: float = 1e-6
+
+
+# Classes #
+@dataclass
+class BlockStatistics:
+    """The per-channel statistics of consecutive blocks of a series.
+
+    Attributes:
+        block_size: The number of samples of a block, the last block may be shorter.
+        nanostamps: The nanostamp of the first sample of each block.
+        counts: The number of samples of each block.
+        mean: The (block, channel) mean.
+        variance: The (block, channel) variance.
+        min: The (block, channel) minimum.
+        max: The (block, channel) maximum.
+        line_noise: The (block, channel) power of the line frequency component, NaN if it is above Nyquist.
+        clipped: The (block, channel) fraction of samples at the limits of the recording range, NaN if the range is
+            not known.
+        flat: The (block, channel) fraction of samples equal to the sample before them.
+    """
+
+    block_size: int
+    nanostamps: np.ndarray
+    counts: np.ndarray
+    mean: np.ndarray
+    variance: np.ndarray
+    min: np.ndarray
+    max: np.ndarray
+    line_noise: np.ndarray
+    clipped: np.ndarray
+    flat: np.ndarray
+
+    def __len__(self) -> int:
+        """The number of blocks."""
+        return self.counts.shape[0]
+
+    @property
+    def rms(self) -> np.ndarray:
+        """The (block, channel) root mean square."""
+        return np.sqrt(self.variance + np.square(self.mean, dtype=np.float64))
+
+    def combine(self) -> "BlockStatistics":
+        """Pools the blocks into a single block which spans all of them.
+
+        Returns:
+            The statistics of the whole span, with one block.
+        """
+        n_samples = self.counts.sum()
+        weights = (self.counts / n_samples)[:, None]
+        mean = (weights * self.mean).sum(axis=0, keepdims=True)
+        power = (weights * (self.variance + np.square(self.mean, dtype=np.float64))).sum(axis=0, keepdims=True)
+        return BlockStatistics(
+            int(n_samples),
+            self.nanostamps[:1],
+            np.array([n_samples]),
+            mean,
+            np.maximum(power - mean**2, 0.0),
+            self.min.min(axis=0, keepdims=True),
+            self.max.max(axis=0, keepdims=True),
+            (weights * self.line_noise).sum(axis=0, keepdims=True),
+            (weights * self.clipped).sum(axis=0, keepdims=True),
+            (weights * self.flat).sum(axis=0, keepdims=True),
+        )
+
+
+class QualityBuilder:
+    """Computes the statistics of fixed-size blocks of an electrical series as blocks of samples are appended.
+
+    The statistics are stored in a (block, statistic, channel) side dataset named <series>_quality, a few values
+    per channel for every block of samples, so quality checks can read them instead of the samples. Samples are
+    carried between appends until a block is complete, and the last, shorter block is written by finish.
+
+    Attributes:
+        dataset: The h5py dataset of the series.
+        quality: The side dataset of the statistics.
+        sample_rate: The sample rate of the series.
+        block_size: The number of samples summarized by each block.
+        line_frequency: The frequency of the power line noise.
+        clip_limits: The per-channel lowest and highest physical value of the recording range, None if not known.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+        sample_rate: The sample rate of the series.
+        block_size: The number of samples summarized by each block, defaults to DEFAULT_BLOCK_DURATION seconds.
+        line_frequency: The frequency of the power line noise, e.g. 50 or 60 Hz.
+        clip_limits: The per-channel lowest and highest physical value of the recording range.
+        gain: The per-channel gain applied to appended digital values, None if they are physical values.
+        offset: The per-channel offset applied to appended digital values.
+        n_channels: The number of channels of the series, defaults to its current width.
+    """
+
+    def __init__(
+        self,
+        series: Any,
+        sample_rate: float,
+        block_size: int | None = None,
+        line_frequency: float = DEFAULT_LINE_FREQUENCY,
+        clip_limits: tuple[np.ndarray, np.ndarray] | None = None,
+        gain: np.ndarray | None = None,
+        offset: np.ndarray | None = None,
+        n_channels: int | None = None,
+    ) -> None:
+        self.dataset: h5py.Dataset = as_h5py_dataset(series)
+        self.sample_rate: float = float(sample_rate)
+        self.block_size: int = max(round(sample_rate * DEFAULT_BLOCK_DURATION), 1) if block_size is None else block_size
+        self.line_frequency: float = line_frequency
+        self.clip_limits: tuple[np.ndarray, np.ndarray] | None = clip_limits
+        self.gain: np.ndarray | None = gain
+        self.offset: np.ndarray | None = offset
+
+        n_channels = self.dataset.shape[1] if n_channels is None else n_channels
+        if n_channels < 1:
+            raise ValueError("Quality statistics need a series with at least one channel.")
+        self.quality: h5py.Dataset = self.dataset.file.require_dataset(
+            get_quality_name(self.dataset.name),
+            shape=(0, len(STATISTICS), n_channels),
+            maxshape=(None, len(STATISTICS), n_channels),
+            chunks=(64, len(STATISTICS), n_channels),
+            dtype=QUALITY_DTYPE,
+        )
+        self.quality.attrs["block_size"] = self.block_size
+        self.quality.attrs["line_frequency"] = self.line_frequency
+        self.quality.attrs["statistics"] = list(STATISTICS)
+        self._samples: np.ndarray = np.empty((0, n_channels))
+        self._flat: np.ndarray = np.empty((0, n_channels), dtype=bool)
+        self._last: np.ndarray | None = None
+
+    def append(self, data: np.ndarray) -> None:
+        """Summarizes a block of samples appended to the series.
+
+        Args:
+            data: The (sample, channel) block.
+        """
+        if len(data) == 0:
+            return
+        # Flat samples are found on the values as written, where a repeated value is exactly equal.
+        flat = np.empty(data.shape, dtype=bool)
+        np.equal(data[1:], data[:-1], out=flat[1:])
+        flat[0] = False if self._last is None else data[0] == self._last
+        self._last = np.array(data[-1])
+
+        if self.gain is not None:
+            data = data * self.gain + self.offset
+        if len(self._samples):
+            samples, flat = np.concatenate([self._samples, data]), np.concatenate([self._flat, flat])
+        else:
+            samples = np.asarray(data, dtype=np.float64)
+        n_complete = len(samples) // self.block_size * self.block_size
+        self._samples, self._flat = samples[n_complete:], flat[n_complete:]
+        if n_complete > 0:
+            shape = (-1, self.block_size, samples.shape[1])
+            self._write(samples[:n_complete].reshape(shape), flat[:n_complete].reshape(shape))
+
+    def finish(self) -> None:
+        """Writes the statistics of the incomplete block left at the end of the series."""
+        if len(self._samples) > 0:
+            self._write(self._samples[None], self._flat[None])
+            self._samples, self._flat = self._samples[:0], self._flat[:0]
+
+    def _write(self, blocks: np.ndarray, flat: np.ndarray) -> None:
+        """Appends the statistics of (block, sample, channel) samples to the side dataset."""
+        n_samples = blocks.shape[1]
+        statistics = np.empty((blocks.shape[0], len(STATISTICS), blocks.shape[2]), dtype=QUALITY_DTYPE)
+        mean = blocks.sum(axis=1) / n_samples
+        minimum, maximum = blocks.min(axis=1), blocks.max(axis=1)
+        statistics[:, 0] = mean
+        statistics[:, 1] = np.maximum(np.einsum("bsc,bsc->bc", blocks, blocks) / n_samples - mean**2, 0.0)
+        statistics[:, 2] = minimum
+        statistics[:, 3] = maximum
+        statistics[:, 4] = line_noise_power(blocks, self.sample_rate, self.line_frequency, mean)
+        statistics[:, 5] = np.nan if self.clip_limits is None else 0.0
+        if self.clip_limits is not None:
+            # Only the channels of blocks whose extremes reach the limits are counted.
+            low, high = np.broadcast_arrays(*self.clip_limits, mean)[:2]
+            tolerance = (high - low) * CLIP_TOLERANCE
+            low, high = low + tolerance, high - tolerance
+            for block, channel in zip(*np.nonzero((minimum <= low) | (maximum >= high))):
+                samples = blocks[block, :, channel]
+                clipped = np.count_nonzero(samples <= low[block, channel]) + np.count_nonzero(
+                    samples >= high[block, channel]
+                )
+                statistics[block, 5, channel] = clipped / n_samples
+        statistics[:, 6] = np.count_nonzero(flat, axis=1) / n_samples
+
+        n_blocks = self.quality.shape[0]
+        self.quality.resize((n_blocks + len(statistics),) + self.quality.shape[1:])
+        self.quality[n_blocks:] = statistics
+
+
+# Functions #
+def get_quality_name(series_name: str) -> str:
+    """Gets the name of the quality statistics dataset of a series.
+
+    Args:
+        series_name: The name of the series dataset, e.g. "intracranialEEG".
+
+    Returns:
+        The name of the statistics dataset.
+    """
+    return f"{series_name}{QUALITY_SUFFIX}"
+
+
+def line_noise_power(
+    blocks: np.ndarray,
+    sample_rate: float,
+    line_frequency: float,
+    mean: np.ndarray | None = None,
+) -> np.ndarray:
+    """Computes the power of the line frequency component of each channel of blocks of samples.
+
+    The single DFT coefficient at the line frequency is projected directly instead of taking a whole spectrum, and
+    the mean is subtracted from the projection rather than from the samples, so the cost is two matrix products per
+    block.
+
+    Args:
+        blocks: The (block, sample, channel) samples.
+        sample_rate: The sample rate of the samples.
+        line_frequency: The frequency of the power line noise.
+        mean: The (block, channel) mean of the samples, computed if not given.
+
+    Returns:
+        The (block, channel) power of the component, NaN if the line frequency is not below Nyquist.
+    """
+    n_samples = blocks.shape[1]
+    if not 0 < line_frequency < sample_rate / 2:
+        return np.full((blocks.shape[0], blocks.shape[2]), np.nan)
+    if mean is None:
+        mean = blocks.mean(axis=1)
+    phase = 2 * np.pi * line_frequency / sample_rate * np.arange(n_samples)
+    cosine, sine = np.cos(phase), np.sin(phase)
+    real = cosine @ blocks - cosine.sum() * mean
+    imaginary = sine @ blocks - sine.sum() * mean
+    return 2 * (real**2 + imaginary**2) / n_samples**2
+
+
+def get_digital_clip_limits(gain: np.ndarray, offset: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Gets the physical values of the lowest and highest int16 digital values of each channel.
+
+    Args:
+        gain: The physical value of one digital step of each channel.
+        offset: The physical value of digital zero of each channel.
+
+    Returns:
+        The lowest and highest physical value of each channel.
+    """
+    info = np.iinfo(DIGITAL_DTYPE)
+    return info.min * gain + offset, info.max * gain + offset
+
+
+def build_quality(
+    file: h5py.File,
+    series: str = "data_ieeg",
+    block_size: int | None = None,
+    line_frequency: float = DEFAULT_LINE_FREQUENCY,
+    read_block_size: int = DEFAULT_READ_BLOCK_SIZE,
+) -> None:
+    """Computes the quality statistics of a series of an existing file, reading its samples once in blocks.
+
+    The clipping fraction is only known for digital series, whose recording range is the int16 range.
+
+    Args:
+        file: The file, open for writing.
+        series: The series name, e.g. "data_ieeg".
+        block_size: The number of samples summarized by each block, defaults to DEFAULT_BLOCK_DURATION seconds.
+        line_frequency: The frequency of the power line noise.
+        read_block_size: The number of samples read at a time.
+    """
+    dataset = file[get_dataset_name(series)]
+    quality_name = get_quality_name(dataset.name)
+    if quality_name in file:
+        del file[quality_name]
+
+    gain, offset, clip_limits = None, None, None
+    if is_digital(dataset):
+        gain, offset = get_scaling(dataset)
+        clip_limits = get_digital_clip_limits(gain, offset)
+    sample_rate = get_time_axis(dataset).sample_rate
+    builder = QualityBuilder(dataset, sample_rate, block_size, line_frequency, clip_limits, gain, offset)
+    for start in range(0, dataset.shape[0], read_block_size):
+        builder.append(dataset[start : start + read_block_size])
+    builder.finish()
+
+
+def read_quality(
+    file: h5py.File,
+    series: str = "data_ieeg",
+    start: int | None = None,
+    stop: int | None = None,
+    channels: slice | Any = slice(None),
+) -> BlockStatistics:
+    """Reads the quality statistics of the blocks of a series which overlap a [start, stop) nanostamp window.
+
+    Args:
+        file: The open file.
+        series: The series name, e.g. "data_ieeg".
+        start: The first nanostamp of the window, None for the start of the series.
+        stop: The nanostamp after the end of the window, None for the end of the series.
+        channels: The channels to read.
+
+    Returns:
+        The statistics of the blocks, call combine on them for the whole window.
+    """
+    dataset = file[get_dataset_name(series)]
+    quality = file[get_quality_name(dataset.name)]
+    block_size = int(quality.attrs["block_size"])
+    time_axis = get_time_axis(dataset)
+
+    index_start = 0 if start is None else time_axis.searchsorted(start, side="left")
+    index_stop = dataset.shape[0] if stop is None else time_axis.searchsorted(stop, side="left")
+    block_start = index_start // block_size
+    block_stop = min(-(-index_stop // block_size), quality.shape[0])
+    statistics = quality[block_start:block_stop][:, :, channels]
+
+    first_samples = np.arange(block_start, block_stop) * block_size
+    counts = np.minimum(block_size, dataset.shape[0] - first_samples)
+    nanostamps = time_axis[first_samples] if len(first_samples) else np.empty((0,), dtype=np.int64)
+    return BlockStatistics(block_size, nanostamps, counts, *(statistics[:, i] for i in range(len(STATISTICS))))
@@ -0,0 +1,209 @@
+"""scaling.py
+Digital (raw ADC) storage of electrical series with per-channel gain and offset.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from typing import Any
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .timeaxis import as_h5py_dataset
+
+
+# Definitions #
+# Constants #
+SAMPLE_FORMAT: str = "sample_format"
+FLOAT_FORMAT: str = "float"
+DIGITAL_FORMAT: str = "digital"
+GAIN_ATTRIBUTE: str = "channel_gain"
+OFFSET_ATTRIBUTE: str = "channel_offset"
+
+DIGITAL_DTYPE = np.dtype(np.int16)
+SCALED_DTYPE = np.dtype(np.float32)
+
+
+# Classes #
+class ScaledSeries:
+    """A read-only view of an electrical series which returns physical values whatever its sample format.
+
+    Digital series are scaled by their per-channel gain and offset as they are read, float series are returned as
+    stored, so consumers can read either kind of file the same way.
+
+    Attributes:
+        dataset: The h5py dataset of the series.
+        gain: The per-channel gain, None if the series is stored as floats.
+        offset: The per-channel offset, None if the series is stored as floats.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+    """
+
+    def __init__(self, series: Any) -> None:
+        self.dataset: h5py.Dataset = as_h5py_dataset(series)
+        self.gain: np.ndarray | None = None
+        self.offset: np.ndarray | None = None
+
+        if is_digital(self.dataset):
+            self.gain, self.offset = get_scaling(self.dataset)
+
+    @property
+    def is_digital(self) -> bool:
+        """Determines if the series is stored as digital values."""
+        return self.gain is not None
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        """The shape of the series."""
+        return self.dataset.shape
+
+    @property
+    def dtype(self) -> np.dtype:
+        """The dtype of the values returned by reads."""
+        return SCALED_DTYPE if self.is_digital else self.dataset.dtype
+
+    def __len__(self) -> int:
+        """The number of samples in the series."""
+        return self.dataset.shape[0]
+
+    def __getitem__(self, key: Any) -> np.ndarray:
+        """Reads samples of the series as physical values.
+
+        Args:
+            key: A (sample, channel) selection, the channel selection must be an integer, slice or index array.
+
+        Returns:
+            The selected physical values.
+        """
+        data = self.dataset[key]
+        if not self.is_digital:
+            return data
+        channels = key[1] if isinstance(key, tuple) and len(key) > 1 else slice(None)
+        return scale(data, self.gain[channels], self.offset[channels])
+
+    def read_direct(self, dest: np.ndarray, source_sel: Any = None, dest_sel: Any = None) -> None:
+        """Reads samples of the series directly into an array as physical values.
+
+        Float series are read without an intermediate copy, digital series are read into a temporary integer array
+        and scaled into the destination.
+
+        Args:
+            dest: The array to write into.
+            source_sel: The selection of samples of the series, all channels are read.
+            dest_sel: The selection of the destination to write into.
+        """
+        if not self.is_digital:
+            self.dataset.read_direct(dest, source_sel, dest_sel)
+        else:
+            source_sel = np.s_[...] if source_sel is None else source_sel
+            dest_sel = np.s_[...] if dest_sel is None else dest_sel
+            scale_into(self.dataset[source_sel], self.gain, self.offset, dest, dest_sel)
+
+
+# Functions #
+def is_digital(series: Any) -> bool:
+    """Checks if an electrical series is stored as digital values.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+
+    Returns:
+        True if the series holds digital values with a per-channel gain and offset.
+    """
+    mode = as_h5py_dataset(series).attrs.get(SAMPLE_FORMAT, FLOAT_FORMAT)
+    return (mode.decode() if isinstance(mode, bytes) else mode) == DIGITAL_FORMAT
+
+
+def get_scaling(series: Any) -> tuple[np.ndarray, np.ndarray]:
+    """Gets the per-channel gain and offset of a digital electrical series.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+
+    Returns:
+        The gain and offset of each channel.
+    """
+    attrs = as_h5py_dataset(series).attrs
+    return np.asarray(attrs[GAIN_ATTRIBUTE], dtype=np.float64), np.asarray(attrs[OFFSET_ATTRIBUTE], dtype=np.float64)
+
+
+def write_scaling(series: Any, gain: np.ndarray, offset: np.ndarray) -> None:
+    """Marks an electrical series as digital and writes its per-channel gain and offset.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+        gain: The physical value of one digital step of each channel.
+        offset: The physical value of digital zero of each channel.
+    """
+    attrs = as_h5py_dataset(series).attrs
+    attrs[SAMPLE_FORMAT] = DIGITAL_FORMAT
+    attrs[GAIN_ATTRIBUTE] = np.asarray(gain, dtype=np.float64)
+    attrs[OFFSET_ATTRIBUTE] = np.asarray(offset, dtype=np.float64)
+
+
+def to_digital(data: np.ndarray, gain: np.ndarray, offset: np.ndarray) -> np.ndarray:
+    """Converts (sample, channel) physical values back into the digital values they were calibrated from.
+
+    Args:
+        data: The physical values.
+        gain: The physical value of one digital step of each channel.
+        offset: The physical value of digital zero of each channel.
+
+    Returns:
+        The digital values.
+    """
+    info = np.iinfo(DIGITAL_DTYPE)
+    digital = np.rint((data - offset) / gain)
+    return np.clip(digital, info.min, info.max, out=digital).astype(DIGITAL_DTYPE)
+
+
+def scale(data: np.ndarray, gain: np.ndarray, offset: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    """Converts (sample, channel) digital values into physical values.
+
+    Args:
+        data: The digital values.
+        gain: The physical value of one digital step of each channel.
+        offset: The physical value of digital zero of each channel.
+        out: The array to write the physical values into, a new float32 array if None.
+
+    Returns:
+        The physical values.
+    """
+    if out is None:
+        out = np.empty(data.shape, dtype=SCALED_DTYPE)
+    np.multiply(data, gain, out=out, casting="unsafe")
+    np.add(out, offset, out=out, casting="unsafe")
+    return out
+
+
+def scale_into(data: np.ndarray, gain: np.ndarray, offset: np.ndarray, dest: np.ndarray, dest_sel: Any) -> None:
+    """Converts digital values into physical values written into a selection of an array.
+
+    Basic selections are views of the array and are scaled into in place. Other selections, e.g. index arrays, are
+    copies, so the scaled values are assigned to them instead.
+
+    Args:
+        data: The (sample, channel) digital values.
+        gain: The physical value of one digital step of each channel.
+        offset: The physical value of digital zero of each channel.
+        dest: The array to write into.
+        dest_sel: The selection of the array to write into.
+    """
+    target = dest[dest_sel]
+    if np.may_share_memory(target, dest):
+        scale(data, gain, offset, out=target)
+    else:
+        dest[dest_sel] = scale(data, gain, offset)
@@ -0,0 +1,212 @@
+"""segments.py
+Tables of the continuous segments of electrical series, split by the pauses and restarts of a recording.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from typing import Any
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .timeaxis import as_h5py_dataset
+from .timeaxis import find_discontinuities
+from .timeaxis import get_discontinuity_records
+from .timeaxis import get_time_axis
+from .timestamps import NANOSECONDS
+
+
+# Definitions #
+# Constants #
+SEGMENTS_SUFFIX: str = "_segments"
+SEGMENT_COLUMNS: tuple[str, ...] = ("start_index", "stop_index", "start_nanostamp", "end_nanostamp")
+
+
+# Classes #
+class SegmentBuilder:
+    """Builds the segment table of a time axis incrementally as blocks of nanostamps are appended.
+
+    Only the first and last nanostamp of each segment are kept, so the table can be built while a series is written
+    without reading its time axis back.
+
+    Attributes:
+        sample_rate: The sample rate of the series.
+        length: The number of nanostamps appended.
+
+    Args:
+        sample_rate: The sample rate of the series.
+    """
+
+    def __init__(self, sample_rate: float) -> None:
+        self.sample_rate: float = sample_rate
+        self.length: int = 0
+        self._starts: list[tuple[int, int]] = []
+        self._ends: list[int] = []
+        self._last: int | None = None
+
+    def append(self, nanostamps: np.ndarray) -> None:
+        """Appends the nanostamps of a block of samples.
+
+        Args:
+            nanostamps: The nanostamps of the samples.
+        """
+        nanostamps = np.asarray(nanostamps, dtype=np.int64)
+        if nanostamps.size == 0:
+            return
+        if self._last is None:
+            self._starts.append((0, int(nanostamps[0])))
+            breaks = find_discontinuities(nanostamps, self.sample_rate)
+            before = nanostamps[breaks - 1]
+        else:
+            # The last nanostamp is prepended, so break indices are positions in the new block plus one.
+            breaks = find_discontinuities(np.concatenate([[self._last], nanostamps]), self.sample_rate) - 1
+            before = np.where(breaks > 0, nanostamps[np.maximum(breaks - 1, 0)], self._last)
+
+        self._ends.extend(int(nanostamp) for nanostamp in before)
+        self._starts.extend((self.length + int(i), int(nanostamps[i])) for i in breaks)
+        self._last = int(nanostamps[-1])
+        self.length += nanostamps.size
+
+    @property
+    def table(self) -> np.ndarray:
+        """The (segment, column) table of the nanostamps appended so far, see SEGMENT_COLUMNS."""
+        if self._last is None:
+            return np.empty((0, len(SEGMENT_COLUMNS)), dtype=np.int64)
+        starts = np.array(self._starts, dtype=np.int64)
+        stops = np.append(starts[1:, 0], self.length)
+        ends = np.append(np.array(self._ends, dtype=np.int64), self._last)
+        return np.column_stack([starts[:, 0], stops, starts[:, 1], ends])
+
+
+# Functions #
+def get_segments_name(series_name: str) -> str:
+    """Gets the name of the segment table dataset of a series.
+
+    Args:
+        series_name: The name of the series dataset, e.g. "intracranialEEG".
+
+    Returns:
+        The name of the segment table dataset.
+    """
+    return f"{series_name}{SEGMENTS_SUFFIX}"
+
+
+def compute_segments(series: Any, block_size: int = 2**20) -> np.ndarray:
+    """Computes the segment table of a series from its time axis.
+
+    A segment ends wherever consecutive nanostamps are more than half a sample period from the sample period apart,
+    see timeaxis.find_discontinuities. Explicit time axes are scanned in blocks, compact ones already store where
+    their segments start.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+        block_size: The number of nanostamps to read at a time from an explicit time axis.
+
+    Returns:
+        The (segment, column) table, see SEGMENT_COLUMNS.
+    """
+    time_axis = get_time_axis(series)
+    records = np.asarray(get_discontinuity_records(series, block_size), dtype=np.int64).reshape(-1, 2)
+    if records.shape[0] == 0:
+        return np.empty((0, len(SEGMENT_COLUMNS)), dtype=np.int64)
+    stops = np.append(records[1:, 0], len(time_axis))
+    ends = np.asarray(time_axis[stops - 1], dtype=np.int64)
+    return np.column_stack([records[:, 0], stops, records[:, 1], ends])
+
+
+def write_segments(series: Any, table: np.ndarray) -> h5py.Dataset:
+    """Writes the segment table of a series next to it, replacing the previous one.
+
+    An existing table is resized in place and its attributes are modified, so a table created before SWMR started
+    can be written while the file is in SWMR mode.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+        table: The (segment, column) table, see SEGMENT_COLUMNS.
+
+    Returns:
+        The segment table dataset.
+    """
+    dataset = as_h5py_dataset(series)
+    table = np.asarray(table, dtype=np.int64).reshape(-1, len(SEGMENT_COLUMNS))
+    segments = dataset.file.require_dataset(
+        get_segments_name(dataset.name),
+        shape=(0, len(SEGMENT_COLUMNS)),
+        maxshape=(None, len(SEGMENT_COLUMNS)),
+        chunks=(64, len(SEGMENT_COLUMNS)),
+        dtype=np.int64,
+        exact=True,
+    )
+    segments.resize(table.shape)
+    segments[...] = table
+    segments.attrs.modify("length", np.int64(table[-1, 1] if len(table) else 0))
+    return segments
+
+
+def build_segments(series: Any) -> np.ndarray:
+    """Computes the segment table of a series of an existing file and stores it.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset, of a file open for writing.
+
+    Returns:
+        The (segment, column) table, see SEGMENT_COLUMNS.
+    """
+    table = compute_segments(series)
+    write_segments(series, table)
+    return table
+
+
+def get_segments(series: Any) -> np.ndarray:
+    """Gets the segment table of a series, reading the stored table when it covers the whole series.
+
+    Series without a table, or whose table is older than their time axis, have it computed from the time axis.
+
+    Args:
+        series: The electrical series, either an HDF5Dataset or an h5py dataset.
+
+    Returns:
+        The (segment, column) table, see SEGMENT_COLUMNS.
+    """
+    dataset = as_h5py_dataset(series)
+    name = get_segments_name(dataset.name)
+    if name in dataset.file:
+        segments = dataset.file[name]
+        if int(segments.attrs.get("length", -1)) == len(get_time_axis(dataset)):
+            return segments[...]
+    return compute_segments(dataset)
+
+
+def merge_segments(table: np.ndarray, sample_rate: float) -> np.ndarray:
+    """Merges adjacent rows of a segment table whose samples continue without a gap.
+
+    Rows are adjacent when one starts at the stop index of the other, e.g. the segments of consecutive files placed
+    one after the other in a window.
+
+    Args:
+        table: The (segment, column) table, see SEGMENT_COLUMNS.
+        sample_rate: The sample rate of the series.
+
+    Returns:
+        The merged table.
+    """
+    if len(table) < 2:
+        return table
+    period = NANOSECONDS / sample_rate
+    interval = table[1:, 2] - table[:-1, 3]
+    continuous = (table[1:, 0] == table[:-1, 1]) & (np.abs(interval - period) <= period / 2)
+    firsts = np.flatnonzero(np.concatenate([[True], ~continuous]))
+    lasts = np.append(firsts[1:], len(table)) - 1
+    return np.column_stack([table[firsts, 0], table[lasts, 1], table[firsts, 2], table[lasts, 3]])
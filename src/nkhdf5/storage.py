@@ -0,0 +1,175 @@
+"""storage.py
+Named chunking and compression presets for the electrical series of HDF5NK files.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from dataclasses import dataclass
+from dataclasses import replace
+import math
+from typing import Any
+
+# Third-Party Packages #
+
+# Local Packages #
+
+
+# Definitions #
+# Constants #
+DEFAULT_SAMPLE_RATE: float = 2000.0
+DEFAULT_CHANNEL_COUNT: int = 128
+DEFAULT_BLOCK_SIZE: int = 2**16  # The number of samples read from an EDF and written per append.
+
+
+# Classes #
+@dataclass(frozen=True)
+class StoragePreset:
+    """The chunk layout and filters of the electrical series and time axes of an HDF5NK file.
+
+    Chunks always span every channel so reads of a time window touch as few chunks as possible. Their length is
+    either a fixed duration or as many samples as fit in a byte budget.
+
+    Attributes:
+        name: The name of the preset.
+        chunk_bytes: The target size of a data chunk when its length is not a fixed duration.
+        chunk_seconds: The fixed duration of a chunk, None to size chunks by chunk_bytes.
+        compression: The h5py compression filter.
+        compression_opts: The options of the compression filter.
+        shuffle: Determines if the shuffle filter is applied before compression.
+    """
+
+    name: str
+    chunk_bytes: int = 2**20
+    chunk_seconds: float | None = None
+    compression: str | None = None
+    compression_opts: int | None = None
+    shuffle: bool = False
+
+    def get_chunk_rows(
+        self,
+        sample_rate: float | None = None,
+        channel_count: int | None = None,
+        itemsize: int = 4,
+    ) -> int:
+        """Gets the number of samples in a chunk.
+
+        Args:
+            sample_rate: The sample rate of the series, a typical NK rate is assumed if unknown.
+            channel_count: The number of channels of the series, a typical montage is assumed if unknown.
+            itemsize: The size in bytes of a sample of one channel.
+
+        Returns:
+            The length of a chunk along the time axis.
+        """
+        sample_rate = sample_rate or DEFAULT_SAMPLE_RATE
+        channel_count = channel_count or DEFAULT_CHANNEL_COUNT
+        if self.chunk_seconds is not None:
+            return max(1, math.ceil(self.chunk_seconds * sample_rate))
+        else:
+            return max(1, self.chunk_bytes // (channel_count * itemsize))
+
+    def get_filter_kwargs(self) -> dict[str, Any]:
+        """Gets the h5py filter keyword arguments.
+
+        Returns:
+            The compression and shuffle keyword arguments.
+        """
+        kwargs = {}
+        if self.compression is not None:
+            kwargs["compression"] = self.compression
+            if self.compression_opts is not None:
+                kwargs["compression_opts"] = self.compression_opts
+        if self.shuffle:
+            kwargs["shuffle"] = True
+        return kwargs
+
+    def with_compression(self, compression: str | None, compression_opts: int | None = None) -> "StoragePreset":
+        """Creates a copy of this preset with a different compression filter.
+
+        Args:
+            compression: The h5py compression filter, e.g. "gzip" or "lzf", or None for no compression.
+            compression_opts: The options of the compression filter, e.g. the gzip level.
+
+        Returns:
+            The new preset, shuffling whenever it compresses.
+        """
+        return replace(
+            self,
+            name=f"{self.name}+{compression}",
+            compression=compression,
+            compression_opts=compression_opts,
+            shuffle=compression is not None,
+        )
+
+    def get_series_kwargs(
+        self,
+        sample_rate: float | None = None,
+        channel_count: int | None = None,
+        itemsize: int = 4,
+    ) -> dict[str, Any]:
+        """Gets the h5py dataset keyword arguments of an electrical series.
+
+        Args:
+            sample_rate: The sample rate of the series.
+            channel_count: The number of channels of the series.
+            itemsize: The size in bytes of a sample of one channel.
+
+        Returns:
+            The chunks and filter keyword arguments.
+        """
+        rows = self.get_chunk_rows(sample_rate, channel_count, itemsize)
+        return {"chunks": (rows, max(1, channel_count or DEFAULT_CHANNEL_COUNT))} | self.get_filter_kwargs()
+
+    def get_time_axis_kwargs(
+        self,
+        sample_rate: float | None = None,
+        channel_count: int | None = None,
+        itemsize: int = 4,
+    ) -> dict[str, Any]:
+        """Gets the h5py dataset keyword arguments of a time axis, with chunks aligned to its series.
+
+        Args:
+            sample_rate: The sample rate of the series.
+            channel_count: The number of channels of the series.
+            itemsize: The size in bytes of a sample of one channel of the series.
+
+        Returns:
+            The chunks and filter keyword arguments.
+        """
+        return {"chunks": (self.get_chunk_rows(sample_rate, channel_count, itemsize),)} | self.get_filter_kwargs()
+
+
+# Presets #
+STORAGE_PRESETS: dict[str, StoragePreset] = {
+    "archive": StoragePreset("archive", chunk_bytes=4 * 2**20, compression="gzip", compression_opts=9, shuffle=True),
+    "analysis": StoragePreset("analysis", chunk_bytes=2**20),
+    "realtime": StoragePreset("realtime", chunk_seconds=0.25),
+}
+
+
+# Functions #
+def get_storage_preset(storage: str | StoragePreset) -> StoragePreset:
+    """Gets a storage preset by name.
+
+    Args:
+        storage: The name of a preset in STORAGE_PRESETS or a preset.
+
+    Returns:
+        The storage preset.
+    """
+    if isinstance(storage, StoragePreset):
+        return storage
+    try:
+        return STORAGE_PRESETS[storage]
+    except KeyError:
+        raise ValueError(f"Unknown storage preset {storage!r}, expected one of {sorted(STORAGE_PRESETS)}.") from None
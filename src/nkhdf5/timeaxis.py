@@ -0,0 +1,383 @@
+"""timeaxis.py
+Explicit and compact (start, sample rate and discontinuities) time axes of electrical series.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from typing import Any
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .timestamps import NANOSECONDS
+from .timestamps import sample_offsets
+
+
+# Definitions #
+# Constants #
+TIME_AXIS_MODE: str = "time_axis_mode"
+EXPLICIT_MODE: str = "explicit"
+COMPACT_MODE: str = "compact"
+DISCONTINUITIES_SUFFIX: str = "_time_discontinuities"
+
+
+# Functions #
+# hdf5objects 0.5.0, the version pinned in pyproject.toml, has no public accessor for the h5py objects it wraps, so
+# these two functions are the only places its private _dataset and _file attributes are read.
+def as_h5py_dataset(dataset: Any) -> h5py.Dataset:
+    """Gets the h5py dataset of an HDF5Dataset, or returns an h5py dataset as is.
+
+    Args:
+        dataset: An hdf5objects HDF5Dataset or an h5py Dataset.
+
+    Returns:
+        The h5py dataset.
+    """
+    return dataset if isinstance(dataset, h5py.Dataset) else dataset._dataset
+
+
+def as_h5py_file(file: Any) -> h5py.File:
+    """Gets the h5py file of an HDF5File, or returns an h5py file as is.
+
+    Args:
+        file: An hdf5objects HDF5File or an h5py File.
+
+    Returns:
+        The h5py file.
+    """
+    return file if isinstance(file, h5py.File) else file._file
+
+
+def get_time_axis(series: Any) -> "ExplicitTimeAxis | CompactTimeAxis":
+    """Gets the time axis of an electrical series, whichever way it is stored.
+
+    Args:
+        series: The electrical series dataset.
+
+    Returns:
+        The time axis of the series.
+    """
+    if CompactTimeAxis.is_compact(series):
+        return CompactTimeAxis(series)
+    else:
+        return ExplicitTimeAxis(series)
+
+
+def find_discontinuities(nanostamps: np.ndarray, sample_rate: float) -> np.ndarray:
+    """Finds the samples which start a new continuous segment of a time axis.
+
+    A sample starts a new segment when its distance from the previous sample differs from the sample period by more
+    than half a period.
+
+    Args:
+        nanostamps: The nanostamps of consecutive samples.
+        sample_rate: The sample rate in Hz.
+
+    Returns:
+        The indices of the samples after each discontinuity.
+    """
+    period = NANOSECONDS / sample_rate
+    intervals = np.diff(np.asarray(nanostamps, dtype=np.int64))
+    return np.flatnonzero(np.abs(intervals - period) > period / 2) + 1
+
+
+def get_discontinuity_records(series: Any, block_size: int = 2**20) -> np.ndarray:
+    """Gets the (sample index, nanostamp) record of every continuous segment of a series.
+
+    Compact time axes already store these records, explicit ones are scanned in blocks of block_size samples.
+
+    Args:
+        series: The electrical series dataset.
+        block_size: The number of nanostamps to read at a time from an explicit time axis.
+
+    Returns:
+        The first sample index and its nanostamp of each segment.
+    """
+    time_axis = get_time_axis(series)
+    if isinstance(time_axis, CompactTimeAxis):
+        return time_axis.records[...]
+
+    length = len(time_axis)
+    if length == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    starts = [np.zeros((1,), dtype=np.int64)]
+    for block_start in range(0, length - 1, block_size):
+        nanostamps = time_axis[block_start : min(block_start + block_size + 1, length)]
+        starts.append(find_discontinuities(nanostamps, time_axis.sample_rate) + block_start)
+    indices = np.concatenate(starts)
+    return np.stack([indices, time_axis[indices]], axis=1)
+
+
+def _normalize_key(key: int | slice | np.ndarray, length: int) -> np.ndarray:
+    """Converts an index, slice or index array into an array of sample indices.
+
+    Args:
+        key: The index, slice or index array.
+        length: The number of samples in the axis.
+
+    Returns:
+        The sample indices the key selects.
+    """
+    if isinstance(key, slice):
+        return np.arange(*key.indices(length), dtype=np.int64)
+    indices = np.asarray(key, dtype=np.int64)
+    if np.any((indices >= length) | (indices < -length)):
+        raise IndexError("time axis index out of range")
+    return np.where(indices < 0, indices + length, indices)
+
+
+# Classes #
+class ExplicitTimeAxis:
+    """A time axis stored as one nanostamp per sample.
+
+    Attributes:
+        series: The h5py dataset of the electrical series.
+        dataset: The h5py dataset of the time axis.
+
+    Args:
+        series: The electrical series dataset.
+    """
+
+    def __init__(self, series: Any) -> None:
+        self.series: h5py.Dataset = as_h5py_dataset(series)
+        self.dataset: h5py.Dataset = self.series.dims[0][0]
+
+    @property
+    def sample_rate(self) -> float:
+        """The sample rate of the series, NaN if it was never set."""
+        sample_rate = self.dataset.attrs.get("sample_rate", None)
+        return np.nan if sample_rate is None or isinstance(sample_rate, h5py.Empty) else float(sample_rate)
+
+    def __len__(self) -> int:
+        """The number of samples in the axis."""
+        return self.dataset.shape[0]
+
+    def __getitem__(self, key: int | slice | np.ndarray) -> np.ndarray:
+        """Gets the nanostamps of the selected samples."""
+        return np.asarray(self.dataset[key], dtype=np.int64)
+
+    def searchsorted(self, nanostamp: int, side: str = "left") -> int:
+        """Finds the sample index where a nanostamp would be inserted, reading only O(log n) samples.
+
+        Args:
+            nanostamp: The nanostamp to find.
+            side: "left" for the first sample at or after the nanostamp, "right" for the first sample after it.
+
+        Returns:
+            The sample index.
+        """
+        low, high = 0, len(self)
+        while low < high:
+            middle = (low + high) // 2
+            value = int(self.dataset[middle])
+            if value < nanostamp or (side == "right" and value == nanostamp):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+class CompactTimeAxis:
+    """A time axis of a uniformly sampled series stored as discontinuity records instead of per-sample nanostamps.
+
+    Each record is a (sample index, nanostamp) pair marking the first sample of a continuous segment; the first record
+    is the start of the series. The nanostamp of any sample is materialized from the record of its segment and the
+    sample rate, so only a few int64 pairs are stored no matter how long the recording is.
+
+    Attributes:
+        series: The h5py dataset of the electrical series.
+        name: The name of the dataset which stores the discontinuity records.
+
+    Args:
+        series: The electrical series dataset.
+    """
+
+    def __init__(self, series: Any) -> None:
+        self.series: h5py.Dataset = as_h5py_dataset(series)
+        self.name: str = self.series.name + DISCONTINUITIES_SUFFIX
+
+    @classmethod
+    def is_compact(cls, series: Any) -> bool:
+        """Checks if an electrical series stores its time axis compactly.
+
+        Args:
+            series: The electrical series dataset.
+
+        Returns:
+            True if the series uses a compact time axis.
+        """
+        mode = as_h5py_dataset(series).attrs.get(TIME_AXIS_MODE, EXPLICIT_MODE)
+        return (mode.decode() if isinstance(mode, bytes) else mode) == COMPACT_MODE
+
+    @property
+    def records(self) -> h5py.Dataset:
+        """The dataset of (sample index, nanostamp) discontinuity records."""
+        return self.series.file[self.name]
+
+    @property
+    def sample_rate(self) -> float:
+        """The sample rate of the series."""
+        return float(self.records.attrs["sample_rate"])
+
+    @property
+    def length(self) -> int:
+        """The number of samples in the axis."""
+        return int(self.records.attrs["length"])
+
+    def __len__(self) -> int:
+        """The number of samples in the axis."""
+        return self.length
+
+    def __getitem__(self, key: int | slice | np.ndarray) -> np.ndarray:
+        """Materializes the nanostamps of the selected samples."""
+        indices = _normalize_key(key, self.length)
+        return self.get_nanostamps(indices)
+
+    def create(self, sample_rate: float) -> "CompactTimeAxis":
+        """Switches the series to a compact time axis and creates its empty record dataset.
+
+        Args:
+            sample_rate: The sample rate of the series.
+
+        Returns:
+            This object.
+        """
+        records = self.series.file.require_dataset(
+            self.name, shape=(0, 2), maxshape=(None, 2), dtype=np.int64, exact=True
+        )
+        records.attrs["sample_rate"] = sample_rate
+        records.attrs["length"] = 0
+        self.series.attrs[TIME_AXIS_MODE] = COMPACT_MODE
+        return self
+
+    def read_records(self) -> tuple[np.ndarray, np.ndarray]:
+        """Reads the discontinuity records.
+
+        Returns:
+            The first sample index and the nanostamp of that sample for each continuous segment.
+        """
+        records = self.records[...]
+        return records[:, 0], records[:, 1]
+
+    def get_nanostamps(self, indices: np.ndarray) -> np.ndarray:
+        """Materializes the nanostamps of sample indices.
+
+        Args:
+            indices: The non-negative sample indices.
+
+        Returns:
+            The nanostamps of the samples.
+        """
+        record_indices, record_nanostamps = self.read_records()
+        segments = np.searchsorted(record_indices, indices, side="right") - 1
+        return record_nanostamps[segments] + sample_offsets(indices - record_indices[segments], self.sample_rate)
+
+    def extend(self, n_samples: int, start: int | None = None) -> None:
+        """Extends the axis by a continuous run of samples.
+
+        Args:
+            n_samples: The number of samples to add.
+            start: The nanostamp of the first added sample, a record is only stored if it is not continuous.
+        """
+        length = self.length
+        if start is not None:
+            is_continuous = False
+            if length > 0:
+                expected = int(self.get_nanostamps(np.array([length]))[0])
+                is_continuous = abs(start - expected) <= NANOSECONDS / self.sample_rate / 2
+            if not is_continuous:
+                self._append_records([(length, start)])
+        elif length == 0:
+            raise ValueError("The start nanostamp is required for the first samples of a compact time axis.")
+        self.records.attrs["length"] = length + n_samples
+
+    def append_nanostamps(self, nanostamps: np.ndarray) -> None:
+        """Appends explicit nanostamps, storing a record only where they break from the sample rate.
+
+        A sample is a discontinuity if it is more than half a sample period away from where the current segment
+        predicts it.
+
+        Args:
+            nanostamps: The nanostamps of the added samples.
+        """
+        nanostamps = np.asarray(nanostamps, dtype=np.int64)
+        if nanostamps.size == 0:
+            return
+        length = self.length
+        sample_rate = self.sample_rate
+        tolerance = NANOSECONDS / sample_rate / 2
+
+        new_records = []
+        if length == 0:
+            segment_index, segment_nanostamp = length, int(nanostamps[0])
+            new_records.append((segment_index, segment_nanostamp))
+        else:
+            record_indices, record_nanostamps = self.read_records()
+            segment_index, segment_nanostamp = int(record_indices[-1]), int(record_nanostamps[-1])
+
+        position = 0
+        while position < nanostamps.size:
+            indices = np.arange(length + position, length + nanostamps.size, dtype=np.int64)
+            expected = segment_nanostamp + sample_offsets(indices - segment_index, sample_rate)
+            mismatches = np.flatnonzero(np.abs(nanostamps[position:] - expected) > tolerance)
+            if mismatches.size == 0:
+                break
+            position += int(mismatches[0])
+            segment_index, segment_nanostamp = length + position, int(nanostamps[position])
+            new_records.append((segment_index, segment_nanostamp))
+
+        self._append_records(new_records)
+        self.records.attrs["length"] = length + nanostamps.size
+
+    def searchsorted(self, nanostamp: int, side: str = "left") -> int:
+        """Finds the sample index where a nanostamp would be inserted without materializing the axis.
+
+        Args:
+            nanostamp: The nanostamp to find.
+            side: "left" for the first sample at or after the nanostamp, "right" for the first sample after it.
+
+        Returns:
+            The sample index.
+        """
+        record_indices, record_nanostamps = self.read_records()
+        segment = max(int(np.searchsorted(record_nanostamps, nanostamp, side="right")) - 1, 0)
+        segment_start = int(record_indices[segment])
+        segment_stop = int(record_indices[segment + 1]) if segment + 1 < record_indices.size else self.length
+
+        offset = nanostamp - int(record_nanostamps[segment])
+        index = segment_start + int(np.ceil(offset * self.sample_rate / NANOSECONDS))
+        index = min(max(index, segment_start), segment_stop)
+
+        def is_after(i: int) -> bool:
+            value = int(self.get_nanostamps(np.array([i]))[0])
+            return value >= nanostamp if side == "left" else value > nanostamp
+
+        while index > segment_start and is_after(index - 1):
+            index -= 1
+        while index < segment_stop and not is_after(index):
+            index += 1
+        return index
+
+    def _append_records(self, new_records: list[tuple[int, int]]) -> None:
+        """Appends (sample index, nanostamp) records to the record dataset.
+
+        Args:
+            new_records: The records to append.
+        """
+        if new_records:
+            records = self.records
+            n_records = records.shape[0]
+            records.resize((n_records + len(new_records), 2))
+            records[n_records:] = np.asarray(new_records, dtype=np.int64)
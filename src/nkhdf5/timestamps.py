@@ -0,0 +1,144 @@
+"""timestamps.py
+Vectorized int64 nanosecond time axes and their conversion to datetimes.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+import datetime
+import time
+
+# Third-Party Packages #
+import numpy as np
+
+# Local Packages #
+
+
+# Definitions #
+# Constants #
+NANOSECONDS: int = 10**9
+HOUR_NANOSECONDS: int = 3600 * NANOSECONDS
+
+
+# Functions #
+def local_datetime_to_nanostamp(local_datetime: datetime.datetime) -> int:
+    """Converts a naive local datetime to nanoseconds since the unix epoch.
+
+    Args:
+        local_datetime: The datetime in the local time zone of this machine.
+
+    Returns:
+        The nanostamp of the datetime.
+    """
+    seconds = int(time.mktime(local_datetime.timetuple()))
+    return seconds * NANOSECONDS + local_datetime.microsecond * 1000
+
+
+def sample_offsets(indices: np.ndarray, sample_rate: float) -> np.ndarray:
+    """Gets the int64 nanosecond offsets of sample indices from sample zero.
+
+    Args:
+        indices: The sample indices.
+        sample_rate: The sample rate in Hz.
+
+    Returns:
+        The nanoseconds between sample zero and each sample.
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    if float(sample_rate).is_integer():
+        # Whole seconds and the remainder are scaled apart, indices * NANOSECONDS would overflow past ~9.2e9 samples.
+        rate = int(sample_rate)
+        return indices // rate * NANOSECONDS + indices % rate * NANOSECONDS // rate
+    else:
+        return np.floor(indices * (NANOSECONDS / sample_rate)).astype(np.int64)
+
+
+def end_nanostamp(last: int, sample_rate: float) -> int:
+    """Gets the exclusive end of a recording, the nanostamp one sample period after its last sample.
+
+    Args:
+        last: The nanostamp of the last sample.
+        sample_rate: The sample rate in Hz.
+
+    Returns:
+        The end nanostamp, as stored in the "end" attribute of HDF5NK files.
+    """
+    return int(last) + int(sample_offsets(np.ones((1,), dtype=np.int64), sample_rate)[0])
+
+
+def sample_nanostamps(start: int, sample_rate: float, start_index: int, stop_index: int) -> np.ndarray:
+    """Creates the int64 nanostamps of a range of uniformly sampled samples.
+
+    The sample offsets are computed relative to the start and added in integer arithmetic, so the absolute
+    nanostamps keep full precision instead of being rounded to a float64 near 1e18.
+
+    Args:
+        start: The nanostamp of sample zero.
+        sample_rate: The sample rate in Hz.
+        start_index: The index of the first sample of the range.
+        stop_index: The index after the last sample of the range.
+
+    Returns:
+        The nanostamps of the samples in the range.
+    """
+    return sample_offsets(np.arange(start_index, stop_index, dtype=np.int64), sample_rate) + np.int64(start)
+
+
+def nanostamps_to_datetime64(nanostamps: np.ndarray, local: bool = False) -> np.ndarray:
+    """Converts nanostamps to datetime64 values.
+
+    Args:
+        nanostamps: The nanoseconds since the unix epoch.
+        local: Determines if the result is naive local time, like datetime.fromtimestamp, instead of UTC.
+
+    Returns:
+        The nanostamps as datetime64[ns] values.
+    """
+    nanostamps = np.asarray(nanostamps).astype(np.int64, copy=False)
+    if local and nanostamps.size > 0:
+        # The offset is looked up at both ends of each distinct hour. Hours in which it changes, which in some zones
+        # happens on the half hour, look up the offset of each of their nanostamps.
+        hours, inverse = np.unique(nanostamps // HOUR_NANOSECONDS, return_inverse=True)
+        inverse = inverse.reshape(nanostamps.shape)
+        starts = np.array([_local_offset(int(hour) * 3600) for hour in hours], dtype=np.int64)
+        ends = np.array([_local_offset(int(hour) * 3600 + 3599) for hour in hours], dtype=np.int64)
+        offsets = starts[inverse]
+        changing = (starts != ends)[inverse]
+        offsets[changing] = [_local_offset(int(seconds)) for seconds in nanostamps[changing] // NANOSECONDS]
+        nanostamps = nanostamps + offsets
+    return nanostamps.view("datetime64[ns]")
+
+
+def datetime64_to_nanostamps(datetimes: np.ndarray) -> np.ndarray:
+    """Converts datetime64 values to int64 nanostamps.
+
+    Args:
+        datetimes: The datetime64 values.
+
+    Returns:
+        The nanoseconds since the unix epoch.
+    """
+    return np.asarray(datetimes, dtype="datetime64[ns]").view(np.int64)
+
+
+def _local_offset(seconds: int) -> int:
+    """Gets the local UTC offset in nanoseconds at a unix time.
+
+    Args:
+        seconds: The seconds since the unix epoch.
+
+    Returns:
+        The UTC offset of the local time zone in nanoseconds.
+    """
+    local_datetime = datetime.datetime.fromtimestamp(seconds)
+    utc_datetime = datetime.datetime.fromtimestamp(seconds, datetime.timezone.utc).replace(tzinfo=None)
+    return int((local_datetime - utc_datetime).total_seconds()) * NANOSECONDS
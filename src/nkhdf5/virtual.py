@@ -0,0 +1,251 @@
+"""virtual.py
+Assembles multi-file recordings into an HDF5NK file of virtual datasets which map onto the source files.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections.abc import Iterable
+import contextlib
+import os
+import pathlib
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .layout import SERIES_DATASET_NAMES
+from .layout import get_dataset_name
+from .pyramid import PYRAMID_FACTORS
+from .scaling import get_scaling
+from .scaling import is_digital
+from .segments import SEGMENT_COLUMNS
+from .segments import get_segments
+from .segments import merge_segments
+from .segments import write_segments
+from .timeaxis import CompactTimeAxis
+from .timeaxis import get_discontinuity_records
+from .timeaxis import get_time_axis
+from .timestamps import end_nanostamp
+from .windows import SourceSlice
+from .windows import find_source_slice
+from .windows import list_sources
+
+
+# Definitions #
+# Constants #
+DIMENSION_SCALE_ATTRIBUTES: frozenset[str] = frozenset({"DIMENSION_LIST", "REFERENCE_LIST", "CLASS", "NAME"})
+
+
+# Functions #
+def _copy_attributes(source: h5py.HLObject, destination: h5py.HLObject, exclude: Iterable[str] = ()) -> None:
+    """Copies the attributes of an HDF5 object, except for the dimension scale bookkeeping.
+
+    Args:
+        source: The object to copy the attributes from.
+        destination: The object to copy the attributes to.
+        exclude: The names of other attributes not to copy.
+    """
+    exclude = DIMENSION_SCALE_ATTRIBUTES.union(exclude)
+    for name, value in source.attrs.items():
+        if name not in exclude:
+            destination.attrs[name] = value
+
+
+def _same_scaling(datasets: list[h5py.Dataset]) -> bool:
+    """Checks if series share a sample format and, when digital, the same per-channel gain and offset.
+
+    The scaling of a virtual series is copied from its first source, so it is only valid if every source agrees.
+
+    Args:
+        datasets: The source series.
+
+    Returns:
+        True if the series can be read with the same scaling.
+    """
+    digital = [is_digital(dataset) for dataset in datasets]
+    if not any(digital):
+        return True
+    elif not all(digital):
+        return False
+    gain, offset = get_scaling(datasets[0])
+    return all(
+        np.array_equal(gain, other_gain) and np.array_equal(offset, other_offset)
+        for other_gain, other_offset in (get_scaling(dataset) for dataset in datasets[1:])
+    )
+
+
+def _virtual_concatenate(
+    out_file: h5py.File,
+    name: str,
+    datasets: list[h5py.Dataset],
+    slices: list[SourceSlice],
+    out_dir: pathlib.Path,
+) -> h5py.Dataset:
+    """Creates a virtual dataset which concatenates slices of source datasets along the first axis.
+
+    Args:
+        out_file: The file to create the virtual dataset in.
+        name: The name of the virtual dataset.
+        datasets: The source datasets.
+        slices: The samples to map from each source dataset.
+        out_dir: The directory of the virtual file, sources are referenced relative to it.
+
+    Returns:
+        The virtual dataset.
+    """
+    shape = (sum(s.length for s in slices),) + datasets[0].shape[1:]
+    layout = h5py.VirtualLayout(shape=shape, dtype=datasets[0].dtype, maxshape=shape)
+    position = 0
+    for dataset, source_slice in zip(datasets, slices):
+        source_path = os.path.relpath(source_slice.path.resolve(), out_dir.resolve())
+        source = h5py.VirtualSource(source_path, dataset.name, shape=dataset.shape, dtype=dataset.dtype)
+        layout[position : position + source_slice.length] = source[source_slice.start : source_slice.stop]
+        position += source_slice.length
+    return out_file.create_virtual_dataset(name, layout)
+
+
+def _write_compact_time_axis(series: h5py.Dataset, sources: list[h5py.Dataset], slices: list[SourceSlice]) -> None:
+    """Writes the time axis of a virtual series as merged discontinuity records of its sources.
+
+    Args:
+        series: The virtual series.
+        sources: The source series.
+        slices: The samples mapped from each source series.
+    """
+    time_axis = CompactTimeAxis(series).create(get_time_axis(sources[0]).sample_rate)
+    for source, source_slice in zip(sources, slices):
+        records = get_discontinuity_records(source)
+        inside = (records[:, 0] > source_slice.start) & (records[:, 0] < source_slice.stop)
+        segment_starts = np.concatenate([[source_slice.start], records[inside, 0], [source_slice.stop]])
+        segment_nanostamps = get_time_axis(source)[segment_starts[:-1]]
+        for length, nanostamp in zip(np.diff(segment_starts), segment_nanostamps):
+            time_axis.extend(int(length), start=int(nanostamp))
+
+
+def _concatenate_segments(sources: list[h5py.Dataset], slices: list[SourceSlice]) -> np.ndarray:
+    """Builds the segment table of a virtual series from the tables of its sources, without reading through it.
+
+    Args:
+        sources: The source series.
+        slices: The samples mapped from each source series.
+
+    Returns:
+        The (segment, column) table of the virtual series, see segments.SEGMENT_COLUMNS.
+    """
+    tables = [np.empty((0, len(SEGMENT_COLUMNS)), dtype=np.int64)]
+    position = 0
+    for source, source_slice in zip(sources, slices):
+        time_axis = get_time_axis(source)
+        table = get_segments(source)
+        table = table[(table[:, 0] < source_slice.stop) & (table[:, 1] > source_slice.start)]
+        starts = np.maximum(table[:, 0], source_slice.start)
+        stops = np.minimum(table[:, 1], source_slice.stop)
+        nanostamps = [(int(time_axis[start]), int(time_axis[stop - 1])) for start, stop in zip(starts, stops)]
+        offset = position - source_slice.start
+        tables.append(np.column_stack([starts + offset, stops + offset, np.reshape(nanostamps, (-1, 2))]))
+        position += source_slice.length
+    return merge_segments(np.concatenate(tables).astype(np.int64), get_time_axis(sources[0]).sample_rate)
+
+
+def build_virtual_file(
+    sources: pathlib.Path | str | Iterable[pathlib.Path | str],
+    out_path: pathlib.Path | str,
+    series: Iterable[str] | None = None,
+    start: int | None = None,
+    stop: int | None = None,
+) -> pathlib.Path:
+    """Builds an HDF5NK file whose series are virtual datasets concatenating HDF5NK source files in time order.
+
+    No samples are copied: reads of the virtual series are served from the sources, so a multi-day session can be
+    sliced as one dataset and a window of it is a view instead of a new file. Channel axes and attributes are copied
+    from the first source. Time axes are virtual as well unless a source uses a compact time axis, in which case the
+    merged discontinuity records are written instead.
+
+    Each series gets a segment table computed from its merged time axis. Pyramid levels and quality statistics are
+    not carried over, since their bins and blocks are aligned to the samples of each source file: overview reads of
+    the virtual file read the samples, and pyramid.build_pyramid or quality.build_quality can add them to it.
+
+    Args:
+        sources: A directory of HDF5NK files or the paths of the files.
+        out_path: The path of the virtual file to create.
+        series: The series to assemble, e.g. ["data_ieeg"], defaults to every series in the first source.
+        start: The first nanostamp to include, defaults to the start of the sources.
+        stop: The nanostamp after the last one to include, defaults to the end of the sources.
+
+    Returns:
+        The path of the virtual file.
+    """
+    out_path = pathlib.Path(out_path)
+    start = np.iinfo(np.int64).min if start is None else start
+    stop = np.iinfo(np.int64).max if stop is None else stop
+
+    with contextlib.ExitStack() as stack:
+        files = {path: stack.enter_context(h5py.File(path, "r")) for path in list_sources(sources)}
+        first_file = next(iter(files.values()))
+        if series is None:
+            series = [s for s, name in SERIES_DATASET_NAMES.items() if name in first_file]
+
+        with h5py.File(out_path, "w") as out_file:
+            _copy_attributes(first_file, out_file)
+            starts, ends = [], []
+            for series_name in series:
+                name = get_dataset_name(series_name)
+                slices = [find_source_slice(file, path, series_name, start, stop) for path, file in files.items()]
+                slices = sorted(
+                    (s for s in slices if s is not None),
+                    key=lambda s: int(get_time_axis(files[s.path][name])[s.start]),
+                )
+                if not slices:
+                    raise ValueError(f"No source has {series_name} samples inside the window.")
+                sources_series = [files[s.path][name] for s in slices]
+                if len({dataset.shape[1:] for dataset in sources_series}) > 1:
+                    raise ValueError(f"The {series_name} series of the sources have different channel counts.")
+                if len({dataset.dtype for dataset in sources_series}) > 1 or not _same_scaling(sources_series):
+                    raise ValueError(f"The {series_name} series of the sources have different sample formats.")
+
+                virtual_series = _virtual_concatenate(out_file, name, sources_series, slices, out_path.parent)
+                # The pyramid levels are not carried over, so the series must not claim to have them.
+                _copy_attributes(sources_series[0], virtual_series, exclude={PYRAMID_FACTORS})
+
+                source_time_axes = [get_time_axis(dataset) for dataset in sources_series]
+                time_name = f"{name}_time_axis"
+                if any(isinstance(axis, CompactTimeAxis) for axis in source_time_axes):
+                    time_axis = out_file.create_dataset(time_name, shape=(0,), maxshape=(None,), dtype=np.int64)
+                    _copy_attributes(sources_series[0].dims[0][0], time_axis)
+                    _write_compact_time_axis(virtual_series, sources_series, slices)
+                else:
+                    explicit_axes = [axis.dataset for axis in source_time_axes]
+                    time_axis = _virtual_concatenate(out_file, time_name, explicit_axes, slices, out_path.parent)
+                    _copy_attributes(explicit_axes[0], time_axis)
+                time_axis.make_scale("time_axis")
+                virtual_series.dims[0].attach_scale(time_axis)
+
+                for scale in sources_series[0].dims[1].values():
+                    channel_axis = out_file.create_dataset(scale.name, data=scale[...], dtype=scale.dtype)
+                    _copy_attributes(scale, channel_axis)
+                    channel_axis.make_scale(scale.attrs["NAME"].decode())
+                    virtual_series.dims[1].attach_scale(channel_axis)
+
+                write_segments(virtual_series, _concatenate_segments(sources_series, slices))
+
+                # The virtual datasets are not read back while the sources are open, HDF5 would reopen the sources
+                # with the write access of the virtual file.
+                first_time, last_time = source_time_axes[0], source_time_axes[-1]
+                starts.append(int(first_time[slices[0].start]))
+                ends.append(end_nanostamp(last_time[slices[-1].stop - 1], last_time.sample_rate))
+
+            out_file.attrs["start"] = min(starts)
+            out_file.attrs["end"] = max(ends)
+
+    return out_path
@@ -0,0 +1,296 @@
+"""windows.py
+Time-indexed reads of windows of electrical series across many HDF5NK files.
+"""
+# Package Header #
+from .header import *
+
+
+# Header #
+__author__ = __author__
+__credits__ = __credits__
+__maintainer__ = __maintainer__
+__email__ = __email__
+
+
+# Imports #
+# Standard Libraries #
+from collections.abc import Iterable
+import contextlib
+from dataclasses import dataclass
+import pathlib
+
+# Third-Party Packages #
+import h5py
+import numpy as np
+
+# Local Packages #
+from .chunkcache import CachedSeries
+from .chunkcache import ChunkCache
+from .layout import SERIES_DATASET_NAMES
+from .layout import get_dataset_name
+from .scaling import ScaledSeries
+from .segments import SEGMENT_COLUMNS
+from .segments import get_segments
+from .segments import merge_segments
+from .timeaxis import CompactTimeAxis
+from .timeaxis import ExplicitTimeAxis
+from .timeaxis import get_time_axis
+
+
+# Definitions #
+# Classes #
+@dataclass
+class SourceSlice:
+    """The samples of one source file which fall inside a window.
+
+    Attributes:
+        path: The path of the HDF5NK file.
+        start: The index of the first sample inside the window.
+        stop: The index after the last sample inside the window.
+    """
+
+    path: pathlib.Path
+    start: int
+    stop: int
+
+    @property
+    def length(self) -> int:
+        """The number of samples inside the window."""
+        return self.stop - self.start
+
+
+@dataclass
+class SegmentedWindow:
+    """The samples of a window with the continuous segments they form.
+
+    Attributes:
+        data: The (sample, channel) data of the window.
+        nanostamps: The nanostamps of the samples.
+        segments: The (segment, column) table of the window, with sample indices into data, see
+            segments.SEGMENT_COLUMNS.
+    """
+
+    data: np.ndarray
+    nanostamps: np.ndarray
+    segments: np.ndarray
+
+    def split(self) -> list[tuple[np.ndarray, np.ndarray]]:
+        """Splits the window at its gaps.
+
+        Returns:
+            The data and nanostamps of each continuous segment.
+        """
+        return [(self.data[start:stop], self.nanostamps[start:stop]) for start, stop in self.segments[:, :2]]
+
+
+# Functions #
+def is_source(path: pathlib.Path | str) -> bool:
+    """Checks if a file is an HDF5NK file, i.e. an HDF5 file with at least one electrical series dataset.
+
+    Args:
+        path: The path of the file.
+
+    Returns:
+        True if the file has an electrical series.
+    """
+    try:
+        with h5py.File(path, "r") as file:
+            return any(name in file for name in SERIES_DATASET_NAMES.values())
+    except OSError:
+        return False
+
+
+def list_sources(
+    sources: pathlib.Path | str | Iterable[pathlib.Path | str],
+    check: bool = True,
+) -> list[pathlib.Path]:
+    """Lists HDF5NK files from a directory or from an iterable of paths.
+
+    The .h5 files of a directory which are not HDF5NK files, e.g. a catalog or a virtual file saved next to the
+    recordings, are skipped. Paths given explicitly are all kept.
+
+    Args:
+        sources: A directory of .h5 files or the paths of the files.
+        check: Determines if the files of a directory are opened to skip those which are not HDF5NK files, when
+            False every .h5 file is listed and the caller checks them with is_source.
+
+    Returns:
+        The paths of the files.
+    """
+    if isinstance(sources, (str, pathlib.Path)) and pathlib.Path(sources).is_dir():
+        paths = sorted(pathlib.Path(sources).glob("*.h5"))
+        return [path for path in paths if is_source(path)] if check else paths
+    elif isinstance(sources, (str, pathlib.Path)):
+        return [pathlib.Path(sources)]
+    else:
+        return [pathlib.Path(source) for source in sources]
+
+
+def find_source_slice(
+    file: h5py.File,
+    path: pathlib.Path,
+    series: str,
+    start: int,
+    stop: int,
+    time_axis: ExplicitTimeAxis | CompactTimeAxis | None = None,
+) -> SourceSlice | None:
+    """Finds the samples of one file inside a [start, stop) nanostamp window by binary search.
+
+    The file "start"/"end" attributes are checked first so files outside the window are not searched. The end is
+    exclusive, and files whose end was not written yet, e.g. ones a LiveWriter is still appending to, are searched.
+
+    Args:
+        file: The open HDF5NK file.
+        path: The path of the file.
+        series: The series name.
+        start: The first nanostamp of the window.
+        stop: The nanostamp after the end of the window.
+        time_axis: The time axis of the series, to reuse it when searching many windows of the same file.
+
+    Returns:
+        The samples inside the window, or None if the file has none.
+    """
+    file_start = int(file.attrs.get("start", 0))
+    file_end = int(file.attrs.get("end", 0))
+    if file_start and file_end > file_start and (file_end <= start or file_start >= stop):
+        return None
+
+    if time_axis is None:
+        time_axis = get_time_axis(file[get_dataset_name(series)])
+    index_start = time_axis.searchsorted(start, side="left")
+    index_stop = time_axis.searchsorted(stop, side="left")
+    return SourceSlice(path, index_start, index_stop) if index_stop > index_start else None
+
+
+def read_window(
+    sources: pathlib.Path | str | Iterable[pathlib.Path | str],
+    start: int,
+    stop: int,
+    series: str = "data_ieeg",
+    cache: ChunkCache | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Reads the samples of a series inside a [start, stop) nanostamp window from many HDF5NK files.
+
+    Each file's time axis is binary searched, the output is allocated once for all files and only the overlapping
+    hyperslab of each file is read directly into it. Series stored as digital values are scaled to physical values
+    as they are read. With a cache, whole chunks are read and kept, so later overlapping windows are served from it.
+
+    Args:
+        sources: A directory of HDF5NK files or the paths of the files.
+        start: The first nanostamp of the window.
+        stop: The nanostamp after the end of the window.
+        series: The series name, e.g. "data_ieeg".
+        cache: The chunk cache to read the samples through, None to read them directly.
+
+    Returns:
+        The (sample, channel) data and the nanostamps of the samples, in time order. A window which no file overlaps
+        has no samples, but keeps the channel count of the series.
+    """
+    window = _read_window(sources, start, stop, series, cache, with_segments=False)
+    return window.data, window.nanostamps
+
+
+def read_segmented_window(
+    sources: pathlib.Path | str | Iterable[pathlib.Path | str],
+    start: int,
+    stop: int,
+    series: str = "data_ieeg",
+    cache: ChunkCache | None = None,
+) -> SegmentedWindow:
+    """Reads the samples of a series inside a window with the continuous segments they form.
+
+    The segments come from the stored segment table of each file (see segments.get_segments), clipped to the
+    samples inside the window, and segments of consecutive files which continue without a gap are merged. The gaps
+    are found without scanning the nanostamps of the window.
+
+    Args:
+        sources: A directory of HDF5NK files or the paths of the files.
+        start: The first nanostamp of the window.
+        stop: The nanostamp after the end of the window.
+        series: The series name, e.g. "data_ieeg".
+        cache: The chunk cache to read the samples through, None to read them directly.
+
+    Returns:
+        The samples of the window and their segments.
+    """
+    return _read_window(sources, start, stop, series, cache, with_segments=True)
+
+
+def _read_window(
+    sources: pathlib.Path | str | Iterable[pathlib.Path | str],
+    start: int,
+    stop: int,
+    series: str,
+    cache: ChunkCache | None,
+    with_segments: bool,
+) -> SegmentedWindow:
+    """Reads a window, see read_window, and the segment table of the window if with_segments is set."""
+    name = get_dataset_name(series)
+    segments = []
+    sample_rate = np.nan
+    empty_shape, empty_dtype = (0, 0), np.float64
+    with contextlib.ExitStack() as stack:
+        slices = []
+        files = {}
+        for path in list_sources(sources):
+            # Only the files which overlap the window are kept open until the samples are read.
+            file = h5py.File(path, "r")
+            source_slice = find_source_slice(file, path, series, start, stop)
+            if source_slice is None:
+                if empty_shape == (0, 0) and name in file:
+                    empty_shape, empty_dtype = (0, file[name].shape[1]), ScaledSeries(file[name]).dtype
+                file.close()
+                continue
+            files[path] = stack.enter_context(file)
+            slices.append((get_time_axis(file[name])[source_slice.start], source_slice))
+        slices = [source_slice for _, source_slice in sorted(slices, key=lambda item: int(item[0]))]
+
+        if not slices:
+            empty_segments = np.empty((0, len(SEGMENT_COLUMNS)), dtype=np.int64)
+            empty_data = np.empty(empty_shape, dtype=empty_dtype)
+            return SegmentedWindow(empty_data, np.empty((0,), dtype=np.int64), empty_segments)
+
+        if cache is None:
+            datasets = [ScaledSeries(files[s.path][name]) for s in slices]
+        else:
+            datasets = [CachedSeries(files[s.path][name], cache) for s in slices]
+        n_channels = datasets[0].shape[1]
+        if any(dataset.shape[1] != n_channels for dataset in datasets):
+            raise ValueError(f"The {series} series of the files have different channel counts.")
+
+        dtype = np.result_type(*(dataset.dtype for dataset in datasets))
+        data = np.empty((sum(s.length for s in slices), n_channels), dtype=dtype)
+        nanostamps = np.empty((data.shape[0],), dtype=np.int64)
+        position = 0
+        for source_slice, dataset in zip(slices, datasets):
+            out_slice = np.s_[position : position + source_slice.length]
+            if n_channels > 0:
+                dataset.read_direct(data, np.s_[source_slice.start : source_slice.stop], out_slice)
+            time_axis = get_time_axis(dataset.dataset)
+            nanostamps[out_slice] = time_axis[source_slice.start : source_slice.stop]
+            if with_segments:
+                segments.append(_clip_segments(get_segments(dataset.dataset), source_slice, position, nanostamps))
+                sample_rate = time_axis.sample_rate
+            position += source_slice.length
+
+    if not with_segments:
+        return SegmentedWindow(data, nanostamps, np.empty((0, len(SEGMENT_COLUMNS)), dtype=np.int64))
+    return SegmentedWindow(data, nanostamps, merge_segments(np.concatenate(segments), sample_rate))
+
+
+def _clip_segments(table: np.ndarray, source_slice: SourceSlice, position: int, nanostamps: np.ndarray) -> np.ndarray:
+    """Clips the segment table of a file to the samples of a window which were read from it.
+
+    Args:
+        table: The segment table of the file.
+        source_slice: The samples of the file inside the window.
+        position: The index of the first of those samples in the window.
+        nanostamps: The nanostamps of the window, filled up to the samples of this file.
+
+    Returns:
+        The segment table with sample indices into the window.
+    """
+    table = table[(table[:, 0] < source_slice.stop) & (table[:, 1] > source_slice.start)]
+    starts = np.maximum(table[:, 0], source_slice.start) - source_slice.start + position
+    stops = np.minimum(table[:, 1], source_slice.stop) - source_slice.start + position
+    return np.column_stack([starts, stops, nanostamps[starts], nanostamps[stops - 1]])
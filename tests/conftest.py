@@ -0,0 +1,97 @@
+"""Shared fixtures for the nkhdf5 test suite."""
+import datetime
+import pathlib
+
+import numpy as np
+import pytest
+
+from nkhdf5 import converter
+
+
+EDF_LABELS = [
+    "POL LA1",
+    "POL LA2",
+    "POL RH1",
+    "POL Fp1",
+    "POL C3",
+    "POL EKG1",
+    "POL DC01",
+    "POL EMG1",
+]
+EDF_START = datetime.datetime(2023, 7, 20, 13, 30, 0)
+
+
+def write_edf(
+    path: pathlib.Path,
+    digital: np.ndarray,
+    labels: list[str],
+    sample_rate: int,
+    record_duration: int = 1,
+    start: datetime.datetime = EDF_START,
+) -> pathlib.Path:
+    """Writes a minimal EDF file with int16 samples and a +/-3200 uV physical range."""
+    n_chan, n_samples = digital.shape
+    n_per_record = sample_rate * record_duration
+    n_records = n_samples // n_per_record
+
+    def field(value: object, width: int) -> bytes:
+        return str(value).ljust(width)[:width].encode("ascii")
+
+    header = b"".join(
+        [
+            field(0, 8),
+            field("X X X X", 80),
+            field("Startdate X X X X", 80),
+            field(start.strftime("%d.%m.%y"), 8),
+            field(start.strftime("%H.%M.%S"), 8),
+            field(256 * (n_chan + 1), 8),
+            field("", 44),
+            field(n_records, 8),
+            field(record_duration, 8),
+            field(n_chan, 4),
+        ]
+    )
+    signal_fields = [
+        (labels, 16),
+        (["" for _ in labels], 80),
+        (["uV" for _ in labels], 8),
+        ([-3200 for _ in labels], 8),
+        ([3200 for _ in labels], 8),
+        ([-32768 for _ in labels], 8),
+        ([32767 for _ in labels], 8),
+        (["HP:0.1Hz LP:300Hz" for _ in labels], 80),
+        ([n_per_record for _ in labels], 8),
+        (["" for _ in labels], 32),
+    ]
+    for values, width in signal_fields:
+        header += b"".join(field(v, width) for v in values)
+
+    records = digital[:, : n_records * n_per_record].astype("<i2")
+    records = records.reshape(n_chan, n_records, n_per_record).transpose(1, 0, 2)
+    path.write_bytes(header + records.tobytes())
+    return path
+
+
+@pytest.fixture
+def edf_digital() -> np.ndarray:
+    """Deterministic int16 samples for a 10 second, 256 Hz recording."""
+    rng = np.random.default_rng(0)
+    return rng.integers(-2000, 2000, size=(len(EDF_LABELS), 2560), dtype=np.int16)
+
+
+@pytest.fixture
+def edf_file(tmp_path: pathlib.Path, edf_digital: np.ndarray) -> pathlib.Path:
+    """A synthetic Nihon Kohden style EDF file."""
+    return write_edf(tmp_path / "recording.edf", edf_digital, EDF_LABELS, 256)
+
+
+@pytest.fixture
+def h5_dir(tmp_path: pathlib.Path, edf_digital: np.ndarray) -> pathlib.Path:
+    """Two consecutive 10 second recordings converted to HDF5NK, the second with a compact time axis."""
+    out_dir = tmp_path / "h5"
+    out_dir.mkdir()
+    for i, compact_time in enumerate([False, True]):
+        start = EDF_START + datetime.timedelta(seconds=10 * i)
+        edf_path = write_edf(tmp_path / f"rec{i}.edf", edf_digital + i, EDF_LABELS, 256, start=start)
+        converter.convert_edf(tmp_path, edf_path.name, out_dir / f"rec{i}.h5", "PR00", compact_time=compact_time)
+    return out_dir
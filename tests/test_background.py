@@ -0,0 +1,25 @@
+"""Test cases for the background module."""
+import pytest
+
+from nkhdf5 import background
+
+
+def test_background_writer_runs_in_order_and_raises_errors() -> None:
+    """Writes run in submission order and a failed write is raised to the caller."""
+    written = []
+    with background.BackgroundWriter(max_pending=1) as writer:
+        for i in range(5):
+            writer.submit(written.append, i)
+        writer.flush()
+        assert written == list(range(5)) and writer.writes == 5
+
+    def fail() -> None:
+        raise OSError("disk full")
+
+    writer = background.BackgroundWriter()
+    with pytest.raises(OSError, match="disk full"):
+        writer.submit(fail)
+        writer.flush()
+    writer.close()
+    with pytest.raises(RuntimeError):
+        writer.submit(written.append, 5)
@@ -0,0 +1,40 @@
+"""Test cases for the catalog module."""
+import pathlib
+import shutil
+
+import numpy as np
+
+from nkhdf5 import catalog
+
+
+def test_catalog_indexes_and_finds_overlaps(tmp_path: pathlib.Path, h5_dir: pathlib.Path) -> None:
+    """Files are indexed once, persisted, and found by window overlap."""
+    archive = catalog.ArchiveCatalog(tmp_path / "catalog.h5")
+    assert len(archive.update(h5_dir)) == 2
+    assert archive.update(h5_dir) == []
+
+    reloaded = catalog.ArchiveCatalog(tmp_path / "catalog.h5")
+    first, second = reloaded.entries
+    assert first.channel_counts == {"data_ieeg": 3, "data_scalpeeg": 2, "data_ekg": 1, "data_ttl": 1, "data_emg": 1}
+    assert first.n_samples == 2560
+    assert first.sample_rate == 256
+    np.testing.assert_array_equal(first.discontinuities, [[0, first.start]])
+    np.testing.assert_array_equal(second.discontinuities, [[0, second.start]])
+
+    assert reloaded.find_paths(first.start, first.start + 1) == [first.path]
+    assert reloaded.find_paths(second.start - 1, second.start + 1) == [first.path, second.path]
+    assert reloaded.find_paths(second.end, second.end + 10**9) == []
+
+    shutil.copy(first.path, h5_dir / "copy.h5")
+    (h5_dir / "rec1.h5").unlink()
+    assert reloaded.update(h5_dir) == [(h5_dir / "copy.h5").resolve()]
+    assert len(reloaded) == 2
+
+
+def test_catalog_inside_source_dir(h5_dir: pathlib.Path) -> None:
+    """A catalog saved in the directory it indexes is not indexed as a source."""
+    archive = catalog.ArchiveCatalog(h5_dir / "catalog.h5")
+    assert len(archive.update(h5_dir)) == 2
+    archive.save()
+    assert archive.update(h5_dir) == []
+    assert len(catalog.ArchiveCatalog(h5_dir / "catalog.h5")) == 2
@@ -0,0 +1,58 @@
+"""Test cases for the chunkcache module."""
+import pathlib
+
+import h5py
+import numpy as np
+
+from nkhdf5 import chunkcache
+from nkhdf5 import extraction
+from nkhdf5 import windows
+
+
+def test_cached_series_serves_repeated_reads(h5_dir: pathlib.Path) -> None:
+    """Cached reads match direct reads, repeated reads hit the cache and the byte budget is kept."""
+    cache = chunkcache.ChunkCache(max_bytes=3 * 512 * 3 * 4)
+    with h5py.File(h5_dir / "rec1.h5", "r") as file:
+        dataset = file["intracranialEEG"]
+        series = chunkcache.CachedSeries(dataset, cache, block_rows=512)
+        np.testing.assert_array_equal(series[100:1200], dataset[100:1200])
+        assert (cache.stats.hits, cache.stats.misses) == (0, 3)
+        np.testing.assert_array_equal(series[600:1100, 1], dataset[600:1100, 1])
+        assert cache.stats.hits == 2
+        np.testing.assert_array_equal(series[2000:1000:-3], dataset[...][2000:1000:-3])
+        assert cache.stats.nbytes <= cache.max_bytes and cache.stats.evictions > 0
+
+    start, stop = 10**18, 2 * 10**18
+    window_cache = chunkcache.ChunkCache()
+    expected = windows.read_window(h5_dir, start, stop)
+    for _ in range(2):
+        data, nanostamps = windows.read_window(h5_dir, start, stop, cache=window_cache)
+        np.testing.assert_array_equal(data, expected[0])
+        np.testing.assert_array_equal(nanostamps, expected[1])
+    assert window_cache.stats.hits == window_cache.stats.misses
+
+
+def test_rewritten_files_are_not_served_from_the_cache(tmp_path: pathlib.Path) -> None:
+    """Blocks cached before a file was rewritten with the same shape are not returned for the new file."""
+    path = tmp_path / "series.h5"
+    cache = chunkcache.ChunkCache()
+    for fill in (1.0, 2.0):
+        with h5py.File(path, "w") as file:
+            file.create_dataset("intracranialEEG", data=np.full((1000, 2), fill), chunks=(100, 2))
+        with h5py.File(path, "r") as file:
+            np.testing.assert_array_equal(chunkcache.CachedSeries(file["intracranialEEG"], cache)[:], fill)
+    assert cache.stats.hits == 0
+
+
+def test_scheduler_tunes_raw_chunk_cache(h5_dir: pathlib.Path) -> None:
+    """Direct reads through datasets with their own raw chunk cache match reads with the file settings."""
+    requests = [(0, 2 * 10**18), (10**18, 2 * 10**18)]
+    with h5py.File(h5_dir / "rec0.h5", "r") as file:
+        options = chunkcache.get_chunk_cache_options(file["intracranialEEG"], 8)
+        tuned = chunkcache.open_dataset(file, "intracranialEEG", **options)
+        assert tuned.id.get_access_plist().get_chunk_cache()[1:] == (options["rdcc_nbytes"], 0.75)
+
+    with extraction.WindowScheduler(h5_dir) as plain, extraction.WindowScheduler(h5_dir, chunk_cache_chunks=8) as fast:
+        for expected, actual in zip(plain.read(requests), fast.read(requests)):
+            np.testing.assert_array_equal(actual.data, expected.data)
+            np.testing.assert_array_equal(actual.nanostamps, expected.nanostamps)
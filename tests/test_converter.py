@@ -0,0 +1,139 @@
+"""Test cases for the converter module."""
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import pathlib
+
+import h5py
+import numpy as np
+import pytest
+
+from nkhdf5 import converter
+from nkhdf5 import timeaxis
+from nkhdf5.edfreader import edf_reader
+from nkhdf5.hdf5nk import HDF5NK_0_1_0
+
+
+@pytest.fixture
+def edf_contents(edf_file: pathlib.Path) -> dict:
+    """The fully loaded contents of the synthetic EDF."""
+    return edf_reader(edf_file.parent, edf_file.name)
+
+
+@pytest.mark.parametrize("block_size, write_queue", [(300, 2), (2560, 0), (10000, 1)])
+def test_convert_edf_matches_full_read(
+    tmp_path: pathlib.Path, edf_file: pathlib.Path, edf_contents: dict, block_size: int, write_queue: int
+) -> None:
+    """Block-wise conversion writes the same samples as a whole-file read, with or without a background writer."""
+    out_path = converter.convert_edf(
+        edf_file.parent, edf_file.name, tmp_path / "out.h5", "PR00", block_size=block_size, write_queue=write_queue
+    )
+    indices = converter.get_series_indices(edf_contents["edf_chantype_idx"])
+
+    with HDF5NK_0_1_0(file=out_path) as f_obj:
+        for series, idx in indices.items():
+            expected = edf_contents["edf_data"][idx].T
+            assert f_obj[series].shape == expected.shape
+            np.testing.assert_allclose(f_obj[series][...], expected, rtol=1e-6)
+            assert f_obj[series].axes[0]["time_axis"].shape == (expected.shape[0],)
+        assert f_obj["data_emg"].shape == (2560, 1)
+        assert f_obj.attributes["subject_id"] == "PR00"
+
+
+def test_series_writer_dispatches_one_block(tmp_path: pathlib.Path, edf_contents: dict) -> None:
+    """A decoded block of every channel is split by channel type and appended with shared nanostamps."""
+    indices = converter.get_series_indices(edf_contents["edf_chantype_idx"])
+    nanostamps = np.arange(2560, dtype=np.int64) * 3_906_250
+    with HDF5NK_0_1_0(file=tmp_path / "out.h5", mode="a", create=True, construct=True) as f_obj:
+        writer = converter.SeriesWriter(f_obj, indices)
+        writer.write_metadata(edf_contents)
+        writer.append_block(edf_contents["edf_data"], nanostamps)
+
+        for series, idx in indices.items():
+            np.testing.assert_allclose(f_obj[series][...], edf_contents["edf_data"][idx].T, rtol=1e-6)
+            np.testing.assert_array_equal(f_obj[series].axes[0]["time_axis"][...], nanostamps)
+
+
+def test_convert_edf_shares_time_axis(tmp_path: pathlib.Path, edf_file: pathlib.Path) -> None:
+    """Every series links to one time axis dataset, written once, unless separate axes are requested."""
+    shared = converter.convert_edf(edf_file.parent, edf_file.name, tmp_path / "shared.h5", "PR00", block_size=700)
+    separate = converter.convert_edf(
+        edf_file.parent, edf_file.name, tmp_path / "separate.h5", "PR00", block_size=700, shared_time=False
+    )
+
+    with h5py.File(shared, "r") as f_shared, h5py.File(separate, "r") as f_separate:
+        axis = f_shared["intracranialEEG_time_axis"]
+        for name in ("scalpEEG", "EKG", "DCChannel", "EMG"):
+            assert f_shared[f"{name}_time_axis"] == axis
+            assert f_shared[name].dims[0][0] == axis
+            assert f_separate[f"{name}_time_axis"] != f_separate["intracranialEEG_time_axis"]
+        np.testing.assert_array_equal(axis[...], f_separate["EKG_time_axis"][...])
+    with HDF5NK_0_1_0(file=shared) as f_obj:
+        assert f_obj["data_ekg"].axes[0]["time_axis"].shape == (2560,)
+    assert shared.stat().st_size < separate.stat().st_size
+
+
+def test_convert_edfs_isolates_failures_and_resumes(tmp_path: pathlib.Path, edf_file: pathlib.Path) -> None:
+    """A bad EDF fails on its own and finished outputs are skipped on resume."""
+    (edf_file.parent / "broken.edf").write_bytes(b"not an edf")
+    out_dir = tmp_path / "out"
+    seen = []
+
+    results = converter.convert_edfs(
+        edf_file.parent, [edf_file.name, "broken.edf"], out_dir, "PR00", jobs=2, progress=seen.append
+    )
+    assert [r.status for r in results] == ["converted", "failed"]
+    assert len(seen) == 2
+    assert HDF5NK_0_1_0.is_openable(results[0].out_path)
+    assert list(out_dir.glob("*.part")) == []
+
+    resumed = converter.convert_edfs(edf_file.parent, [edf_file.name], out_dir, "PR00", resume=True)
+    assert resumed[0].status == "skipped"
+
+
+def test_convert_edfs_records_broken_workers(
+    tmp_path: pathlib.Path, edf_file: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A job whose worker process dies is recorded as failed instead of aborting the batch."""
+
+    class BrokenExecutor:
+        """Runs the first job and fails the others as if their worker had died."""
+
+        def __init__(self, max_workers: int) -> None:
+            self.submitted = 0
+
+        def __enter__(self) -> "BrokenExecutor":
+            return self
+
+        def __exit__(self, *exc_info) -> None:
+            pass
+
+        def submit(self, function, *args) -> Future:
+            future = Future()
+            if self.submitted == 0:
+                future.set_result(function(*args))
+            else:
+                future.set_exception(BrokenProcessPool("A worker process terminated abruptly."))
+            self.submitted += 1
+            return future
+
+    monkeypatch.setattr(converter, "ProcessPoolExecutor", BrokenExecutor)
+    results = converter.convert_edfs(edf_file.parent, [edf_file.name, "other.edf"], tmp_path, "PR00", jobs=2)
+
+    assert [(r.edf_fn, r.status) for r in results] == [(edf_file.name, "converted"), ("other.edf", "failed")]
+    assert results[1].error.startswith("BrokenProcessPool")
+
+
+def test_convert_edf_compact_time(tmp_path: pathlib.Path, edf_file: pathlib.Path) -> None:
+    """A compact time axis materializes the same nanostamps as an explicit one."""
+    explicit = converter.convert_edf(edf_file.parent, edf_file.name, tmp_path / "explicit.h5", "PR00", block_size=700)
+    compact = converter.convert_edf(
+        edf_file.parent, edf_file.name, tmp_path / "compact.h5", "PR00", block_size=700, compact_time=True
+    )
+
+    with HDF5NK_0_1_0(file=explicit) as f_explicit, HDF5NK_0_1_0(file=compact) as f_compact:
+        expected = f_explicit["data_ieeg"].axes[0]["time_axis"][...]
+        axis = timeaxis.get_time_axis(f_compact["data_ieeg"])
+        assert isinstance(axis, timeaxis.CompactTimeAxis)
+        assert f_compact["data_ieeg"].axes[0]["time_axis"].shape == (0,)
+        assert axis.records.shape == (1, 2)
+        np.testing.assert_array_equal(axis[:], expected)
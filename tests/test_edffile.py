@@ -0,0 +1,96 @@
+"""Test cases for the edffile module."""
+import datetime
+import logging
+import pathlib
+
+import numpy as np
+import pytest
+
+from nkhdf5 import edffile
+from nkhdf5.edfreader import edf_reader
+from nkhdf5.edfreader import edf_source
+
+from .conftest import EDF_LABELS
+from .conftest import EDF_START
+from .conftest import write_edf
+
+
+def test_native_reader_matches_mne(edf_file: pathlib.Path) -> None:
+    """The native reader returns the same samples and metadata as the MNE fallback."""
+    native = edf_reader(edf_file.parent, edf_file.name)
+    mne = edf_reader(edf_file.parent, edf_file.name, backend="mne")
+
+    assert isinstance(native["edf_raw"], edffile.EDFFile)
+    for key in ("edf_start", "edf_end", "edf_nsample", "edf_sfreq", "edf_lowpass", "edf_highpass", "edf_nchan"):
+        assert native[key] == mne[key], key
+    assert native["edf_raw_chanlabs"] == mne["edf_raw_chanlabs"]
+    np.testing.assert_allclose(native["edf_data"], mne["edf_data"], rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(native["edf_time_axis"], mne["edf_time_axis"])
+
+
+def test_reads_touch_only_the_requested_samples(edf_file: pathlib.Path, edf_digital: np.ndarray) -> None:
+    """Digital reads across record boundaries and channel views come straight from the mapped records."""
+    with edffile.EDFFile(edf_file) as edf:
+        assert edf.sample_rate == 256 and len(edf) == 2560
+        np.testing.assert_array_equal(edf.read_digital(250, 530, [6, 0]), edf_digital[[6, 0], 250:530])
+
+        view = edf.get_channel_view(2)
+        assert view.shape == (10, 256)
+        assert np.shares_memory(view, edf.records)
+        np.testing.assert_array_equal(view.reshape(-1), edf_digital[2])
+
+
+def test_lazy_source_selects_channels_and_samples(edf_file: pathlib.Path, edf_digital: np.ndarray) -> None:
+    """Indexing the lazy source reads the same samples as a full read."""
+    source = edf_source(edf_file.parent, edf_file.name)
+    full = edf_reader(edf_file.parent, edf_file.name)["edf_data"]
+
+    assert source.shape == (8, 2560)
+    np.testing.assert_allclose(source[["LA2", 0], 300:900:3], full[[1, 0], 300:900:3])
+    np.testing.assert_allclose(source["POL C3", -1], full[4, -1])
+    np.testing.assert_allclose(source.get_window(slice(0, 3), 1.0, 2.0), full[:3, 256:512])
+
+    digital = edf_source(edf_file.parent, edf_file.name, digital=True)
+    np.testing.assert_array_equal(digital[5, 2000:100:-7], edf_digital[5, 2000:100:-7])
+
+
+def write_edf_plus(path: pathlib.Path, edf_digital: np.ndarray, file_type: str, onset: float) -> pathlib.Path:
+    """Writes an EDF+ file whose annotation signal keeps the onset of each one second record."""
+    records = []
+    for record in range(edf_digital.shape[1] // 256):
+        tal = f"+{record + onset:g}\x14\x14\x00".encode("latin-1").ljust(512, b"\x00")
+        records.append(np.frombuffer(tal, dtype="<i2"))
+    digital = np.vstack([edf_digital, np.concatenate(records)])
+    write_edf(path, digital, [*EDF_LABELS, edffile.ANNOTATIONS_LABEL], 256)
+    with path.open("r+b") as file:
+        file.seek(192)
+        file.write(file_type.ljust(44).encode("ascii"))
+    return path
+
+
+def test_edf_plus_start_includes_subsecond_onset(tmp_path: pathlib.Path, edf_digital: np.ndarray) -> None:
+    """The native reader adds the subsecond start of the first record and skips the annotation signal."""
+    path = write_edf_plus(tmp_path / "plus.edf", edf_digital, "EDF+C", 0.25)
+    native = edf_reader(tmp_path, path.name, load_data=False)
+
+    assert isinstance(native["edf_raw"], edffile.EDFFile)
+    assert native["edf_start"] == EDF_START + datetime.timedelta(seconds=0.25)
+    assert native["edf_nchan"] == len(EDF_LABELS)
+
+
+def test_only_unsupported_files_fall_back_to_mne(
+    tmp_path: pathlib.Path, edf_digital: np.ndarray, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Discontinuous EDF+D files are read with MNE and logged, while broken files raise their error."""
+    path = write_edf_plus(tmp_path / "discontinuous.edf", edf_digital, "EDF+D", 0.0)
+    with pytest.raises(edffile.UnsupportedEDFError):
+        edffile.EDFFile(path)
+
+    with caplog.at_level(logging.INFO, logger="nkhdf5.edfreader"):
+        contents = edf_reader(tmp_path, path.name, load_data=False)
+    assert not isinstance(contents["edf_raw"], edffile.EDFFile)
+    assert "discontinuous.edf" in caplog.text
+
+    (tmp_path / "broken.edf").write_bytes(b"not an edf")
+    with pytest.raises(ValueError, match="too short"):
+        edf_reader(tmp_path, "broken.edf", load_data=False)
@@ -0,0 +1,122 @@
+"""Test cases for the extraction module."""
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+import pathlib
+
+import h5py
+import numpy as np
+import pytest
+
+from nkhdf5 import extraction
+from nkhdf5 import windows
+from nkhdf5.timestamps import end_nanostamp
+
+
+def test_write_event_windows_matches_read_window(tmp_path: pathlib.Path, h5_dir: pathlib.Path) -> None:
+    """Each event window holds the samples before its event, including windows across files."""
+    _, full_nanostamps = windows.read_window(h5_dir, 0, np.iinfo(np.int64).max)
+    duration = 6 * 10**9
+    events = [int(full_nanostamps[3000]), int(full_nanostamps[2000]), 10**9]
+
+    out_paths = extraction.write_event_windows(h5_dir, events, duration, tmp_path / "out", subject_id="PR00")
+    assert out_paths[2] is None
+    assert out_paths[0].name == "sub-PR00_task-biomarker_0001_ieeg.h5"
+
+    for event, out_path in zip(events[:2], out_paths[:2]):
+        expected_data, expected_nanostamps = windows.read_window(h5_dir, event - duration, event + 1)
+        with h5py.File(out_path, "r") as file:
+            np.testing.assert_array_equal(file["intracranialEEG"][...], expected_data)
+            np.testing.assert_array_equal(file["intracranialEEG_time_axis"][...], expected_nanostamps)
+            assert file["intracranialEEG_channellabel_axis"].shape == (3, 2)
+            assert file.attrs["end"] == end_nanostamp(event, 256.0)
+
+
+def test_scheduler_merges_overlapping_reads(h5_dir: pathlib.Path) -> None:
+    """Overlapping windows are read once per source and match read_window, also in small batches."""
+    _, full_nanostamps = windows.read_window(h5_dir, 0, np.iinfo(np.int64).max)
+    requests = [
+        (int(full_nanostamps[100]), int(full_nanostamps[2900])),
+        (int(full_nanostamps[1500]), int(full_nanostamps[3500])),
+        (int(full_nanostamps[200]), int(full_nanostamps[300])),
+        (0, 10**9),
+    ]
+
+    with extraction.WindowScheduler(h5_dir, max_open_files=1) as scheduler:
+        reads = scheduler.read(requests)
+        batches = list(scheduler.iter_batches(requests, max_bytes=1))
+
+    assert reads[3] is None
+    assert [batch for batch, _ in batches] == [[3], [0], [2], [1]]
+    batched = {batch[0]: series_windows["data_ieeg"][0] for batch, series_windows in batches}
+    for i, (start, stop) in enumerate(requests[:3]):
+        expected_data, expected_nanostamps = windows.read_window(h5_dir, start, stop)
+        for window in (reads[i], batched[i]):
+            np.testing.assert_array_equal(window.data, expected_data)
+            np.testing.assert_array_equal(window.nanostamps, expected_nanostamps)
+
+
+def test_write_window_opens_each_source_once(
+    tmp_path: pathlib.Path, h5_dir: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Every series of a window is read through one scheduler, so each source is opened once."""
+    caches = []
+
+    class RecordingCache(extraction.FileHandleCache):
+        def __init__(self, *args: object, **kwargs: object) -> None:
+            super().__init__(*args, **kwargs)
+            caches.append(self)
+
+    monkeypatch.setattr(extraction, "FileHandleCache", RecordingCache)
+    _, full_nanostamps = windows.read_window(h5_dir, 0, np.iinfo(np.int64).max)
+    start, stop = int(full_nanostamps[2000]), int(full_nanostamps[3000])
+    out_path = extraction.write_window(h5_dir, tmp_path / "window.h5", start, stop)
+
+    assert len(caches) == 1 and caches[0].opens == 2
+    with h5py.File(out_path, "r") as file:
+        assert file["intracranialEEG"].shape == (1000, 3) and file["EKG"].shape == (1000, 1)
+
+
+def test_write_windows_records_broken_workers(
+    tmp_path: pathlib.Path, h5_dir: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """A window whose worker process dies is recorded as failed instead of aborting the batch."""
+
+    class BrokenExecutor:
+        """Runs the first job and fails the others as if their worker had died."""
+
+        def __init__(self, max_workers: int) -> None:
+            self.submitted = 0
+
+        def __enter__(self) -> "BrokenExecutor":
+            return self
+
+        def __exit__(self, *exc_info) -> None:
+            pass
+
+        def submit(self, function, *args) -> Future:
+            future = Future()
+            if self.submitted == 0:
+                future.set_result(function(*args))
+            else:
+                future.set_exception(BrokenProcessPool("A worker process terminated abruptly."))
+            self.submitted += 1
+            return future
+
+    _, full_nanostamps = windows.read_window(h5_dir, 0, np.iinfo(np.int64).max)
+    requests = [
+        extraction.ExtractionWindow("first.h5", int(full_nanostamps[0]), int(full_nanostamps[1000])),
+        extraction.ExtractionWindow("second.h5", int(full_nanostamps[1000]), int(full_nanostamps[2000])),
+    ]
+    monkeypatch.setattr(extraction, "ProcessPoolExecutor", BrokenExecutor)
+    results = extraction.write_windows(h5_dir, requests, tmp_path, jobs=2)
+
+    assert [(r.name, r.status) for r in results] == [("first.h5", "written"), ("second.h5", "failed")]
+    assert results[1].error.startswith("BrokenProcessPool")
+
+
+def test_write_windows_rejects_duplicate_names(tmp_path: pathlib.Path, h5_dir: pathlib.Path) -> None:
+    """Windows which would write the same file are rejected before any is written."""
+    requests = [extraction.ExtractionWindow("same.h5", 0, 10), extraction.ExtractionWindow("same.h5", 10, 20)]
+    with pytest.raises(ValueError, match="same.h5"):
+        extraction.write_windows(h5_dir, requests, tmp_path / "out")
+    assert not (tmp_path / "out").exists()
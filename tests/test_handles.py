@@ -0,0 +1,17 @@
+"""Test cases for the handles module."""
+import pathlib
+
+from nkhdf5 import handles
+
+
+def test_file_handle_cache_evicts_least_recently_used(h5_dir: pathlib.Path) -> None:
+    """Open files are reused and the least recently used one is closed at the limit."""
+    first, second = sorted(h5_dir.glob("*.h5"))
+    with handles.FileHandleCache(max_open=1) as cache:
+        file = cache.get(first)
+        assert cache.get(first) is file
+        cache.get(second)
+        assert first not in cache and second in cache
+        assert not file.id.valid
+        assert (cache.opens, cache.hits, len(cache)) == (2, 1, 1)
+    assert len(cache) == 0
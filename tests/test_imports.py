@@ -0,0 +1,25 @@
+"""Test cases for the lazy imports of the package."""
+import subprocess
+import sys
+
+import pytest
+
+
+def loaded_modules(statement: str, modules: tuple[str, ...]) -> set[str]:
+    """Runs a statement in a fresh interpreter and returns which of the modules it imported."""
+    check = f"import sys; {statement}; print(' '.join(m for m in {modules!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", check], check=True, capture_output=True, text=True)
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize(
+    "statement", ["import nkhdf5", "import nkhdf5.__main__", "import nkhdf5.catalog", "import nkhdf5.windows"]
+)
+def test_light_entry_points_skip_heavy_dependencies(statement: str) -> None:
+    """The package, the CLI and time-index queries do not load hdf5objects, MNE, SciPy or pandas."""
+    assert loaded_modules(statement, ("hdf5objects", "mne", "scipy", "pandas")) == set()
+
+
+def test_submodules_load_on_attribute_access() -> None:
+    """Submodules are imported when first accessed from the package."""
+    assert loaded_modules("import nkhdf5; nkhdf5.hdf5nk", ("hdf5objects",)) == {"hdf5objects"}
@@ -0,0 +1,65 @@
+"""Test cases for the live module."""
+import pathlib
+
+import h5py
+import numpy as np
+
+from nkhdf5 import live
+from nkhdf5 import pyramid
+from nkhdf5 import quality
+from nkhdf5.hdf5nk import HDF5NK_0_1_0
+from nkhdf5.timestamps import sample_nanostamps
+
+
+def test_reader_tails_live_appends(tmp_path: pathlib.Path) -> None:
+    """A reader follows the samples appended in SWMR mode and the closed file is a valid HDF5NK file."""
+    path = tmp_path / "live.h5"
+    start = 1_689_870_600_000_000_000
+    blocks = np.arange(300 * 4, dtype=np.float32).reshape(300, 4)
+    ekg = np.ones((300, 1), dtype=np.float32)
+    labels = np.array([["LA1", "ECOG"], ["LA2", "ECOG"], ["LA3", "ECOG"], ["LA4", "ECOG"]], dtype=object)
+
+    with live.LiveWriter(
+        path, "PR00", start, 1000.0, {"data_ieeg": 4, "data_ekg": 1}, {"data_ieeg": labels}, flush_interval=0
+    ) as writer:
+        with live.LiveReader(path, series=("data_ieeg", "data_ekg")) as reader:
+            assert reader.read_new() == {}
+            writer.append({"data_ieeg": blocks[:100], "data_ekg": ekg[:100]})
+            first = reader.read_new()
+            writer.append({"data_ieeg": blocks[100:], "data_ekg": ekg[100:]}, start=start + 10**9)
+            tailed = list(reader.tail(timeout=0.05, poll_interval=0.01))
+
+    np.testing.assert_array_equal(first["data_ieeg"][0], blocks[:100])
+    np.testing.assert_array_equal(first["data_ieeg"][1], sample_nanostamps(start, 1000.0, 0, 100))
+    assert len(tailed) == 1
+    np.testing.assert_array_equal(tailed[0]["data_ieeg"][0], blocks[100:])
+    np.testing.assert_array_equal(tailed[0]["data_ekg"][0], ekg[100:])
+    assert tailed[0]["data_ieeg"][1][0] == start + 10**9
+    assert writer.n_samples == 300 and writer.flushes >= 2
+
+    assert HDF5NK_0_1_0.is_openable(path)
+    with HDF5NK_0_1_0(file=path, mode="r") as f_obj:
+        assert f_obj.attributes["end"] == tailed[0]["data_ieeg"][1][-1] + 10**6
+        assert f_obj["data_ieeg"].shape == (300, 4)
+        assert f_obj["data_scalpeeg"].shape == (300, 0)
+
+
+def test_writer_builds_side_datasets_while_appending(tmp_path: pathlib.Path) -> None:
+    """The pyramid and quality datasets are extended in SWMR mode and their partial blocks are written on close."""
+    path = tmp_path / "live.h5"
+    blocks = np.arange(250 * 2, dtype=np.float32).reshape(250, 2)
+
+    with live.LiveWriter(path, "PR00", 0, 1000.0, {"data_ieeg": 2}, pyramid_factors=(10, 100), quality=True) as writer:
+        for start in range(0, 250, 70):
+            writer.append({"data_ieeg": blocks[start : start + 70]})
+
+    with h5py.File(path, "r") as file:
+        assert pyramid.get_pyramid_factors(file["intracranialEEG"]) == (10, 100)
+        coarse = file[pyramid.get_level_name("/intracranialEEG", 100)][...]
+        assert "scalpEEG_pyramid_10" not in file
+        statistics = quality.read_quality(file)
+    np.testing.assert_array_equal(coarse[:, 0], blocks[[0, 100, 200]])
+    np.testing.assert_array_equal(coarse[:, 1], blocks[[99, 199, 249]])
+    np.testing.assert_allclose(coarse[2, 2], blocks[200:].mean(axis=0))
+    np.testing.assert_allclose(statistics.max, blocks.max(axis=0, keepdims=True))
+    assert statistics.counts.tolist() == [250] and np.isnan(statistics.clipped).all()
@@ -1,4 +1,7 @@
 """Test cases for the __main__ module."""
+import pathlib
+
+import h5py
 import pytest
 from click.testing import CliRunner
 
@@ -15,3 +18,70 @@ def test_main_succeeds(runner: CliRunner) -> None:
     """It exits with a status code of zero."""
     result = runner.invoke(__main__.main)
     assert result.exit_code == 0
+
+
+def test_convert_writes_files(runner: CliRunner, tmp_path: pathlib.Path, edf_file: pathlib.Path) -> None:
+    """The convert subcommand converts every EDF in the directory."""
+    out_dir = tmp_path / "out"
+    result = runner.invoke(__main__.main, ["convert", str(edf_file.parent), str(out_dir), "--subject", "PR00"])
+    assert result.exit_code == 0, result.output
+    assert "converted: recording.edf" in result.output
+    assert len(list(out_dir.glob("*.h5"))) == 1
+
+
+def test_concat_writes_windows_from_csv(runner: CliRunner, tmp_path: pathlib.Path, h5_dir: pathlib.Path) -> None:
+    """The concat subcommand writes each CSV window spanning both files, in parallel and resumably."""
+    windows = tmp_path / "windows.csv"
+    windows.write_text(
+        "name,start,end\n"
+        "a.h5,2023-07-20 13:30:05,2023-07-20 13:30:15\n"
+        "b.h5,2023-07-20 13:30:00,2023-07-20 13:30:01\n"
+    )
+    out_dir = tmp_path / "windows"
+    args = ["concat", str(h5_dir), str(out_dir), "--windows", str(windows), "--series", "data_ieeg"]
+
+    result = runner.invoke(__main__.main, args + ["-j", "2", "--compression", "gzip"])
+    assert result.exit_code == 0, result.output
+    with h5py.File(out_dir / "a.h5", "r") as file:
+        assert file["intracranialEEG"].shape == (2560, 3)
+        assert file["intracranialEEG"].compression == "gzip"
+        assert file["intracranialEEG_channellabel_axis"].shape == (3, 2)
+
+    resumed = runner.invoke(__main__.main, args + ["--resume"])
+    assert "skipped: a.h5" in resumed.output and "skipped: b.h5" in resumed.output
+
+    windows.write_text(windows.read_text() + "a.h5,2023-07-20 13:30:02,2023-07-20 13:30:03\n")
+    duplicated = runner.invoke(__main__.main, args)
+    assert duplicated.exit_code != 0 and "repeated: a.h5" in duplicated.output
+
+
+def test_compression_level_applies_to_gzip_presets(
+    runner: CliRunner, tmp_path: pathlib.Path, h5_dir: pathlib.Path
+) -> None:
+    """A level without --compression sets the level of a gzip preset and is rejected for others."""
+    args = ["concat", str(h5_dir), str(tmp_path / "out"), "--start", "2023-07-20 13:30:00"]
+    args += ["--end", "2023-07-20 13:30:01", "--name", "a.h5", "--series", "data_ieeg", "--compression-level", "4"]
+
+    result = runner.invoke(__main__.main, args + ["--storage", "archive"])
+    assert result.exit_code == 0, result.output
+    with h5py.File(tmp_path / "out" / "a.h5", "r") as file:
+        assert file["intracranialEEG"].compression_opts == 4
+
+    rejected = runner.invoke(__main__.main, args)
+    assert rejected.exit_code != 0 and "--compression-level needs gzip" in rejected.output
+
+
+def test_inspect_and_catalog(runner: CliRunner, tmp_path: pathlib.Path, h5_dir: pathlib.Path) -> None:
+    """The inspect and catalog subcommands report the layout and time index of the files."""
+    result = runner.invoke(__main__.main, ["inspect", str(h5_dir / "rec1.h5")])
+    assert result.exit_code == 0, result.output
+    assert "data_ieeg (intracranialEEG):" in result.output
+    assert "time axis: CompactTimeAxis" in result.output
+    assert "segments: 1" in result.output
+
+    catalog_path = str(tmp_path / "catalog.h5")
+    result = runner.invoke(__main__.main, ["catalog", "update", catalog_path, str(h5_dir)])
+    assert "indexed 2 file(s), 2 in catalog" in result.output
+    window = ["2023-07-20 13:30:12", "2023-07-20 13:30:13"]
+    result = runner.invoke(__main__.main, ["catalog", "find", catalog_path, *window])
+    assert result.output.strip().endswith("rec1.h5")
@@ -0,0 +1,48 @@
+"""Test cases for the montage module."""
+import numpy as np
+
+from nkhdf5 import montage
+from nkhdf5.edfreader import default_montage
+
+
+NAMES = ["LA1", "LA10", "RH2", "Fp1", "C3", "EKG1", "EOG2", "DC01", "EMG1", "EKG"]
+
+
+def test_classify_assigns_types_and_labels() -> None:
+    """Channels are typed by prefix and labels split into letters and numbers."""
+    classification = default_montage.classify(NAMES)
+
+    assert classification.chantypes == (
+        "intracranial EEG",
+        "intracranial EEG",
+        "intracranial EEG",
+        "scalp EEG",
+        "scalp EEG",
+        "EKG",
+        "EKG",
+        "TTL",
+        "EMG",
+        "EKG",
+    )
+    np.testing.assert_array_equal(classification.indices[montage.IEEG_TYPE], [0, 1, 2])
+    np.testing.assert_array_equal(classification.indices[montage.SCALP_TYPE], [3, 4])
+    assert classification.labels[1] == ("LA", "10")
+    assert classification.labels[-1] == ("EKG", "")
+
+
+def test_classify_caches_per_montage() -> None:
+    """The same channel list returns the same classification object."""
+    classifier = montage.ChannelMontage(["LA"], ["DC"], ["EKG"], ["EMG"])
+    assert classifier.classify(NAMES) is classifier.classify(list(NAMES))
+    assert classifier.classify(NAMES[:3]) is not classifier.classify(NAMES)
+
+
+def test_classify_cache_is_bounded() -> None:
+    """Only the most recently used montages stay cached."""
+    classifier = montage.ChannelMontage(["LA"], ["DC"], ["EKG"], ["EMG"], max_montages=2)
+    first = classifier.classify(NAMES[:1])
+    second = classifier.classify(NAMES[:2])
+    assert classifier.classify(NAMES[:1]) is first
+    classifier.classify(NAMES[:3])
+    assert classifier.classify(NAMES[:1]) is first
+    assert classifier.classify(NAMES[:2]) is not second
@@ -0,0 +1,87 @@
+"""Test cases for the pyramid module."""
+import pathlib
+
+import h5py
+import numpy as np
+import pytest
+
+from nkhdf5 import converter
+from nkhdf5 import pyramid
+from nkhdf5.edfreader import edf_reader
+
+
+def summarize(samples: np.ndarray, factor: int) -> np.ndarray:
+    """The (bin, statistic, channel) min, max and mean of bins of factor samples, the last one may be partial."""
+    bins = [samples[i : i + factor] for i in range(0, len(samples), factor)]
+    return np.stack([np.stack([b.min(axis=0), b.max(axis=0), b.mean(axis=0)]) for b in bins])
+
+
+@pytest.mark.parametrize("digital, write_queue", [(False, 2), (True, 0)])
+def test_convert_edf_builds_pyramid(
+    tmp_path: pathlib.Path, edf_file: pathlib.Path, digital: bool, write_queue: int
+) -> None:
+    """Every level built block by block during conversion matches the bins of the whole recording."""
+    edf_contents = edf_reader(edf_file.parent, edf_file.name)
+    indices = converter.get_series_indices(edf_contents["edf_chantype_idx"])
+    out_path = converter.convert_edf(
+        edf_file.parent,
+        edf_file.name,
+        tmp_path / "out.h5",
+        "PR00",
+        block_size=333,
+        digital=digital,
+        write_queue=write_queue,
+        pyramid_factors=pyramid.DEFAULT_FACTORS,
+    )
+
+    with h5py.File(out_path, "r") as file:
+        dataset = file["intracranialEEG"]
+        assert pyramid.get_pyramid_factors(dataset) == pyramid.DEFAULT_FACTORS
+        samples = edf_contents["edf_data"][indices["data_ieeg"]].T
+        for factor in pyramid.DEFAULT_FACTORS:
+            level = file[pyramid.get_level_name(dataset.name, factor)][...]
+            np.testing.assert_allclose(level, summarize(samples, factor), rtol=1e-5, atol=1e-10)
+
+
+def test_build_pyramid_of_existing_file(tmp_path: pathlib.Path, edf_file: pathlib.Path) -> None:
+    """A pyramid built from a converted file matches the one built during conversion and can be rebuilt."""
+    built = converter.convert_edf(
+        edf_file.parent, edf_file.name, tmp_path / "built.h5", "PR00", pyramid_factors=(4, 64)
+    )
+    later = converter.convert_edf(edf_file.parent, edf_file.name, tmp_path / "later.h5", "PR00")
+
+    with h5py.File(later, "a") as file:
+        assert pyramid.get_pyramid_factors(file["intracranialEEG"]) == ()
+        pyramid.build_pyramid(file, factors=(4, 64), block_size=1000)
+        pyramid.build_pyramid(file, factors=(4, 64), block_size=1000)
+    with h5py.File(built, "r") as expected, h5py.File(later, "r") as file:
+        for factor in (4, 64):
+            name = pyramid.get_level_name("/intracranialEEG", factor)
+            np.testing.assert_allclose(file[name][...], expected[name][...], rtol=1e-5, atol=1e-10)
+
+
+def test_read_overview_fits_point_budget(tmp_path: pathlib.Path, edf_file: pathlib.Path) -> None:
+    """The samples are read when they fit the budget, otherwise the finest level whose bins fit."""
+    edf_contents = edf_reader(edf_file.parent, edf_file.name)
+    samples = edf_contents["edf_data"][converter.get_series_indices(edf_contents["edf_chantype_idx"])["data_ieeg"]].T
+    out_path = converter.convert_edf(
+        edf_file.parent, edf_file.name, tmp_path / "out.h5", "PR00", pyramid_factors=pyramid.DEFAULT_FACTORS
+    )
+
+    with h5py.File(out_path, "r") as file:
+        nanostamps = file["intracranialEEG_time_axis"][...]
+        start, stop = int(nanostamps[500]), int(nanostamps[2400])
+
+        raw = pyramid.read_overview(file, start, stop, max_points=2000, channels=[1])
+        assert raw.factor == 1
+        np.testing.assert_array_equal(raw.nanostamps, nanostamps[500:2400])
+        np.testing.assert_allclose(raw.mean, samples[500:2400, [1]], rtol=1e-6)
+
+        fine = pyramid.read_overview(file, start, stop, max_points=200)
+        assert fine.factor == 10 and len(fine.nanostamps) == 190
+        np.testing.assert_array_equal(fine.nanostamps, nanostamps[500:2400:10])
+        np.testing.assert_allclose(fine.max, summarize(samples[500:2400], 10)[:, 1], rtol=1e-5, atol=1e-10)
+
+        coarse = pyramid.read_overview(file, start, stop, max_points=5)
+        assert coarse.factor == 1000 and len(coarse.nanostamps) == 3
+        assert coarse.min.shape == (3, samples.shape[1])
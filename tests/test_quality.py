@@ -0,0 +1,103 @@
+"""Test cases for the quality module."""
+import pathlib
+
+import h5py
+import numpy as np
+import pytest
+
+from nkhdf5 import converter
+from nkhdf5 import quality
+from nkhdf5.edfreader import edf_reader
+
+
+def test_builder_matches_whole_blocks(tmp_path: pathlib.Path) -> None:
+    """Statistics streamed over uneven appends match the same statistics computed on each whole block."""
+    sample_rate, n_samples = 500.0, 2300
+    t = np.arange(n_samples) / sample_rate
+    rng = np.random.default_rng(0)
+    samples = rng.standard_normal((n_samples, 3)) * 0.1
+    samples[:, 0] += 2.0 * np.sin(2 * np.pi * 60.0 * t)
+    samples[100:400, 1] = 0.5
+    samples[700:750, 2] = 1.0
+
+    with h5py.File(tmp_path / "quality.h5", "w") as file:
+        dataset = file.create_dataset("intracranialEEG", data=samples.astype(np.float32))
+        builder = quality.QualityBuilder(dataset, sample_rate, block_size=1000, clip_limits=(-1.0, 1.0))
+        for start in range(0, n_samples, 333):
+            builder.append(dataset[start : start + 333])
+        builder.finish()
+        statistics = file["intracranialEEG_quality"][...]
+
+    data = samples.astype(np.float32).astype(np.float64)
+    assert statistics.shape == (3, len(quality.STATISTICS), 3)
+    for i, block in enumerate(np.split(data, [1000, 2000])):
+        np.testing.assert_allclose(statistics[i, 0], block.mean(axis=0), rtol=1e-5, atol=1e-7)
+        np.testing.assert_allclose(statistics[i, 1], block.var(axis=0), rtol=1e-5)
+        np.testing.assert_allclose(statistics[i, 2:4], [block.min(axis=0), block.max(axis=0)], rtol=1e-6)
+        np.testing.assert_allclose(statistics[i, 5], (np.abs(block) >= 1.0).mean(axis=0))
+    np.testing.assert_allclose(statistics[:2, 4, 0], 2.0, rtol=0.01)
+    assert (statistics[:2, 4, 1:] < 0.01).all()
+    np.testing.assert_allclose(statistics[0, 6], [0, 299 / 1000, 49 / 1000])
+
+
+def test_convert_edf_stores_quality(tmp_path: pathlib.Path, edf_file: pathlib.Path) -> None:
+    """A digital conversion stores the statistics of every block, which combine into those of the recording."""
+    edf_contents = edf_reader(edf_file.parent, edf_file.name)
+    samples = edf_contents["edf_data"][converter.get_series_indices(edf_contents["edf_chantype_idx"])["data_ieeg"]].T
+    out_path = converter.convert_edf(
+        edf_file.parent, edf_file.name, tmp_path / "out.h5", "PR00", block_size=700, digital=True, quality=True
+    )
+
+    with h5py.File(out_path, "r") as file:
+        nanostamps = file["intracranialEEG_time_axis"][...]
+        blocks = quality.read_quality(file)
+        window = quality.read_quality(file, start=int(nanostamps[600]), stop=int(nanostamps[2000]), channels=[0])
+        assert "EKG_quality" in file and "scalpEEG_quality" in file
+
+    assert blocks.block_size == 2560 and len(blocks) == 1
+    np.testing.assert_array_equal(blocks.nanostamps, nanostamps[:1])
+    whole = blocks.combine()
+    np.testing.assert_allclose(whole.mean[0], samples.mean(axis=0), rtol=1e-4, atol=1e-9)
+    np.testing.assert_allclose(whole.rms[0], np.sqrt((samples**2).mean(axis=0)), rtol=1e-5)
+    np.testing.assert_array_equal(whole.clipped, 0.0)
+    assert window.mean.shape == (1, 1) and window.counts.tolist() == [2560]
+
+
+@pytest.mark.parametrize("digital", [False, True])
+def test_build_quality_of_existing_file(tmp_path: pathlib.Path, edf_file: pathlib.Path, digital: bool) -> None:
+    """Statistics computed from a converted file match those computed while converting it."""
+    built = converter.convert_edf(
+        edf_file.parent, edf_file.name, tmp_path / "built.h5", "PR00", digital=digital, quality=True
+    )
+    later = converter.convert_edf(edf_file.parent, edf_file.name, tmp_path / "later.h5", "PR00", digital=digital)
+
+    with h5py.File(later, "a") as file:
+        quality.build_quality(file, read_block_size=1000)
+    with h5py.File(built, "r") as expected, h5py.File(later, "r") as file:
+        actual, desired = quality.read_quality(file), quality.read_quality(expected)
+        np.testing.assert_allclose(actual.variance, desired.variance, rtol=1e-5)
+        np.testing.assert_allclose(actual.line_noise, desired.line_noise, rtol=1e-4)
+        np.testing.assert_array_equal(actual.flat, desired.flat)
+
+
+def test_combine_pools_blocks() -> None:
+    """Pooled statistics weight each block by its number of samples."""
+    data = np.random.default_rng(1).standard_normal((250, 2))
+    parts = np.split(data, [100, 200])
+    blocks = quality.BlockStatistics(
+        100,
+        np.array([0, 100, 200]),
+        np.array([100, 100, 50]),
+        np.array([part.mean(axis=0) for part in parts]),
+        np.array([part.var(axis=0) for part in parts]),
+        np.array([part.min(axis=0) for part in parts]),
+        np.array([part.max(axis=0) for part in parts]),
+        np.zeros((3, 2)),
+        np.zeros((3, 2)),
+        np.array([[0.0, 0.0], [0.0, 0.0], [1.0, 0.0]]),
+    )
+    whole = blocks.combine()
+    np.testing.assert_allclose(whole.mean[0], data.mean(axis=0))
+    np.testing.assert_allclose(whole.variance[0], data.var(axis=0))
+    np.testing.assert_allclose(whole.flat[0], [0.2, 0.0])
+    assert whole.counts.tolist() == [250]
@@ -0,0 +1,59 @@
+"""Test cases for the scaling module."""
+import pathlib
+
+import h5py
+import numpy as np
+
+from nkhdf5 import chunkcache
+from nkhdf5 import converter
+from nkhdf5 import scaling
+from nkhdf5 import windows
+from nkhdf5.edfreader import edf_reader
+
+
+def test_convert_edf_digital_round_trips(tmp_path: pathlib.Path, edf_file: pathlib.Path, edf_digital: np.ndarray) -> None:
+    """Digital series hold the EDF samples as int16 and scaled reads match a float conversion."""
+    edf_contents = edf_reader(edf_file.parent, edf_file.name)
+    floats = converter.convert_edf(edf_file.parent, edf_file.name, tmp_path / "float.h5", "PR00", block_size=700)
+    digital = converter.convert_edf(
+        edf_file.parent, edf_file.name, tmp_path / "digital.h5", "PR00", block_size=700, digital=True
+    )
+    ieeg_idx = edf_contents["edf_chantype_idx"]["intracranial EEG"]
+
+    with h5py.File(digital, "r") as file:
+        series = file["intracranialEEG"]
+        assert series.dtype == np.int16
+        assert scaling.is_digital(series)
+        np.testing.assert_array_equal(series[...], edf_digital[ieeg_idx].T)
+
+        scaled = scaling.ScaledSeries(series)
+        np.testing.assert_allclose(scaled[10:20, 1:], edf_contents["edf_data"][ieeg_idx][1:, 10:20].T, rtol=1e-6)
+
+    with h5py.File(floats, "r") as file:
+        assert not scaling.is_digital(file["intracranialEEG"])
+
+    float_window, float_nanostamps = windows.read_window(floats, 0, 2**62)
+    digital_window, digital_nanostamps = windows.read_window(digital, 0, 2**62)
+    assert digital_window.dtype == np.float32
+    np.testing.assert_array_equal(digital_nanostamps, float_nanostamps)
+    np.testing.assert_allclose(digital_window, float_window, rtol=1e-6)
+
+
+def test_read_direct_writes_into_index_array_destinations(tmp_path: pathlib.Path, edf_file: pathlib.Path) -> None:
+    """Scaled direct reads fill destinations selected by index arrays as well as by slices."""
+    digital = converter.convert_edf(
+        edf_file.parent, edf_file.name, tmp_path / "digital.h5", "PR00", block_size=700, digital=True
+    )
+
+    with h5py.File(digital, "r") as file:
+        series = file["intracranialEEG"]
+        expected = scaling.ScaledSeries(series)[0:3]
+        for reader in (scaling.ScaledSeries(series), chunkcache.CachedSeries(series, chunkcache.ChunkCache())):
+            dest = np.zeros((6, series.shape[1]), dtype=scaling.SCALED_DTYPE)
+            reader.read_direct(dest, np.s_[0:3], np.s_[[0, 2, 4]])
+            np.testing.assert_array_equal(dest[[0, 2, 4]], expected)
+            np.testing.assert_array_equal(dest[[1, 3, 5]], 0)
+
+            dest = np.zeros((3, series.shape[1]), dtype=scaling.SCALED_DTYPE)
+            reader.read_direct(dest, np.s_[0:3], np.s_[0:3])
+            np.testing.assert_array_equal(dest, expected)
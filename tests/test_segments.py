@@ -0,0 +1,77 @@
+"""Test cases for the segments module."""
+import pathlib
+
+import h5py
+import numpy as np
+
+from nkhdf5 import live
+from nkhdf5 import segments
+from nkhdf5 import windows
+from nkhdf5.timestamps import sample_nanostamps
+
+
+START = 1_689_870_600_000_000_000
+
+
+def test_builder_matches_scan_of_time_axis() -> None:
+    """Segments built over blocks split at and next to the gaps match the table of the whole time axis."""
+    nanostamps = np.concatenate(
+        [
+            sample_nanostamps(START, 1000.0, 0, 500),
+            sample_nanostamps(START + 10**9, 1000.0, 0, 300),
+            sample_nanostamps(START + 2 * 10**9, 1000.0, 0, 1),
+            sample_nanostamps(START + 5 * 10**9, 1000.0, 0, 200),
+        ]
+    )
+    builder = segments.SegmentBuilder(1000.0)
+    for start, stop in [(0, 500), (500, 650), (650, 800), (800, 801), (801, 1001)]:
+        builder.append(nanostamps[start:stop])
+
+    expected = np.array(
+        [
+            [0, 500, START, START + 499_000_000],
+            [500, 800, START + 10**9, START + 10**9 + 299_000_000],
+            [800, 801, START + 2 * 10**9, START + 2 * 10**9],
+            [801, 1001, START + 5 * 10**9, START + 5 * 10**9 + 199_000_000],
+        ]
+    )
+    np.testing.assert_array_equal(builder.table, expected)
+    assert builder.length == 1001
+
+
+def test_converted_files_store_tables(h5_dir: pathlib.Path) -> None:
+    """Explicit and compact files store a table covering the series, equal to one computed from the time axis."""
+    for path in sorted(h5_dir.glob("*.h5")):
+        with h5py.File(path, "r") as file:
+            dataset = file["intracranialEEG"]
+            table = file["intracranialEEG_segments"][...]
+            np.testing.assert_array_equal(table, segments.compute_segments(dataset))
+            np.testing.assert_array_equal(segments.get_segments(dataset), table)
+            assert table.shape == (1, 4) and table[0, 1] == dataset.shape[0]
+
+
+def test_segmented_window_splits_at_gaps(tmp_path: pathlib.Path, h5_dir: pathlib.Path) -> None:
+    """A window across a pause is split where the tables say, and consecutive files merge into one segment."""
+    path = tmp_path / "live.h5"
+    blocks = np.arange(600 * 2, dtype=np.float32).reshape(600, 2)
+    with live.LiveWriter(path, "PR00", START, 1000.0, {"data_ieeg": 2}) as writer:
+        writer.append({"data_ieeg": blocks[:250]})
+        writer.append({"data_ieeg": blocks[250:]}, start=START + 10**9)
+
+    window = windows.read_segmented_window(path, START + 100_000_000, START + 10**9 + 50_000_000)
+    np.testing.assert_array_equal(
+        window.segments,
+        [
+            [0, 150, START + 100_000_000, START + 249_000_000],
+            [150, 200, START + 10**9, START + 10**9 + 49_000_000],
+        ],
+    )
+    (first, first_nanostamps), (second, _) = window.split()
+    np.testing.assert_array_equal(first, blocks[100:250])
+    np.testing.assert_array_equal(second, blocks[250:300])
+    assert first_nanostamps[-1] == START + 249_000_000
+
+    with h5py.File(sorted(h5_dir.glob("*.h5"))[0], "r") as file:
+        first_start = int(file["intracranialEEG_time_axis"][0])
+    across = windows.read_segmented_window(h5_dir, first_start, first_start + 15 * 10**9)
+    assert across.segments.tolist() == [[0, 3840, across.nanostamps[0], across.nanostamps[-1]]]
@@ -0,0 +1,30 @@
+"""Test cases for the storage module."""
+import pathlib
+
+import h5py
+import pytest
+
+from nkhdf5 import converter
+from nkhdf5 import storage
+
+
+def test_presets_size_chunks_from_rate_and_channels() -> None:
+    """Chunks span all channels and are sized by duration or byte budget."""
+    realtime = storage.get_storage_preset("realtime").get_series_kwargs(2000, 200)
+    assert realtime == {"chunks": (500, 200)}
+
+    analysis = storage.get_storage_preset("analysis").get_series_kwargs(2000, 256)
+    assert analysis == {"chunks": (1024, 256)}
+
+    with pytest.raises(ValueError):
+        storage.get_storage_preset("fastest")
+
+
+def test_convert_edf_with_archive_preset(tmp_path: pathlib.Path, edf_file: pathlib.Path) -> None:
+    """The preset filters and channel-sized chunks reach the written datasets."""
+    out_path = converter.convert_edf(edf_file.parent, edf_file.name, tmp_path / "out.h5", "PR00", storage="archive")
+    with h5py.File(out_path, "r") as file:
+        assert file["intracranialEEG"].compression == "gzip"
+        assert file["intracranialEEG"].shuffle
+        assert file["intracranialEEG"].chunks[1] == 3
+        assert file["intracranialEEG_time_axis"].chunks == (file["intracranialEEG"].chunks[0],)
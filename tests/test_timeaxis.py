@@ -0,0 +1,50 @@
+"""Test cases for the timeaxis module."""
+import pathlib
+
+import h5py
+import numpy as np
+import pytest
+
+from nkhdf5 import timeaxis
+from nkhdf5.timestamps import sample_nanostamps
+
+
+START = 1_689_885_000_000_000_000
+
+
+@pytest.fixture
+def series(tmp_path: pathlib.Path) -> h5py.Dataset:
+    """An empty electrical series in a scratch file."""
+    file = h5py.File(tmp_path / "axis.h5", "w")
+    yield file.create_dataset("series", shape=(0, 2), maxshape=(None, 2), dtype="f4")
+    file.close()
+
+
+def test_compact_axis_records_only_discontinuities(series: h5py.Dataset) -> None:
+    """A gap creates one record and materialized nanostamps match the originals."""
+    first = sample_nanostamps(START, 1000, 0, 500)
+    second = sample_nanostamps(START + 10**9, 1000, 0, 300)
+    nanostamps = np.concatenate([first, second])
+
+    axis = timeaxis.CompactTimeAxis(series).create(1000)
+    axis.append_nanostamps(nanostamps[:200])
+    axis.append_nanostamps(nanostamps[200:])
+
+    assert timeaxis.CompactTimeAxis.is_compact(series)
+    assert isinstance(timeaxis.get_time_axis(series), timeaxis.CompactTimeAxis)
+    np.testing.assert_array_equal(axis.records[...], [[0, START], [500, START + 10**9]])
+    np.testing.assert_array_equal(axis[:], nanostamps)
+    np.testing.assert_array_equal(axis[495:505], nanostamps[495:505])
+    assert axis[-1] == nanostamps[-1]
+
+
+def test_compact_axis_searchsorted(series: h5py.Dataset) -> None:
+    """Searching matches numpy on the materialized axis, including inside gaps."""
+    axis = timeaxis.CompactTimeAxis(series).create(3)
+    axis.extend(30, start=START)
+    axis.extend(30, start=START + 20 * 10**9)
+    nanostamps = axis[:]
+
+    for value in [START - 1, START, START + 5 * 10**9 + 1, START + 15 * 10**9, nanostamps[45], nanostamps[-1] + 1]:
+        for side in ["left", "right"]:
+            assert axis.searchsorted(int(value), side) == np.searchsorted(nanostamps, value, side)
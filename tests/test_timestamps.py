@@ -0,0 +1,53 @@
+"""Test cases for the timestamps module."""
+import datetime
+import time
+
+import numpy as np
+import pytest
+
+from nkhdf5 import timestamps
+
+
+def test_sample_nanostamps_keeps_integer_precision() -> None:
+    """Nanostamps near 1e18 are exact for integer and fractional sample rates."""
+    start = 1_689_885_000_123_456_789
+    stamps = timestamps.sample_nanostamps(start, 2000, 10, 14)
+    assert stamps.dtype == np.int64
+    np.testing.assert_array_equal(stamps - start, [5_000_000, 5_500_000, 6_000_000, 6_500_000])
+
+    fractional = timestamps.sample_nanostamps(start, 3.0, 0, 4)
+    np.testing.assert_array_equal(fractional - start, [0, 333_333_333, 666_666_666, 1_000_000_000])
+
+
+def test_sample_offsets_of_long_recordings_do_not_overflow() -> None:
+    """Offsets past the ~9.2e9 samples where indices * 1e9 overflows int64 match exact integer arithmetic."""
+    indices = np.array([10**10, 2**40 + 12345, 30_000 * 3_600 * 24 * 365 * 5])
+    expected = [int(index) * 10**9 // 30_000 for index in indices]
+    np.testing.assert_array_equal(timestamps.sample_offsets(indices, 30_000), expected)
+
+
+def test_nanostamps_to_datetime64_matches_fromtimestamp() -> None:
+    """Local conversion agrees with datetime.fromtimestamp."""
+    local = datetime.datetime(2023, 7, 20, 13, 30, 15)
+    start = timestamps.local_datetime_to_nanostamp(local)
+    stamps = timestamps.sample_nanostamps(start, 1000, 0, 3)
+
+    local_times = timestamps.nanostamps_to_datetime64(stamps, local=True)
+    assert local_times[0] == np.datetime64(local)
+    assert local_times[2] == np.datetime64(datetime.datetime.fromtimestamp(int(stamps[2]) / 1e9))
+    utc_times = timestamps.nanostamps_to_datetime64(stamps)
+    np.testing.assert_array_equal(timestamps.datetime64_to_nanostamps(utc_times), stamps)
+
+
+def test_local_datetime64_across_half_hour_dst_change(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Local times in an hour whose offset changes on the half hour match datetime.fromtimestamp."""
+    monkeypatch.setenv("TZ", "America/St_Johns")
+    time.tzset()
+    try:
+        change = int(datetime.datetime(2023, 3, 12, 5, 30, tzinfo=datetime.timezone.utc).timestamp())
+        stamps = np.arange(change - 1200, change + 1800, 600, dtype=np.int64) * 10**9
+        expected = [np.datetime64(datetime.datetime.fromtimestamp(int(stamp) // 10**9)) for stamp in stamps]
+        np.testing.assert_array_equal(timestamps.nanostamps_to_datetime64(stamps, local=True), expected)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
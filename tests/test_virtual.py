@@ -0,0 +1,70 @@
+"""Test cases for the virtual module."""
+import datetime
+import pathlib
+
+import h5py
+import numpy as np
+
+from nkhdf5 import converter
+from nkhdf5 import pyramid
+from nkhdf5 import segments
+from nkhdf5 import virtual
+from nkhdf5 import windows
+from nkhdf5.hdf5nk import HDF5NK_0_1_0
+from nkhdf5.timeaxis import get_time_axis
+
+from .conftest import EDF_LABELS
+from .conftest import EDF_START
+from .conftest import write_edf
+
+
+def test_virtual_file_views_sources(tmp_path: pathlib.Path, h5_dir: pathlib.Path) -> None:
+    """The virtual series reads the same samples as the source files without copying them."""
+    out_path = virtual.build_virtual_file(h5_dir, tmp_path / "session.h5")
+    full_data, full_nanostamps = windows.read_window(h5_dir, 0, np.iinfo(np.int64).max)
+
+    with HDF5NK_0_1_0(file=out_path) as f_obj:
+        assert f_obj["data_ieeg"].is_virtual
+        np.testing.assert_array_equal(f_obj["data_ieeg"][...], full_data)
+        np.testing.assert_array_equal(get_time_axis(f_obj["data_ieeg"])[:], full_nanostamps)
+        assert f_obj["data_ieeg"].axes[1]["channellabel_axis"].shape == (3, 2)
+        assert f_obj["data_ekg"].shape == (5120, 1)
+
+    with h5py.File(out_path, "r") as file:
+        assert file["intracranialEEG_time_axis"].dtype == np.int64
+
+    start, stop = int(full_nanostamps[1000]), int(full_nanostamps[4000])
+    window_path = virtual.build_virtual_file(h5_dir, tmp_path / "window.h5", series=["data_ieeg"], start=start, stop=stop)
+    data, nanostamps = windows.read_window(window_path, start, stop)
+    np.testing.assert_array_equal(data, full_data[1000:4000])
+    np.testing.assert_array_equal(nanostamps, full_nanostamps[1000:4000])
+
+
+def test_virtual_file_side_datasets_and_empty_series(tmp_path: pathlib.Path, edf_digital: np.ndarray) -> None:
+    """Segment tables are built for the virtual series, pyramids are left out and a 0 channel series stays empty."""
+    labels = [label for label in EDF_LABELS if "EMG" not in label]
+    sources = tmp_path / "h5"
+    sources.mkdir()
+    for i in range(2):
+        start = EDF_START + datetime.timedelta(seconds=10 * i)
+        edf_path = write_edf(tmp_path / f"rec{i}.edf", edf_digital[: len(labels)], labels, 256, start=start)
+        converter.convert_edf(
+            tmp_path, edf_path.name, sources / f"rec{i}.h5", "PR00", pyramid_factors=(10,), quality=True
+        )
+
+    out_path = virtual.build_virtual_file(sources, tmp_path / "session.h5")
+    full_data, full_nanostamps = windows.read_window(sources, 0, np.iinfo(np.int64).max)
+    with h5py.File(out_path, "r") as file:
+        series = file["intracranialEEG"]
+        assert file["EMG"].shape == (5120, 0) and file["EMG"].is_virtual
+        expected_segments = [[0, 5120, full_nanostamps[0], full_nanostamps[-1]]]
+        np.testing.assert_array_equal(file["EMG_segments"][...], expected_segments)
+        np.testing.assert_array_equal(file["intracranialEEG_segments"][...], segments.compute_segments(series))
+        assert pyramid.PYRAMID_FACTORS not in series.attrs and "intracranialEEG_quality" not in file
+        overview = pyramid.read_overview(file, int(full_nanostamps[0]), int(full_nanostamps[-1]) + 1, 100)
+        assert overview.factor == 1
+
+    emg, nanostamps = windows.read_window(out_path, 0, np.iinfo(np.int64).max, series="data_emg")
+    assert emg.shape == (5120, 0)
+    np.testing.assert_array_equal(nanostamps, full_nanostamps)
+    np.testing.assert_array_equal(windows.read_window(out_path, 0, np.iinfo(np.int64).max)[0], full_data)
@@ -0,0 +1,39 @@
+"""Test cases for the windows module."""
+import pathlib
+
+import h5py
+import numpy as np
+
+from nkhdf5 import windows
+
+
+def test_read_window_spans_files(h5_dir: pathlib.Path) -> None:
+    """A window across the file boundary matches a full read filtered by time."""
+    full_data, full_nanostamps = windows.read_window(h5_dir, 0, np.iinfo(np.int64).max)
+    assert full_data.shape == (5120, 3)
+    assert np.all(np.diff(full_nanostamps) > 0)
+
+    start = int(full_nanostamps[2000])
+    stop = int(full_nanostamps[3000])
+    data, nanostamps = windows.read_window(sorted(h5_dir.glob("*.h5"))[::-1], start, stop)
+
+    in_window = (full_nanostamps >= start) & (full_nanostamps < stop)
+    np.testing.assert_array_equal(nanostamps, full_nanostamps[in_window])
+    np.testing.assert_array_equal(data, full_data[in_window])
+
+
+def test_read_window_outside_files(h5_dir: pathlib.Path) -> None:
+    """A window with no samples returns empty arrays which keep the channel count."""
+    data, nanostamps = windows.read_window(h5_dir, 0, 10)
+    assert data.shape == (0, 3)
+    assert nanostamps.shape == (0,)
+
+
+def test_end_attribute_is_exclusive(h5_dir: pathlib.Path) -> None:
+    """The end attribute is one sample period after the last sample, and a window starting there skips the file."""
+    path = sorted(h5_dir.glob("*.h5"))[0]
+    with h5py.File(path, "r") as file:
+        end = int(file.attrs["end"])
+        assert end == int(file["intracranialEEG_time_axis"][-1]) + 10**9 // 256
+        assert windows.find_source_slice(file, path, "data_ieeg", end, end + 10**9) is None
+        assert windows.find_source_slice(file, path, "data_ieeg", end - 10**9 // 256, end).length == 1